@@ -18,6 +18,8 @@ from ..core import utils
 from ..core.config import Config
 from ..core.backtrace import loadBacktraceHook
 from ..core.log import setupLogging, getLogger, LoggerError
+from ..libs.stats import HW_STATS_FILE, enableHwStats, hwStatsEnabled, saveHwStats
+from ..libs.trace import TRACE_FILE, enableTracing, saveTrace, span, tracingEnabled
 
 logging = getLogger(__name__)
 
@@ -41,6 +43,10 @@ def rootParser(parser):
                        help='force simulation mode')
    parser.add_argument('--syslog', action='store_true',
                        help='also send logs to syslog')
+   parser.add_argument('--trace', action='store_true',
+                       help='record a trace of the execution, see arista trace')
+   parser.add_argument('--stats', action='store_true',
+                       help='count the hardware accesses, see arista stats')
    addCommonArgs(parser)
 
 def parseArgs(args):
@@ -61,7 +67,20 @@ def parseArgs(args):
 
    return root, args
 
+def saveExecutionTrace(command):
+   try:
+      saveTrace(utils.StoredData(TRACE_FILE).path, command=command)
+   except (IOError, OSError) as e:
+      logging.warning('failed to save the execution trace: %s', e)
+
+def saveHardwareStats(command):
+   try:
+      saveHwStats(utils.StoredData(HW_STATS_FILE).path, command=command)
+   except (IOError, OSError) as e:
+      logging.warning('failed to save the hardware access counters: %s', e)
+
 def main(args):
+   command = ' '.join(['arista'] + list(args))
    root, args = parseArgs(args)
 
    try:
@@ -78,10 +97,22 @@ def main(args):
 
    logging.debug(args)
 
+   if args.trace or Config().trace:
+      enableTracing()
+
+   if args.stats or Config().hw_stats:
+      enableHwStats()
+
    try:
-      root.runAction(CliContext(), args)
+      with span(command, 'cli'):
+         root.runAction(CliContext(), args)
    except ActionError as e:
       logging.error('%s', e)
       return e.code
+   finally:
+      if tracingEnabled():
+         saveExecutionTrace(command)
+      if hwStatsEnabled():
+         saveHardwareStats(command)
 
    return 0
@@ -6,6 +6,8 @@ from ...args.linecard.setup import setupParser
 from ....core.component import Priority
 from ....core.config import Config
 from ....core.log import getLogger
+from ....libs.trace import span
+from ....libs.wait import saveWaitStats
 
 from ....components.linecard import LCpuCtx
 
@@ -13,9 +15,9 @@ logging = getLogger(__name__)
 
 def setupLinecard(linecard, args, lcpu):
    if args.early or not args.late:
-      linecard.setupStandby(Priority.defaultFilter)
+      linecard.setupStandby(Priority.defaultFilter, jobs=args.jobs)
    if args.late or not args.early:
-      linecard.setupStandby(Priority.backgroundFilter)
+      linecard.setupStandby(Priority.backgroundFilter, jobs=args.jobs)
 
    if not args.on:
       return
@@ -34,12 +36,13 @@ def setupLinecard(linecard, args, lcpu):
    if not Config().linecard_standby_only or lcpu:
       if linecard.poweredOn() and args.powerCycleIfOn:
          linecard.powerOnIs(False, lcpuCtx=lcpuCtx)
-      linecard.powerOnIs(True, lcpuCtx=lcpuCtx)
+      with span('power on', 'linecard'):
+         linecard.powerOnIs(True, lcpuCtx=lcpuCtx)
       if not lcpu:
          if args.early or not args.late:
-            linecard.setupMain(Priority.defaultFilter)
+            linecard.setupMain(Priority.defaultFilter, jobs=args.jobs)
          if args.late or not args.early:
-            linecard.setupMain(Priority.backgroundFilter)
+            linecard.setupMain(Priority.backgroundFilter, jobs=args.jobs)
 
 @registerAction(setupParser)
 def doSetup(ctx, args):
@@ -47,6 +50,8 @@ def doSetup(ctx, args):
    for linecard in ctx.linecards:
       logging.debug('Setting up %s', linecard)
       try:
-         setupLinecard(linecard, args, lcpu)
+         with span(linecard, 'linecard'):
+            setupLinecard(linecard, args, lcpu)
       except Exception as e: # pylint: disable=broad-except
          logging.warning('Failed to setup %s: %s', linecard, str(e))
+   saveWaitStats()
@@ -8,11 +8,14 @@ from ..args.setup import setupParser
 from ...core import utils
 from ...core.config import Config
 from ...core.component import Priority
-from ...core.log import getLogger
+from ...core.log import flushLogging, getLogger
+from ...libs.wait import saveWaitStats
 
 logging = getLogger(__name__)
 
 def forkForLateInitialization(platform):
+   # the logging thread is not carried over, pending messages must be written
+   flushLogging()
    try:
       pid = os.fork()
    except OSError:
@@ -21,6 +24,7 @@ def forkForLateInitialization(platform):
       if pid > 0:
          logging.debug('initializing slow drivers in child %d', pid)
          platform.waitForIt()
+         flushLogging()
          os._exit(0) # pylint: disable=protected-access
 
 @registerAction(setupParser)
@@ -33,7 +37,7 @@ def doSetup(ctx, args):
    with utils.FileLock(Config().lock_file):
       if args.early or not args.late:
          logging.debug('setting up critical drivers')
-         platform.setup(Priority.defaultFilter)
+         platform.setup(Priority.defaultFilter, jobs=args.jobs)
 
       # NOTE: This assumes that none of the resetable devices are
       #       initialized in background.
@@ -49,8 +53,10 @@ def doSetup(ctx, args):
          else:
             logging.debug('setting up slow drivers normally')
 
-         platform.setup(Priority.backgroundFilter)
+         platform.setup(Priority.backgroundFilter, jobs=args.jobs)
 
       if args.early or not args.late:
          if not args.background:
             platform.waitForIt()
+
+      saveWaitStats()
@@ -1,9 +1,17 @@
 
 from . import registerAction
 from ....args.show.platform.environment import environmentParser
-from ....show.environment import ShowEnvironment
+from ....show.environment import ShowEnvironment, ShowEnvironmentHistory
+from .....libs.history import readHistory
+from .....libs.telemetry import readTelemetry
 
 @registerAction(environmentParser)
 def doShowEnvironment(ctx, args):
+   if args.history:
+      history = readHistory(level=args.history)
+      ctx.show.render(ShowEnvironmentHistory(history, args.samples))
+      return
+   # values published by the daemon are used unless live ones are requested
+   snapshot = None if args.live else readTelemetry()
    ctx.show.addInventory(ctx.platform.inventory)
-   ctx.show.render(ShowEnvironment())
+   ctx.show.render(ShowEnvironment(snapshot=snapshot))
@@ -0,0 +1,52 @@
+from __future__ import absolute_import, division, print_function
+
+from . import registerAction
+from ..args.stats import statsParser
+from ...core.utils import StoredData
+from ...libs.stats import HW_STATS_FILE, aggregateHwStats, loadHwStats
+
+SORT_KEYS = {
+   'count': lambda s: s.count,
+   'time': lambda s: s.total,
+   'errors': lambda s: s.errors,
+   'max': lambda s: s.max,
+}
+
+def formatLatency(seconds):
+   return '%.1fus' % (seconds * 1000000)
+
+@registerAction(statsParser, needsPlatform=False)
+def doStats(ctx, args):
+   store = StoredData(HW_STATS_FILE)
+   if args.clear:
+      store.clear()
+      return
+
+   path = args.file or store.path
+   processes = loadHwStats(path)
+   if args.command:
+      processes = [p for p in processes if args.command in p.get('name', '')]
+   if not processes:
+      print('No hardware access counted in %s' % path)
+      return
+
+   print('Commands:')
+   for process in processes:
+      print('  %8d  %s' % (sum(r.get('count', 0) for r in process['rows']),
+                           process.get('name')))
+
+   groupBy = args.group_by or ['device']
+   merged = aggregateHwStats(processes, groupBy)
+   stats = sorted(merged.items(), key=lambda i: SORT_KEYS[args.sort](i[1]),
+                  reverse=True)
+
+   print('')
+   print('Top talkers by %s:' % ', '.join(groupBy))
+   print('  %8s %6s %10s %10s %10s %10s  %s' % (
+      'count', 'errors', 'total', 'avg', 'p90', 'max', ' '.join(groupBy)))
+   for key, stat in stats[:args.top]:
+      print('  %8d %6d %10s %10s %10s %10s  %s' % (
+         stat.count, stat.errors, '%.3fms' % (stat.total * 1000),
+         formatLatency(stat.total / stat.count if stat.count else 0),
+         formatLatency(stat.percentile(0.9)), formatLatency(stat.max),
+         ' '.join(str(v) if v is not None else '-' for v in key)))
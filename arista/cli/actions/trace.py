@@ -0,0 +1,49 @@
+from __future__ import absolute_import, division, print_function
+
+from . import registerAction
+from ..args.trace import traceParser
+from ...core.utils import StoredData
+from ...libs.trace import TRACE_FILE, buildTraceTree, criticalPath, loadTrace
+
+def formatDuration(us):
+   return '%.1fms' % (us / 1000.)
+
+def iterNodes(nodes):
+   for node in nodes:
+      yield node
+      for child in iterNodes(node.children):
+         yield child
+
+@registerAction(traceParser, needsPlatform=False)
+def doTrace(ctx, args):
+   store = StoredData(TRACE_FILE)
+   if args.clear:
+      store.clear()
+      return
+
+   path = args.file or store.path
+   roots = buildTraceTree(loadTrace(path))
+   if not roots:
+      print('No trace recorded in %s' % path)
+      return
+
+   threshold = args.threshold * 1000
+   print('Commands:')
+   for root in roots:
+      print('  %10s  %s' % (formatDuration(root.duration), root.name))
+
+   print('')
+   print('Critical path:')
+   for depth, node in criticalPath(roots):
+      if depth >= args.depth or node.duration < threshold:
+         continue
+      print('  %10s %10s  %s%s [%s]' % (
+         formatDuration(node.duration), formatDuration(node.selfTime),
+         '  ' * depth, node.name, node.cat))
+
+   print('')
+   print('Highest self time:')
+   nodes = sorted(iterNodes(roots), key=lambda n: n.selfTime, reverse=True)
+   for node in nodes[:args.top]:
+      print('  %10s  %s [%s]' % (formatDuration(node.selfTime), node.name,
+                                 node.cat))
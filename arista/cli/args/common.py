@@ -7,3 +7,7 @@ def addPriorityArgs(parser):
    parser.add_argument('--late', action='store_true',
       help='perform late initialisation, tied to the platform')
 
+
+def addJobsArgs(parser):
+   parser.add_argument('-j', '--jobs', type=int, default=None,
+      help='number of components set up concurrently')
@@ -2,7 +2,7 @@
 from __future__ import absolute_import, division, print_function
 
 from .. import registerParser
-from ..common import addPriorityArgs
+from ..common import addJobsArgs, addPriorityArgs
 from . import linecardParser
 
 from ....core.provision import ProvisionMode
@@ -10,6 +10,7 @@ from ....core.provision import ProvisionMode
 @registerParser('setup', parent=linecardParser)
 def setupParser(parser):
    addPriorityArgs(parser)
+   addJobsArgs(parser)
    parser.add_argument('--on', action='store_true',
       help='turn on linecard')
    parser.add_argument('--lcpu', action='store_true', default=None,
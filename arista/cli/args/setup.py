@@ -2,7 +2,7 @@
 from __future__ import absolute_import, division, print_function
 
 from . import registerParser
-from .common import addPriorityArgs
+from .common import addJobsArgs, addPriorityArgs
 from .default import defaultPlatformParser
 
 @registerParser('setup', parent=defaultPlatformParser,
@@ -15,3 +15,4 @@ def setupParser(parser):
    parser.add_argument('-b', '--background', action='store_true',
       help='initialize slow, non-critical drivers in background')
    addPriorityArgs(parser)
+   addJobsArgs(parser)
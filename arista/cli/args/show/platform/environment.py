@@ -1,7 +1,14 @@
 
 from . import registerParser, showPlatformParser
+from .....libs.history import HISTORY_LEVELS
 
 @registerParser('environment', parent=showPlatformParser,
                 help='Show environmental info')
 def environmentParser(parser):
-   pass
+   parser.add_argument('--live', action='store_true',
+      help='read the hardware instead of the snapshot of the daemon')
+   parser.add_argument('--history', nargs='?', const='minutes',
+      choices=[level.name for level in HISTORY_LEVELS],
+      help='show the values recorded by the daemon at the given resolution')
+   parser.add_argument('--samples', type=int, default=12,
+      help='number of recorded values to show for each sensor')
@@ -0,0 +1,26 @@
+from __future__ import absolute_import, division, print_function
+
+from . import registerParser
+from ...libs.stats import STATS_FIELDS
+
+@registerParser('stats', help='show the hardware access counters',
+                description='''
+Show the hardware accesses counted by the commands run with --stats or with
+the hw_stats configuration enabled, the daemon publishes its counters every
+minute.
+''')
+def statsParser(parser):
+   parser.add_argument('-f', '--file', type=str, default=None,
+      help='stats file to read instead of the one of this boot')
+   parser.add_argument('-g', '--group-by', type=str, action='append',
+      choices=STATS_FIELDS, default=None,
+      help='fields to group the accesses by, defaults to device')
+   parser.add_argument('-s', '--sort', type=str, default='time',
+      choices=['count', 'time', 'errors', 'max'],
+      help='order of the top talkers')
+   parser.add_argument('-n', '--top', type=int, default=20,
+      help='number of top talkers to display')
+   parser.add_argument('-c', '--command', type=str, default=None,
+      help='only show the accesses of the commands containing this string')
+   parser.add_argument('--clear', action='store_true',
+      help='remove the recorded counters')
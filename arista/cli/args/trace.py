@@ -0,0 +1,21 @@
+from __future__ import absolute_import, division, print_function
+
+from . import registerParser
+
+@registerParser('trace', help='summarize the recorded execution traces',
+                description='''
+Summarize the trace recorded by the commands run with --trace or with the
+trace configuration enabled. The trace file can also be loaded as is in
+chrome://tracing or Perfetto.
+''')
+def traceParser(parser):
+   parser.add_argument('-f', '--file', type=str, default=None,
+      help='trace file to read instead of the one of this boot')
+   parser.add_argument('-d', '--depth', type=int, default=3,
+      help='depth of the critical path to display')
+   parser.add_argument('-t', '--threshold', type=float, default=10.,
+      help='hide spans shorter than this many milliseconds')
+   parser.add_argument('-n', '--top', type=int, default=10,
+      help='number of spans with the highest self time to display')
+   parser.add_argument('--clear', action='store_true',
+      help='remove the recorded trace')
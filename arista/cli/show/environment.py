@@ -1,13 +1,49 @@
 
 from __future__ import print_function
 
+import time
+
 from ...core.diag import DiagContext
 
 from . import Renderer
 
+# diag fields filled from the telemetry snapshot of the daemon
+TELEMETRY_DIAG_FIELDS = {
+   'temps': [
+      ('present', 'present'),
+      ('status', 'status'),
+      ('value', 'value'),
+      ('highThresh', 'high'),
+      ('highCritThresh', 'critical'),
+   ],
+   'fans': [
+      ('present', 'present'),
+      ('status', 'status'),
+      ('speed', 'value'),
+   ],
+   'psuSlots': [
+      ('present', 'present'),
+      ('status', 'status'),
+   ],
+}
+
 class ShowEnvironment(Renderer):
-   def __init__(self):
+   def __init__(self, snapshot=None):
       super(ShowEnvironment, self).__init__('environment')
+      self.snapshot = snapshot
+
+   def _diag(self, kind, index, item, ctx):
+      record = None
+      if self.snapshot is not None:
+         record = self.snapshot.get(kind, index, item.getName())
+      if record is None:
+         return item.__diag__(ctx)
+      data = item.__diag__(DiagContext(performIo=False))
+      for field, attr in TELEMETRY_DIAG_FIELDS[kind]:
+         data[field] = getattr(record, attr)
+      if kind == 'fans' and data['speed'] is not None:
+         data['speed'] = int(data['speed'])
+      return data
 
    def data(self, show):
       ctx = DiagContext()
@@ -17,12 +53,12 @@ class ShowEnvironment(Renderer):
          'psuSlots': [],
       }
       for inventory, _ in show.inventories:
-         for temp in inventory.getTemps():
-            data['temps'].append(temp.__diag__(ctx))
-         for fan in inventory.getFans():
-            data['fans'].append(fan.__diag__(ctx))
-         for slot in inventory.getPsuSlots():
-            data['psuSlots'].append(slot.__diag__(ctx))
+         for index, temp in enumerate(inventory.getTemps()):
+            data['temps'].append(self._diag('temps', index, temp, ctx))
+         for index, fan in enumerate(inventory.getFans()):
+            data['fans'].append(self._diag('fans', index, fan, ctx))
+         for index, slot in enumerate(inventory.getPsuSlots()):
+            data['psuSlots'].append(self._diag('psuSlots', index, slot, ctx))
       return data
 
    def _getKey(self, data, key, default="N/A"):
@@ -70,3 +106,47 @@ class ShowEnvironment(Renderer):
       self._renderCollection(fanHdr, data['fans'])
       print()
       self._renderCollection(psuHdr, data['psuSlots'])
+
+class ShowEnvironmentHistory(Renderer):
+   '''Values recorded by the daemon, the newest last'''
+   def __init__(self, history, samples=None):
+      super(ShowEnvironmentHistory, self).__init__('environmentHistory')
+      self.history = history or {}
+      self.samples = samples
+
+   def data(self, show):
+      data = {
+         'temps': [],
+         'fans': [],
+      }
+      # names are not unique, series are listed in the inventory order
+      for (kind, index, name), samples in sorted(self.history.items()):
+         if self.samples:
+            samples = samples[-self.samples:]
+         data[kind].append({
+            'index': index,
+            'name': name,
+            'samples': [s._asdict() for s in samples],
+         })
+      return data
+
+   def renderText(self, show):
+      data = self.data(show)
+      if not any(data.values()):
+         print('No history recorded')
+         return
+      fmt = '%-20s %8s %8s %8s'
+      for kind, title in [('temps', 'Temperature'), ('fans', 'Fan speed')]:
+         for series in data[kind]:
+            print('%s %s' % (title, series['name']))
+            print(fmt % ('Time', 'Min', 'Avg', 'Max'))
+            print(fmt % ('-' * 20, '-' * 8, '-' * 8, '-' * 8))
+            for sample in series['samples']:
+               print(fmt % (
+                  time.strftime('%Y-%m-%d %H:%M:%S',
+                                time.localtime(sample['time'])),
+                  '%.1f' % sample['min'],
+                  '%.1f' % sample['avg'],
+                  '%.1f' % sample['max'],
+               ))
+            print()
@@ -3,6 +3,7 @@ from __future__ import absolute_import, division, print_function
 
 import copy
 
+from ...core.asic import waitForSwitchChips
 from ...core.card import Card, CardSlot
 from ...core.log import getLogger
 from ...libs.wait import waitFor
@@ -121,8 +122,7 @@ class DenaliCard(Card):
       if on:
          self.slot.enablePciPort()
          # Check chip visiblity in pci domain
-         for asic in self.asics:
-            asic.waitForIt()
+         waitForSwitchChips(self.asics)
 
    def powerOnIs(self, on, lcpuCtx=None):
       if on:
@@ -192,6 +192,12 @@ class DenaliCardSlot(CardSlot):
       self.card.pca.takeOwnership()
       return self.card.eeprom.prefdl()
 
+   def readIdentity(self, verify=False):
+      if verify:
+         return self.getEeprom()
+      self.card.pca.takeOwnership()
+      return self.card.eeprom.identity()
+
    def pciAddr(self, domain=0, bus=0, device=0, func=0):
       addr = copy.deepcopy(self.pci)
 
@@ -27,6 +27,7 @@ class DenaliChassisTest(unittest.TestCase):
                slot.getPresence = lambda: False
             else:
                slot.getEeprom = lambda c=cls: { 'SKU': c.SKU[0] }
+               slot.readIdentity = lambda c=cls, verify=False: { 'SKU': c.SKU[0] }
 
       hookCardSlots(chassis.active.fabricSlots, fabrics)
       hookCardSlots(chassis.active.linecardSlots, linecards)
@@ -22,6 +22,9 @@ class UcdReloadCauseEntry(ReloadCauseEntry):
    pass
 
 class Ucd(I2cComponent):
+
+   RELOAD_CAUSE_PROVIDER = True
+
    class Registers(object):
       RUN_TIME_CLOCK = 0xd7
       LOGGED_FAULTS = 0xea
@@ -172,10 +175,10 @@ class Ucd(I2cComponent):
          for cause in causes:
             logging.debug('found: %s', cause)
 
-      faultCount = drv.getFaultCount()
-      logging.debug('found %d faults', faultCount)
-      for i in range(0, faultCount):
-         causes.extend(self._getFaultNum(drv.getFaultNum(i)))
+      faults = drv.getFaultDetails()
+      logging.debug('found %d faults', len(faults))
+      for fault in faults:
+         causes.extend(self._getFaultNum(fault))
 
       return causes
 
@@ -9,6 +9,9 @@ from ..drivers.eeprom import SeepromI2cDevDriver, EepromKernelDriver
 
 logging = getLogger(__name__)
 
+# fields needed to know which card or platform definition to load
+IDENTITY_FIELDS = ['SKU', 'SID']
+
 class I2cEeprom(I2cComponent):
    DRIVER = EepromKernelDriver
    PRIORITY = Priority.DEFAULT
@@ -16,6 +19,9 @@ class I2cEeprom(I2cComponent):
    def read(self):
       return self.driver.read()
 
+   def stream(self):
+      return self.driver.stream()
+
 class I2cSeeprom(I2cComponent):
    DRIVER = SeepromI2cDevDriver
    PRIORITY = Priority.DEFAULT
@@ -23,6 +29,9 @@ class I2cSeeprom(I2cComponent):
    def read(self):
       return self.driver.read()
 
+   def stream(self):
+      return self.driver.stream()
+
 class PrefdlBase(object):
    def prefdl(self):
       cachedPrefdl = None
@@ -44,6 +53,32 @@ class PrefdlBase(object):
 
       return data
 
+   def identity(self, fields=IDENTITY_FIELDS):
+      '''Return the identifying fields, reading no more than needed
+
+      The whole prefdl is only read when it is already cached or when the
+      fields could not be found at the start of the eeprom.
+      '''
+      try:
+         cachedPrefdl = JsonStoredData(self.cacheFile())
+         if cachedPrefdl.exist():
+            return cachedPrefdl.read()
+      except Exception: # pylint: disable=broad-except
+         pass
+
+      data = {}
+      try:
+         with self.stream() as f:
+            data = Prefdl.fromFile(f, fields=fields).data()
+      except Exception as e: # pylint: disable=broad-except
+         logging.debug('Failed to read identity of device %s: %s',
+                       self.prefdlAddr(), e)
+
+      if not data.get('SKU'):
+         logging.debug('Reading the full prefdl of device %s', self.prefdlAddr())
+         return self.prefdl()
+      return data
+
    def clean(self):
       cachedPrefdl = JsonStoredData(self.cacheFile())
       cachedPrefdl.clear()
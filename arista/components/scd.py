@@ -18,6 +18,7 @@ from ..core.utils import FileWaiter, MmapResource, simulateWith, writeConfig
 from ..core.log import getLogger
 
 from ..drivers.scd.driver import ScdI2cDevDriver, ScdKernelDriver
+from ..drivers.scd.xcvr import ScdXcvrControl
 from ..drivers.sysfs import (
    LedSysfsDriver,
    ResetSysfsDriver,
@@ -281,7 +282,9 @@ class Scd(PciComponent):
       self.qsfps = []
       self.sfps = []
       self.tweaks = []
+      self.tweakIndex = {}
       self.xcvrs = []
+      self.xcvrControl = ScdXcvrControl(self.driver)
       self.uioMap = {}
       self.resets = []
       self.i2cOffset = 0
@@ -331,7 +334,16 @@ class Scd(PciComponent):
 
    def i2cAddr(self, bus, addr, t=1, datr=3, datw=3, ed=0, block=True):
       addr = ScdI2cAddr(self, bus, addr, block=block)
-      self.tweaks.append(Scd.BusTweak(addr, t, datr, datw, ed))
+      tweak = Scd.BusTweak(addr, t, datr, datw, ed)
+      # the last tweak declared for a device wins, as it did in the kernel
+      key = (bus, addr.address)
+      index = self.tweakIndex.get(key)
+      if index is None:
+         self.tweakIndex[key] = len(self.tweaks)
+         self.tweaks.append(tweak)
+      elif self.tweaks[index][1:] != tweak[1:]:
+         logging.debug('%s: overriding smbus tweak of %s', self, addr)
+         self.tweaks[index] = tweak
       return addr
 
    def getSmbus(self, bus):
@@ -405,7 +417,11 @@ class Scd(PciComponent):
          gpioDict[scdGpio.getName()] = scdGpio
       return gpioDict
 
-   def _addXcvr(self, xcvrId, xcvrType, bus, interruptLine, leds=None, cls=None):
+   def _addXcvr(self, regAddr, xcvrId, xcvrType, bus, interruptLine, leds=None,
+                cls=None):
+      if not self.xcvrControl.registers:
+         self.inventory.addXcvrControl(self.xcvrControl)
+      self.xcvrControl.addXcvr(regAddr, xcvrId, xcvrType)
       addr = self.i2cAddr(bus, Xcvr.ADDR, t=1, datr=0, datw=3, ed=0)
       reset = None
       if xcvrType != Xcvr.SFP:
@@ -422,18 +438,18 @@ class Scd(PciComponent):
 
    def addOsfp(self, addr, xcvrId, bus, interruptLine=None, leds=None):
       self.osfps += [(addr, xcvrId)]
-      return self._addXcvr(xcvrId, Xcvr.OSFP, bus, interruptLine, leds=leds,
-                           cls=Osfp)
+      return self._addXcvr(addr, xcvrId, Xcvr.OSFP, bus, interruptLine,
+                           leds=leds, cls=Osfp)
 
    def addQsfp(self, addr, xcvrId, bus, interruptLine=None, leds=None):
       self.qsfps += [(addr, xcvrId)]
-      return self._addXcvr(xcvrId, Xcvr.QSFP, bus, interruptLine, leds=leds,
-                           cls=Qsfp)
+      return self._addXcvr(addr, xcvrId, Xcvr.QSFP, bus, interruptLine,
+                           leds=leds, cls=Qsfp)
 
    def addSfp(self, addr, xcvrId, bus, interruptLine=None, leds=None):
       self.sfps += [(addr, xcvrId)]
-      return self._addXcvr(xcvrId, Xcvr.SFP, bus, interruptLine, leds=leds,
-                           cls=Sfp)
+      return self._addXcvr(addr, xcvrId, Xcvr.SFP, bus, interruptLine,
+                           leds=leds, cls=Sfp)
 
    def addFan(self, desc):
       return self.inventory.addFan(self.driver.getFan(desc))
@@ -485,6 +501,19 @@ class Scd(PciComponent):
 
    def resetOut(self):
       super(Scd, self).resetOut()
+      # all the transceiver registers are updated by the kernel in one write
+      xcvrIds = self.xcvrControl.getXcvrIds()
+      try:
+         self.xcvrControl.update({
+            'modsel': dict.fromkeys(xcvrIds, True),
+            'txdisable': dict.fromkeys(xcvrIds, False),
+            'lpmode': dict.fromkeys(xcvrIds, False),
+         })
+         return
+      except (IOError, OSError) as e:
+         # kernel modules without the writable xcvr_registers attribute
+         logging.debug('%s: failed to update the transceivers at once: %s',
+                       self, e)
       for xcvr in self.xcvrs:
          xcvr.setModuleSelect(True)
          xcvr.setTxDisable(False)
@@ -1,15 +1,22 @@
-
 import os
 import time
 
 from .component import DEFAULT_WAIT_TIMEOUT, PciComponent
 from .log import getLogger
 from .utils import klog, inSimulation
-from ..libs.pci import pciRescan
+from ..libs.pci import pciBusRescan
+from ..libs.python import monotonicRaw
+from ..libs.trace import span
+from ..libs.uevent import UeventListener, pciSlotName
 
 logging = getLogger(__name__)
 
-ASIC_YIELD_TIME = os.getenv( 'ASIC_YIELD_TIME', 2 )
+ASIC_YIELD_TIME = float(os.getenv( 'ASIC_YIELD_TIME', 2 ))
+
+# fallback delay between checks when uevents cannot be received
+ASIC_POLL_DELAY = 0.1
+# uevents can be lost, keep checking from time to time while listening
+ASIC_UEVENT_DELAY = 1.
 
 class SwitchChip(PciComponent):
    def __init__(self, addr, rescan=False, **kwargs):
@@ -20,36 +27,86 @@ class SwitchChip(PciComponent):
       return '%s(addr=%s)' % (self.__class__.__name__, self.addr)
 
    def pciRescan(self):
-      pciRescan()
+      pciBusRescan(self.addr)
 
    def isInReset(self):
       return self.resetGpio()
 
+   def isPresent(self):
+      return os.path.exists(self.addr.getSysfsPath())
+
    def waitForIt(self, timeout=DEFAULT_WAIT_TIMEOUT):
-      begin = time.time()
-      end = begin + timeout
-      rescanTime = begin + (timeout / 2)
-      devPath = self.addr.getSysfsPath()
-
-      logging.debug('waiting for switch chip %s', devPath)
-      if inSimulation():
-         return True
-
-      klog('waiting for switch chip')
-      while True:
-         now = time.time()
+      return waitForSwitchChips([self], timeout=timeout)
+
+def _openUeventListener():
+   try:
+      listener = UeventListener()
+      listener.open()
+      return listener
+   except (IOError, OSError) as e:
+      logging.debug('cannot listen to uevents, polling instead: %s', e)
+   return None
+
+def waitForSwitchChips(chips, timeout=DEFAULT_WAIT_TIMEOUT):
+   '''Wait for all the switch chips to be enumerated on the pci bus at once
+
+   The wait is woken up by pci add uevents. Chips created with rescan=True get
+   the bus behind their upstream bridge rescanned halfway through the timeout.
+   The yield time is only spent once and only if a chip had to be waited for.
+   '''
+   for chip in chips:
+      logging.debug('waiting for switch chip %s', chip.addr.getSysfsPath())
+   if inSimulation():
+      return True
+
+   pending = [chip for chip in chips if not chip.isPresent()]
+   if not pending:
+      logging.debug('switch chips already present')
+      return True
+
+   with span('switch chips', 'wait', count=len(pending)):
+      return _waitForSwitchChips(pending, timeout)
+
+def _waitForSwitchChips(pending, timeout):
+   klog('waiting for switch chip')
+   begin = monotonicRaw()
+   end = begin + timeout
+   rescanTime = begin + (timeout / 2)
+   listener = _openUeventListener()
+   delay = ASIC_UEVENT_DELAY if listener is not None else ASIC_POLL_DELAY
+   try:
+      while pending:
+         now = monotonicRaw()
          if now > end:
             break
-         if os.path.exists(devPath):
-            logging.debug('switch chip is ready')
-            klog('switch chip is ready')
-            time.sleep(ASIC_YIELD_TIME)
-            klog('yielding...')
-            return True
-         if self.rescan and now > rescanTime:
-            self.pciRescan()
-            rescanTime = end
-         time.sleep(0.1)
-
-      logging.error('timed out waiting for the switch chip %s', devPath)
+         if rescanTime is not None and now > rescanTime:
+            for chip in pending:
+               if chip.rescan:
+                  chip.pciRescan()
+            rescanTime = None
+         nextCheck = min(now + delay, end if rescanTime is None else rescanTime)
+         if listener is not None:
+            names = [str(chip.addr) for chip in pending]
+            while monotonicRaw() < nextCheck:
+               events = listener.read(timeout=nextCheck - monotonicRaw())
+               if any(pciSlotName(e) in names for e in events
+                      if e.action == 'add'):
+                  break
+         else:
+            time.sleep(max(0, nextCheck - now))
+         pending = [chip for chip in pending if not chip.isPresent()]
+   finally:
+      if listener is not None:
+         listener.close()
+
+   if pending:
+      for chip in pending:
+         logging.error('timed out waiting for the switch chip %s',
+                       chip.addr.getSysfsPath())
       return False
+
+   logging.debug('switch chip is ready (took %.2f seconds)', monotonicRaw() - begin)
+   klog('switch chip is ready')
+   time.sleep(ASIC_YIELD_TIME)
+   klog('yielding...')
+   return True
@@ -58,17 +58,20 @@ class Card(Sku):
    def hasCpuModule(self):
       return self.CPU_CLS is not None
 
-   def setup(self, filters=Priority.defaultFilter):
+   def setup(self, filters=Priority.defaultFilter, jobs=None):
+      self.loadModules(filters)
       super(Card, self).setup()
-      super(Card, self).finish(filters=filters)
+      super(Card, self).finish(filters=filters, jobs=jobs)
 
-   def setupStandby(self, filters=Priority.defaultFilter):
+   def setupStandby(self, filters=Priority.defaultFilter, jobs=None):
+      self.standby.loadModules(filters)
       self.standby.setup()
-      self.standby.finish(filters)
+      self.standby.finish(filters, jobs=jobs)
 
-   def setupMain(self, filters=Priority.defaultFilter):
+   def setupMain(self, filters=Priority.defaultFilter, jobs=None):
+      self.main.loadModules(filters)
       self.main.setup()
-      self.main.finish(filters)
+      self.main.finish(filters, jobs=jobs)
 
    def __str__(self):
       if self.slot.parent is self:
@@ -86,6 +89,9 @@ class CardSlot(SlotComponent):
    def getEeprom(self):
       raise NotImplementedError
 
+   def readIdentity(self, verify=False):
+      return self.getEeprom()
+
    def disablePciPort(self):
       self.parent.pciSwitch.disable(self.slotId)
 
@@ -95,11 +101,11 @@ class CardSlot(SlotComponent):
    def loadCard(self, card=None, **kwargs):
       if card is None:
          assert self.card, "No default card definition loaded"
-         if not self.getPresence():
+         eeprom = self.getIdentity()
+         if eeprom is None:
             logging.debug('Card slot %d is not present', self.slotId)
             return
 
-         eeprom = self.getEeprom()
          sku = eeprom.get('SKU')
          if sku is None:
             logging.error('Unknown card in slot %d, eeprom is invalid', self.slotId)
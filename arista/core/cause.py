@@ -1,10 +1,25 @@
+import hashlib
+import json
+import os
+import threading
 import time
 
+from collections import OrderedDict
+
+from .component.executor import setupBusKey
 from .config import Config
 from .inventory import ReloadCause
-from .utils import JsonStoredData
+from .log import getLogger
+from .utils import JsonStoredData, StoredData
+from ..libs.python import monotonicRaw
+
+logging = getLogger(__name__)
 
 RELOAD_CAUSE_HISTORY_SIZE=128
+RELOAD_CAUSE_HISTORY_FILE = '%s.history'
+
+# time given to a single provider to report its reload causes
+RELOAD_CAUSE_PROVIDER_TIMEOUT = 10.
 
 class ReloadCauseEntry(ReloadCause):
    def __init__(self, cause='unknown', rcTime='unknown', rcDesc=''):
@@ -53,28 +68,244 @@ class ReloadCauseDataStore(JsonStoredData):
    def writeCauses(self, causes):
       return self.writeList(causes)
 
-def updateReloadCausesHistory(newCauses):
-   rebootCauses = ReloadCauseDataStore(lifespan='persistent')
-   causes = []
-   if rebootCauses.exist():
-      causes = rebootCauses.readCauses()
-      for newCause in newCauses:
-         addCause = True
-         for cause in causes:
-            if newCause.getTime() == cause.getTime() and \
-                  newCause.getCause() == cause.getCause():
-               addCause = False
+class ReloadCauseBusWorker(object):
+   def __init__(self, key, collector):
+      self.key = key
+      self.collector = collector
+      self.providers = []
+      self.current = None
+      self.started = None
+      self.done = False
+      self.abandoned = False
+
+   def run(self, clear):
+      cond = self.collector.cond
+      for index, provider in self.providers:
+         with cond:
+            if self.abandoned:
+               return
+            self.current = provider
+            self.started = monotonicRaw()
+         try:
+            causes = provider.getReloadCauses(clear=clear)
+         except Exception as e: # pylint: disable=broad-except
+            logging.error('%s: failed to read reload causes: %s', provider, e)
+            causes = []
+         with cond:
+            if not self.abandoned:
+               self.collector.results[index] = causes
+            cond.notify_all()
+      with cond:
+         self.done = True
+         cond.notify_all()
+
+class ReloadCauseCollector(object):
+   '''Read the reload causes of all the providers of a tree concurrently
+
+   Providers sharing a bus are queried one after the other by the same
+   thread, providers on different buses are queried in parallel. A provider
+   not answering within the timeout is given up on, along with the providers
+   queued behind it on its bus, so that a hung device doesn't block the boot.
+   '''
+   def __init__(self, timeout=RELOAD_CAUSE_PROVIDER_TIMEOUT):
+      self.timeout = timeout
+      self.cond = threading.Condition()
+      self.results = {}
+
+   def _groupByBus(self, root):
+      workers = OrderedDict()
+      for index, (component, provider) in \
+            enumerate(root.iterReloadCauseProviders()):
+         key = setupBusKey(component)
+         worker = workers.get(key)
+         if worker is None:
+            worker = workers[key] = ReloadCauseBusWorker(key, self)
+         worker.providers.append((index, provider))
+      return list(workers.values())
+
+   def _checkTimeouts(self, workers):
+      '''Return the time until the next deadline, None when all are done'''
+      now = monotonicRaw()
+      nextDeadline = None
+      for worker in workers:
+         if worker.done or worker.abandoned or worker.started is None:
+            continue
+         deadline = worker.started + self.timeout
+         if now >= deadline:
+            logging.error('%s: timed out reading reload causes, skipping %d '
+                          'providers', worker.current,
+                          sum(1 for i, _ in worker.providers
+                              if i not in self.results))
+            worker.abandoned = True
+            continue
+         if nextDeadline is None or deadline < nextDeadline:
+            nextDeadline = deadline
+      if all(w.done or w.abandoned for w in workers):
+         return None
+      return max(0, nextDeadline - now) if nextDeadline is not None \
+         else self.timeout
+
+   def run(self, root, clear=False):
+      workers = self._groupByBus(root)
+      threads = []
+      for worker in workers:
+         thread = threading.Thread(target=worker.run, args=(clear,),
+                                   name='reload-cause-%s' % (worker.key,))
+         # a hung provider must not prevent the process from exiting
+         thread.daemon = True
+         threads.append(thread)
+
+      with self.cond:
+         for thread in threads:
+            thread.start()
+         while True:
+            delay = self._checkTimeouts(workers)
+            if delay is None:
                break
-         if addCause:
-            causes.append(newCause)
-      rebootCauses.clear()
-   else:
-      causes = newCauses
+            self.cond.wait(delay)
+         results = dict(self.results)
+
+      causes = []
+      for index in sorted(results):
+         causes.extend(results[index])
+      return causes
+
+def collectReloadCauses(root, clear=False, timeout=RELOAD_CAUSE_PROVIDER_TIMEOUT):
+   return ReloadCauseCollector(timeout=timeout).run(root, clear=clear)
+
+class ReloadCauseHistory(StoredData):
+   '''Append-only log of the reload causes of the previous boots
+
+   Each line is a json record carrying a digest of the cause and its time,
+   the digests are indexed when the log is loaded so that duplicates are
+   detected without scanning the entries. New causes are appended and synced,
+   the log is only rewritten, atomically, once it holds twice the retained
+   number of entries.
+   '''
+   def __init__(self, name=None, size=RELOAD_CAUSE_HISTORY_SIZE, **kwargs):
+      name = name or RELOAD_CAUSE_HISTORY_FILE % Config().reboot_cause_file
+      kwargs.setdefault('lifespan', 'persistent')
+      super(ReloadCauseHistory, self).__init__(name, **kwargs)
+      self.size = size
+      self.records = None
+      self.index = None
 
-   if len(causes) > RELOAD_CAUSE_HISTORY_SIZE:
-      causes = causes[len(causes) - RELOAD_CAUSE_HISTORY_SIZE:]
+   @staticmethod
+   def causeKey(cause):
+      data = '%s\0%s' % (cause.getCause(), cause.getTime())
+      return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
 
-   rebootCauses.writeList(causes)
+   @staticmethod
+   def _toRecord(key, cause):
+      record = dict(cause.__dict__)
+      record['key'] = key
+      return record
+
+   def _iterRecords(self):
+      try:
+         with open(self.path) as f:
+            for line in f:
+               try:
+                  yield json.loads(line)
+               except ValueError:
+                  # a torn write can only affect the last line
+                  logging.debug('%s: skipping invalid record', self)
+      except (IOError, OSError):
+         return
+
+   def load(self):
+      if self.records is not None:
+         return
+      self.records = []
+      self.index = set()
+      if not self.exist():
+         self._migrate()
+      for record in self._iterRecords():
+         key = record.get('key')
+         if key is None or key in self.index:
+            continue
+         self.index.add(key)
+         self.records.append(record)
+
+   def _migrate(self):
+      legacy = ReloadCauseDataStore(lifespan=self.lifespan)
+      if not legacy.exist():
+         return
+      causes = legacy.readCauses()
+      logging.info('%s: importing %d reload causes from %s', self, len(causes),
+                   legacy)
+      # the legacy file is left in place for the tools still reading it
+      self._rewrite([self._toRecord(self.causeKey(c), c) for c in causes])
+
+   @staticmethod
+   def _syncDir(path):
+      fd = os.open(os.path.dirname(path), os.O_RDONLY)
+      try:
+         os.fsync(fd)
+      finally:
+         os.close(fd)
+
+   def _rewrite(self, records):
+      records = records[-self.size:]
+      tmpPath = '%s.tmp' % self.path
+      with open(tmpPath, 'w') as f:
+         for record in records:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+         f.flush()
+         os.fsync(f.fileno())
+      os.rename(tmpPath, self.path)
+      self._syncDir(self.path)
+      return records
+
+   def _needsNewline(self):
+      try:
+         with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if not f.tell():
+               return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+      except (IOError, OSError):
+         return False
+
+   def append(self, causes):
+      '''Add the causes not yet in the history, return how many were added'''
+      self.load()
+      records = []
+      for cause in causes:
+         key = self.causeKey(cause)
+         if key in self.index:
+            continue
+         self.index.add(key)
+         records.append(self._toRecord(key, cause))
+      if not records:
+         return 0
+
+      self.records.extend(records)
+      if len(self.records) > 2 * self.size:
+         self.records = self._rewrite(self.records)
+         self.index = set(r['key'] for r in self.records)
+         return len(records)
+
+      prefix = '\n' if self._needsNewline() else ''
+      with open(self.path, 'a') as f:
+         f.write(prefix + ''.join(json.dumps(r, sort_keys=True) + '\n'
+                                  for r in records))
+         f.flush()
+         os.fsync(f.fileno())
+      return len(records)
+
+   def readCauses(self):
+      self.load()
+      causes = []
+      for record in self.records[-self.size:]:
+         cause = ReloadCauseEntry()
+         cause.__dict__.update((k, v) for k, v in record.items() if k != 'key')
+         causes.append(cause)
+      return causes
+
+def updateReloadCausesHistory(newCauses):
+   ReloadCauseHistory().append(newCauses)
 
 def getReloadCause():
    rebootCauses = ReloadCauseDataStore()
@@ -83,9 +314,10 @@ def getReloadCause():
    return None
 
 def getReloadCauseHistory():
-   rebootCauses = ReloadCauseDataStore(lifespan='persistent')
-   if rebootCauses.exist():
-      return rebootCauses.readCauses()
+   history = ReloadCauseHistory()
+   causes = history.readCauses()
+   if causes:
+      return causes
    return None
 
 def datetimeToStr(datetime):
@@ -1,8 +1,11 @@
 from collections import OrderedDict
 
 from ..config import Config
-from ..driver import KernelDriver
+from ..driver import KernelDriver, modprobeAll
 from ..inventory import Inventory
+from ...libs.i2c import I2cDeviceBatch
+from ...libs.trace import span
+from .executor import SetupExecutor
 
 DEFAULT_WAIT_TIMEOUT = 15
 
@@ -21,6 +24,10 @@ class Priority(object):
    backgroundFilter = priorityFilter(BACKGROUND)
 
 class Component(object):
+
+   # getReloadCauses only covers the component itself, not its children
+   RELOAD_CAUSE_PROVIDER = False
+
    def __init__(self, addr=None, priority=Priority.DEFAULT, drivers=None,
                 inventoryCls=None, inventory=None, parent=None, **kwargs):
       super(Component, self).__init__()
@@ -97,18 +104,55 @@ class Component(object):
       return self.inventory
 
    def setup(self):
-      for driver in self.drivers.values():
-         driver.setup()
-      for driver in self.drivers.values():
-         driver.finish()
-
-   def finish(self, filters=Priority.defaultFilter):
-      # underlying component are initialized recursively but require the parent to
-      # be fully initialized
+      with span(self, 'component'):
+         for driver in self.drivers.values():
+            with span(driver, 'driver'):
+               driver.setup()
+         for driver in self.drivers.values():
+            with span(driver, 'driver.finish'):
+               driver.finish()
+
+   def finish(self, filters=Priority.defaultFilter, jobs=None):
+      if jobs is None:
+         jobs = Config().setup_jobs
+      with span(self, 'finish', jobs=jobs):
+         if jobs > 1:
+            SetupExecutor(jobs).run(self, filters)
+            return
+         # underlying component are initialized recursively but require the
+         # parent to be fully initialized
+         batch = I2cDeviceBatch()
+         for component in self.iterComponents(filters, recursive=False):
+            if component.canBatchSetup():
+               with batch.active():
+                  component.setup()
+            else:
+               component.setup()
+         with span('i2c device batch', 'i2c', count=len(batch)):
+            batch.commit()
+         for component in self.iterComponents(recursive=False):
+            component.finish(filters, jobs=jobs)
+
+   def canBatchSetup(self):
+      '''Leaf components only creating i2c clients can be instantiated in bulk'''
+      return not self.components and bool(self.drivers) and \
+             all(d.BATCH_SETUP for d in self.drivers.values())
+
+   def iterSetupComponents(self, filters=Priority.defaultFilter):
+      '''Components set up by finish, in the order of a sequential setup'''
       for component in self.iterComponents(filters, recursive=False):
-         component.setup()
+         yield component
       for component in self.iterComponents(recursive=False):
-         component.finish(filters)
+         for sub in component.iterSetupComponents(filters):
+            yield sub
+
+   def loadModules(self, filters=Priority.defaultFilter):
+      '''Load ahead the kernel modules required by setup and finish'''
+      modules = []
+      for component in [self] + list(self.iterSetupComponents(filters)):
+         for driver in component.drivers.values():
+            modules.extend(driver.getKernelModules())
+      modprobeAll(modules)
 
    def refresh(self):
       for component in self.components:
@@ -142,9 +186,24 @@ class Component(object):
          causes.extend(component.getReloadCauses(clear=clear))
       return causes
 
-   def waitForIt(self, timeout=DEFAULT_WAIT_TIMEOUT):
+   def iterReloadCauseProviders(self):
+      '''Yield the (component, provider) pairs reading reload causes'''
+      for driver in self.drivers.values():
+         if driver.RELOAD_CAUSE_PROVIDER:
+            yield self, driver
       for component in self.components:
-         component.waitForIt(timeout)
+         if component.RELOAD_CAUSE_PROVIDER:
+            yield component, component
+         else:
+            for item in component.iterReloadCauseProviders():
+               yield item
+
+   def waitForIt(self, timeout=DEFAULT_WAIT_TIMEOUT):
+      from ..asic import SwitchChip, waitForSwitchChips
+      chips = [c for c in self.iterComponents(filters=None)
+               if isinstance(c, SwitchChip)]
+      if chips:
+         waitForSwitchChips(chips, timeout=timeout)
 
    def __diag__(self, ctx):
       return {}
@@ -196,5 +255,37 @@ class I2cComponent(Component):
       return '%s(addr=%s)' % (self.__class__.__name__, self.addr)
 
 class SlotComponent(Component):
+   def __init__(self, *args, **kwargs):
+      super(SlotComponent, self).__init__(*args, **kwargs)
+      self.presenceGeneration = 0
+      self.lastPresence_ = None
+      self.identity_ = None
+      self.identityGeneration_ = None
+
    def getPresence(self):
       raise NotImplementedError
+
+   def checkPresence(self):
+      '''Return the presence, a change of it starts a new generation'''
+      present = self.getPresence()
+      if present != self.lastPresence_:
+         self.lastPresence_ = present
+         self.presenceGeneration += 1
+      return present
+
+   def readIdentity(self, verify=False):
+      raise NotImplementedError
+
+   def getIdentity(self, verify=False):
+      '''Return what identifies the device in the slot, None if empty
+
+      The identity is only read again once the device was removed or inserted
+      or when a verified read is requested.
+      '''
+      if not self.checkPresence():
+         self.identity_ = None
+         return None
+      if verify or self.identityGeneration_ != self.presenceGeneration:
+         self.identity_ = self.readIdentity(verify=verify)
+         self.identityGeneration_ = self.presenceGeneration
+      return self.identity_
@@ -0,0 +1,143 @@
+from __future__ import absolute_import, division, print_function
+
+import threading
+
+from ..log import getLogger
+from ..types import I2cAddr, PciAddr
+from ...libs.trace import currentSpan, traceParent
+
+logging = getLogger(__name__)
+
+def setupBusKey(component):
+   '''Components sharing a key are set up in discovery order'''
+   addr = component.addr
+   if isinstance(addr, I2cAddr):
+      return ('i2c', addr.bus)
+   if isinstance(addr, PciAddr):
+      return ('pci', addr.domain, addr.bus)
+   return None
+
+class SetupTask(object):
+   def __init__(self, component, deps):
+      self.component = component
+      self.priority = component.priority
+      self.waiting = set(dep for dep in deps if dep is not None and not dep.done)
+      self.dependents = []
+      self.done = False
+      self.walk = False
+      for dep in self.waiting:
+         dep.dependents.append(self)
+
+   def __str__(self):
+      return '%s(%s)' % (self.__class__.__name__, self.component)
+
+class SetupExecutor(object):
+   '''Set up the components of a tree concurrently
+
+   This walks the tree the same way Component.finish does but a component
+   children are walked as soon as it is set up. A component waits for its
+   closest ancestor set up by this executor, for the previous component
+   discovered on the same bus and for every component of a lower priority.
+   '''
+   def __init__(self, jobs):
+      self.jobs = jobs
+      self.cond = threading.Condition()
+      self.ready = []
+      self.pending = {}
+      self.lastByBus = {}
+      self.error = None
+      self.filters = None
+
+   def _submit(self, component, parent):
+      # ordering across priorities is already enforced by the barriers
+      key = setupBusKey(component)
+      if key is not None:
+         key = (component.priority,) + key
+      task = SetupTask(component, [parent, self.lastByBus.get(key)])
+      if key is not None:
+         self.lastByBus[key] = task
+      self.pending[task.priority] = self.pending.get(task.priority, 0) + 1
+      if not task.waiting:
+         self.ready.append(task)
+      return task
+
+   def _expand(self, component, parent):
+      tasks = [self._submit(child, parent) for child in
+               component.iterComponents(self.filters, recursive=False)]
+      # only the children matching the default filter are walked
+      for child in component.iterComponents(recursive=False):
+         task = next((t for t in tasks if t.component is child), None)
+         if task is None:
+            self._expand(child, parent)
+         else:
+            task.walk = True
+
+   def _complete(self, task):
+      task.done = True
+      self.pending[task.priority] -= 1
+      if not self.pending[task.priority]:
+         del self.pending[task.priority]
+      for dependent in task.dependents:
+         dependent.waiting.discard(task)
+         if not dependent.waiting:
+            self.ready.append(dependent)
+      if task.walk:
+         self._expand(task.component, task)
+
+   def _nextTask(self):
+      # priorities act as barriers, nothing starts before all the components
+      # of a lower priority are set up
+      barrier = min(self.pending)
+      for i, task in enumerate(self.ready):
+         if task.priority <= barrier:
+            return self.ready.pop(i)
+      return None
+
+   def _worker(self, parent):
+      with traceParent(parent):
+         self._work()
+
+   def _work(self):
+      while True:
+         with self.cond:
+            task = None
+            while task is None:
+               if self.error is not None or not self.pending:
+                  self.cond.notify_all()
+                  return
+               task = self._nextTask()
+               if task is None:
+                  self.cond.wait()
+         try:
+            logging.debug('setting up %s', task.component)
+            task.component.setup()
+         except Exception as e: # pylint: disable=broad-except
+            with self.cond:
+               if self.error is None:
+                  self.error = e
+               self.cond.notify_all()
+            return
+         with self.cond:
+            self._complete(task)
+            self.cond.notify_all()
+
+   def run(self, component, filters):
+      '''Equivalent of component.finish(filters)'''
+      self.filters = filters
+      with self.cond:
+         self._expand(component, None)
+         if not self.pending:
+            return
+
+      parent = currentSpan()
+      workers = [threading.Thread(target=self._worker, args=(parent,),
+                                  name='setup-%d' % i)
+                 for i in range(self.jobs)]
+      for worker in workers:
+         worker.daemon = True
+         worker.start()
+      for worker in workers:
+         worker.join()
+
+      if self.error is not None:
+         raise self.error # pylint: disable=raising-bad-type
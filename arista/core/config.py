@@ -1,7 +1,7 @@
 import os
 import yaml
 
-from .utils import getCmdlineDict
+from .utils import TMPFS_MOUNT, getCmdlineDict
 from .log import getLogger
 
 logging = getLogger(__name__)
@@ -25,6 +25,13 @@ class Config(object):
          cls.instance_.linecard_standby_only = True
          cls.instance_.linecard_cpu_enable = False
          cls.instance_.use_metainventory = False
+         cls.instance_.setup_jobs = 1
+         cls.instance_.trace = False
+         cls.instance_.hw_stats = False
+         cls.instance_.broker_socket = os.path.join(TMPFS_MOUNT, 'broker.sock')
+         cls.instance_.fan_control = False
+         cls.instance_.prometheus_textfile = os.path.join(TMPFS_MOUNT,
+                                                          'arista.prom')
          cls.instance_._parseConfig()
          cls.instance_._parseCmdline()
       return cls.instance_
@@ -36,6 +36,11 @@ class DaemonFeature(object):
 class PollDaemonFeature(DaemonFeature):
    INTERVAL = 1.
 
+   def __init__(self):
+      super(PollDaemonFeature, self).__init__()
+      # features can adjust their own polling interval at runtime
+      self.interval = self.INTERVAL
+
    def init(self):
       self.daemon.loop.create_task(self._callback())
 
@@ -45,7 +50,7 @@ class PollDaemonFeature(DaemonFeature):
          now = self.daemon.loop.time()
          self.callback(now - last)
          last = now
-         await asyncio.sleep(self.INTERVAL)
+         await asyncio.sleep(self.interval)
 
    def callback(self, elapsed):
       raise NotImplementedError
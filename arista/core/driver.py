@@ -1,4 +1,3 @@
-
 import os
 import subprocess
 
@@ -7,20 +6,105 @@ from collections import OrderedDict
 from . import utils
 from .utils import FileWaiter, inDebug, inSimulation
 from .log import getLogger
+from ..libs.python import monotonicRaw
+from ..libs.stats import measure
+from ..libs.trace import span
 
 logging = getLogger(__name__)
 
+_loadedModules = None
+
+def moduleName(name):
+   return name.replace('-', '_')
+
+def getLoadedModules(force=False):
+   '''Snapshot of /proc/modules, kept up to date by modprobe and rmmod'''
+   global _loadedModules
+   if _loadedModules is None or force:
+      with open('/proc/modules') as f:
+         _loadedModules = set(line.split(' ', 1)[0] for line in f)
+   return _loadedModules
+
+def _markModuleLoaded(name):
+   if _loadedModules is not None:
+      _loadedModules.add(moduleName(name))
+
+def _runModprobe(args):
+   if inSimulation():
+      logging.debug('exec: %s', ' '.join(args))
+      return
+   with span(' '.join(args), 'subprocess'), \
+        measure('subprocess', args[0], attr=' '.join(args[1:])):
+      subprocess.check_call(args)
+
 def modprobe(name, args=None):
+   if not inSimulation() and isModuleLoaded(name):
+      logging.debug('module %s already loaded', name)
+      return
    logging.debug('loading module %s', name)
    if args is None:
       args = []
-   args = ['modprobe', name.replace('-', '_')] + args
+   args = ['modprobe', moduleName(name)] + args
    if inDebug():
       args += ['dyndbg=+pf']
-   if inSimulation():
-      logging.debug('exec: %s', ' '.join(args))
-   else:
-      subprocess.check_call(args)
+   _runModprobe(args)
+   _markModuleLoaded(name)
+
+def modprobeAll(modules):
+   '''Load a list of (name, args) with as few modprobe invocations as possible
+
+   Duplicates and already loaded modules are skipped. Consecutive modules
+   without arguments are loaded by a single modprobe -a, the order of the list
+   is preserved. A failed batch is only logged, the modules it contains are
+   then loaded one by one by their drivers which report the error.
+   '''
+   start = monotonicRaw()
+   unique = OrderedDict()
+   for name, args in modules:
+      key = moduleName(name)
+      args = list(args or [])
+      if key not in unique:
+         unique[key] = args
+      elif unique[key] != args:
+         logging.warning('module %s requested with args %s and %s, using the '
+                         'first ones', key, unique[key], args)
+
+   loaded = set() if inSimulation() else getLoadedModules()
+   pending = [(name, args) for name, args in unique.items() if name not in loaded]
+
+   calls = []
+   batch = []
+   for name, args in pending:
+      if not args and not inDebug():
+         batch.append(name)
+         continue
+      if batch:
+         calls.append((batch, ['modprobe', '-a'] + batch))
+         batch = []
+      cmd = ['modprobe', name] + args
+      if inDebug():
+         cmd += ['dyndbg=+pf']
+      calls.append(([name], cmd))
+   if batch:
+      calls.append((batch, ['modprobe', '-a'] + batch))
+
+   for names, cmd in calls:
+      try:
+         _runModprobe(cmd)
+      except (subprocess.CalledProcessError, OSError) as e:
+         logging.warning('failed to load modules %s: %s', ', '.join(names), e)
+         continue
+      for name in names:
+         _markModuleLoaded(name)
+
+   elapsed = monotonicRaw() - start
+   saved = len(modules) - len(calls)
+   logging.info('loaded %d modules with %d modprobe calls instead of %d '
+                '(%d duplicates, %d already loaded) in %.2fs, saving about %.2fs',
+                len(pending), len(calls), len(modules),
+                len(modules) - len(unique), len(unique) - len(pending), elapsed,
+                elapsed / len(calls) * saved if calls else 0.)
+   return len(calls)
 
 def deviceListForModule(name):
    devices = []
@@ -45,20 +129,15 @@ def deviceListForModule(name):
    return devices
 
 def rmmod(name):
+   global _loadedModules
    logging.debug('unloading module %s', name)
-   args = ['modprobe', '-r', name.replace('-', '_')]
-   if inSimulation():
-      logging.debug('exec: %s', ' '.join(args))
-   else:
-      subprocess.check_call(args)
+   args = ['modprobe', '-r', moduleName(name)]
+   _runModprobe(args)
+   # unused dependencies are removed as well, take a new snapshot next time
+   _loadedModules = None
 
-def isModuleLoaded(name):
-   with open('/proc/modules') as f:
-      start = '%s ' % name.replace('-', '_')
-      for line in f.readlines():
-         if line.startswith(start):
-            return True
-   return False
+def isModuleLoaded(name, force=False):
+   return moduleName(name) in getLoadedModules(force=force)
 
 _i2cBuses = OrderedDict()
 def getKernelI2cBuses(force=False):
@@ -84,6 +163,12 @@ def i2cBusFromName(name, idx=0, force=False):
    return None
 
 class Driver(object):
+
+   # the setup only declares kernel i2c clients when a batch is active
+   BATCH_SETUP = False
+   # getReloadCauses actually talks to the hardware
+   RELOAD_CAUSE_PROVIDER = False
+
    def __init__(self, **kwargs):
       self.__dict__.update(kwargs)
 
@@ -108,6 +193,10 @@ class Driver(object):
    def getReloadCauses(self, clear=False): # pylint: disable=unused-argument
       return []
 
+   def getKernelModules(self):
+      '''Modules loaded by setup, as a list of (name, args)'''
+      return []
+
    def __diag__(self, ctx): # pylint: disable=unused-argument
       return {}
 
@@ -145,6 +234,9 @@ class KernelDriver(Driver):
       modprobe(self.module, self.args)
       self.fileWaiter.waitFileReady()
 
+   def getKernelModules(self):
+      return [(self.module, self.args)] if self.module else []
+
    def clean(self):
       if not self.loaded():
          logging.debug('Module %s is not loaded', self.module)
@@ -1,4 +1,4 @@
-from .cause import ReloadCauseDataStore
+from .cause import ReloadCauseDataStore, collectReloadCauses
 from .component import Priority
 from .config import Config
 from .driver import KernelDriver
@@ -25,9 +25,10 @@ class FixedSystem(Sku):
          return MetaInventory(self.iterInventory())
       return self.inventory
 
-   def setup(self, filters=Priority.defaultFilter):
+   def setup(self, filters=Priority.defaultFilter, jobs=None):
+      self.loadModules(filters)
       super(FixedSystem, self).setup()
-      super(FixedSystem, self).finish(filters)
+      super(FixedSystem, self).finish(filters, jobs=jobs)
 
    def __str__(self):
       return '%s()' % self.__class__.__name__
@@ -37,6 +38,6 @@ class FixedSystem(Sku):
          return []
       rebootCauses = ReloadCauseDataStore()
       if not rebootCauses.exist():
-         causes = super(FixedSystem, self).getReloadCauses(clear=clear)
+         causes = collectReloadCauses(self, clear=clear)
          rebootCauses.writeList(causes)
       return rebootCauses.readCauses()
@@ -8,7 +8,10 @@ from ctypes import \
    cast, \
    pointer
 from fcntl import ioctl
-from .log import getLogger
+from .log import DEBUG, getLogger
+from ..libs import stats, trace
+from ..libs.stats import measure
+from ..libs.trace import span
 
 logging = getLogger(__name__)
 
@@ -66,6 +69,15 @@ class i2c_rdwr_ioctl_data(Structure):
       )
       return cls(msg_data, 2)
 
+   @classmethod
+   def read_current(cls, addr, rdbuf):
+      msg_data = (i2c_msg * 1)(
+         i2c_msg(addr, I2C_M_RD,
+                 sizeof(rdbuf.contents),
+                 cast(rdbuf, POINTER(c_uint8)))
+      )
+      return cls(msg_data, 1)
+
    @classmethod
    def read_block(cls, addr, wrbuf, rdbuf):
       msg_data = (i2c_msg * 2)(
@@ -114,9 +126,16 @@ class I2cMsg(object):
       self.close()
 
    def i2c_rdwr(self, data):
-      logging.debug('%s.i2c_rdwr(%s) ..', self, data) # user msgs
+      debug = logging.isEnabledFor(DEBUG)
+      if debug:
+         logging.debug('%s.i2c_rdwr(%s) ..', self, data) # user msgs
       try:
-         ret = ioctl(self.device.fileno(), I2C_RDWR, data)
+         if trace.tracer is None and stats.hwStats is None:
+            ret = ioctl(self.device.fileno(), I2C_RDWR, data)
+         else:
+            with span('i2c_rdwr', 'i2c', addr=self.addr), \
+                 measure('i2c', 'rdwr', self.addr, self.addr.bus):
+               ret = ioctl(self.device.fileno(), I2C_RDWR, data)
       except IOError as e:
          ret = -e.errno
          raise
@@ -124,8 +143,9 @@ class I2cMsg(object):
          ret = None
          raise
       finally:
-         logging.debug('%s.i2c_rdwr(%s): ret=%s',
-                       self, data, ret) # kernel msgs
+         if debug:
+            logging.debug('%s.i2c_rdwr(%s): ret=%s',
+                          self, data, ret) # kernel msgs
 
    def write_bytes(self, addr, cmd):
       wrbuf = (c_uint8 * len(cmd))(*cmd)
@@ -142,6 +162,13 @@ class I2cMsg(object):
       self.i2c_rdwr(ioctl_data)
       return [c for c in rdbuf]
 
+   def read_current(self, addr, datalen):
+      '''Read datalen bytes from the current address of the device'''
+      rdbuf = (c_uint8 * datalen)()
+      ioctl_data = i2c_rdwr_ioctl_data.read_current(addr, pointer(rdbuf))
+      self.i2c_rdwr(ioctl_data)
+      return [c for c in rdbuf]
+
    def read_block(self, addr, cmd):
       wrbuf = (c_uint8 * len(cmd))(*cmd)
       rdbuf = (c_uint8 * (1 + I2C_SMBUS_BLOCK_MAX))( 1 )
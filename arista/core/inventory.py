@@ -20,6 +20,7 @@ class Inventory(object):
       self.ledGroups = {}
 
       self.xcvrs = {}
+      self.xcvrControls = []
 
       # These two are deprecated
       self.xcvrLeds = defaultdict(list)
@@ -75,6 +76,13 @@ class Inventory(object):
    def getXcvr(self, xcvrId):
       return self.xcvrs[xcvrId]
 
+   def addXcvrControl(self, control):
+      self.xcvrControls.append(control)
+      return control
+
+   def getXcvrControls(self):
+      return self.xcvrControls
+
    def getPortToEepromMapping(self):
       eepromPath = '/sys/class/i2c-adapter/i2c-{0}/{0}-{1:04x}/eeprom'
       return {xcvrId : eepromPath.format(xcvr.addr.bus, xcvr.addr.address)
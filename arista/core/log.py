@@ -1,13 +1,24 @@
 from __future__ import absolute_import, division, print_function
 
+import atexit
 import logging
 import logging.handlers
 import os
 import re
 import sys
+import threading
 
 from logging import DEBUG, INFO, WARNING, ERROR
 
+try:
+   import queue
+except ImportError:
+   import Queue as queue
+
+# python2 has no queue handler, the shared handlers are then used directly
+QueueHandler = getattr(logging.handlers, 'QueueHandler', None)
+QueueListener = getattr(logging.handlers, 'QueueListener', None)
+
 logLevelDict = {
    'DEBUG': DEBUG,
    'INFO': INFO,
@@ -25,46 +36,149 @@ class LoggerError(Exception):
    def __str__(self):
       return 'LoggerError: %s (code %d)' % (self.msg, self.code)
 
+class LoggerLevelFilter(logging.Filter):
+   '''Level of each logger on a handler shared by all of them'''
+   def __init__(self):
+      logging.Filter.__init__(self)
+      self.levels = {}
+
+   def filter(self, record):
+      return record.levelno >= self.levels.get(record.name, DEBUG)
+
+class SharedHandlers(object):
+   '''Handlers of the outputs enabled by setupLogging, created only once
+
+   The console is written synchronously so that messages stay ordered with
+   the output of the commands. The log file and syslog, which can block, are
+   fed through a queue emptied by a listener thread.
+   '''
+   def __init__(self, logfile=None, syslog=False):
+      self.console = None
+      self.consoleFilter = LoggerLevelFilter()
+      self.outputs = []
+      self.syslogFilter = LoggerLevelFilter()
+      self.queueHandler = None
+      self.queue = None
+      self.listener = None
+      self.listenerPid = None
+      self.lock = threading.Lock()
+
+      if logfile:
+         logFile = logging.FileHandler(logfile)
+         logFile.setFormatter(logging.Formatter(
+               '%(asctime)s.%(msecs)03d %(levelname)s: %(message)s',
+               datefmt=dateFmt))
+         logFile.setLevel(DEBUG)
+         self.outputs.append(logFile)
+
+      if syslog:
+         logSys = logging.handlers.SysLogHandler()
+         # format to rfc5424 format
+         logSys.setFormatter(
+               logging.Formatter('{} arista: %(message)s'.format(getHostname())))
+         logSys.addFilter(self.syslogFilter)
+         self.outputs.append(logSys)
+
+      if self.outputs and QueueHandler is not None:
+         self.queueHandler = SharedQueueHandler(self)
+
+   def getConsole(self):
+      if self.console is None:
+         self.console = logging.StreamHandler(sys.stdout)
+         self.console.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+         self.console.addFilter(self.consoleFilter)
+      return self.console
+
+   def getQueue(self):
+      # a forked child gets a fresh queue and listener thread of its own
+      with self.lock:
+         if self.listenerPid != os.getpid():
+            self.queue = queue.Queue()
+            self.listener = QueueListener(self.queue, *self.outputs,
+                                          respect_handler_level=True)
+            self.listener.start()
+            self.listenerPid = os.getpid()
+         return self.queue
+
+   def flush(self):
+      '''Write all the pending records and stop the listener thread'''
+      with self.lock:
+         if self.listenerPid == os.getpid():
+            self.listener.stop()
+         self.listener = None
+         self.listenerPid = None
+
+   def close(self):
+      self.flush()
+      for handler in self.outputs:
+         handler.close()
+
+   def attach(self, logger, cliLevel, syslogLevel):
+      if cliLevel:
+         self.consoleFilter.levels[logger.name] = cliLevel
+         logger.addHandler(self.getConsole())
+      else:
+         # Ensure that we have at least one handler
+         logger.addHandler(logging.NullHandler())
+
+      self.syslogFilter.levels[logger.name] = syslogLevel
+      if self.queueHandler is not None:
+         logger.addHandler(self.queueHandler)
+      else:
+         for handler in self.outputs:
+            logger.addHandler(handler)
+
+if QueueHandler is not None:
+   class SharedQueueHandler(QueueHandler):
+      def __init__(self, shared):
+         QueueHandler.__init__(self, None)
+         self.shared = shared
+
+      def enqueue(self, record):
+         self.shared.getQueue().put_nowait(record)
+
 class LoggerManager(object):
    def __init__(self):
       self.cliVerbosityDict = {}
       self.logfile = None
       self.syslog = False
       self.loggers = {}
+      self.shared = None
+
+   def getSharedHandlers(self):
+      if self.shared is None:
+         self.shared = SharedHandlers(self.logfile, self.syslog)
+      return self.shared
+
+   def setup(self, verbosity, logfile, syslog):
+      self.cliVerbosityDict = verbosity
+      if self.shared is not None and (logfile != self.logfile or
+                                      syslog != self.syslog):
+         self.shared.close()
+         self.shared = None
+      self.logfile = logfile
+      self.syslog = syslog
+
+   def flush(self):
+      if self.shared is not None:
+         self.shared.flush()
 
    def initLogger(self, logger, cliLevel, syslogLevel):
       # Prevent the logger from going through its parent handlers.
       # Parents are automatically assigned due to the use of __name__.
-      # We should probably only create the handlers on the root parser and
-      # write a custom Filter object per logger instead.
       logger.propagate = False
 
-      logger.setLevel(DEBUG)
+      # messages below every output level are dropped before being formatted
+      levels = []
       if cliLevel:
-         logOut = logging.StreamHandler(sys.stdout)
-         logOut.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-         logOut.setLevel(cliLevel)
-         logger.addHandler(logOut)
-      else:
-         # Ensure that we have at least one handler
-         logger.addHandler(logging.NullHandler())
-
+         levels.append(cliLevel)
       if self.logfile:
-         logFile = logging.FileHandler(self.logfile)
-         logFile.setFormatter(logging.Formatter(
-               '%(asctime)s.%(msecs)03d %(levelname)s: %(message)s',
-               datefmt=dateFmt))
-         logFile.setLevel(DEBUG)
-         logger.addHandler(logFile)
-
+         levels.append(DEBUG)
       if self.syslog:
-         logSys = logging.handlers.SysLogHandler()
-         # format to rfc5424 format
-         logSys.setFormatter(
-               logging.Formatter('{} arista: %(message)s'.format(getHostname())))
-         logSys.setLevel(syslogLevel)
-         logger.addHandler(logSys)
+         levels.append(syslogLevel)
+      logger.setLevel(min(levels) if levels else WARNING)
 
+      self.getSharedHandlers().attach(logger, cliLevel, syslogLevel)
       return logger
 
    def newLogger(self, name, cliLevel=INFO, syslogLevel=WARNING):
@@ -101,13 +215,19 @@ class Logger(object):
       self.syslogLevel = syslogLevel
       self.logger = None
 
-   def log(self, level, msg, *args, **kwargs):
+   def getLogger(self):
       if not self.logger:
          self.logger = loggerManager.newLogger(self.name,
                                                self.cliLevel,
                                                self.syslogLevel)
+      return self.logger
+
+   def isEnabledFor(self, level):
+      '''Guard for messages whose arguments are costly to build'''
+      return self.getLogger().isEnabledFor(level)
 
-      self.logger.log(level, msg, *args, **kwargs)
+   def log(self, level, msg, *args, **kwargs):
+      self.getLogger().log(level, msg, *args, **kwargs)
 
    def debug(self, msg, *args, **kwargs):
       self.log(DEBUG, msg, *args, **kwargs)
@@ -128,9 +248,11 @@ def getLogger(name, cliLevel=INFO, syslogLevel=WARNING):
    return Logger(name, cliLevel=cliLevel, syslogLevel=syslogLevel)
 
 def setupLogging(verbosity=None, logfile=None, syslog=False):
-   loggerManager.cliVerbosityDict = parseVerbosity(verbosity)
-   loggerManager.logfile = logfile
-   loggerManager.syslog = syslog
+   loggerManager.setup(parseVerbosity(verbosity), logfile, syslog)
+
+def flushLogging():
+   '''Write the queued messages, needed before forking or calling os._exit'''
+   loggerManager.flush()
 
 def parseVerbosity(verbosity):
    verbosityDict = {}
@@ -162,6 +284,7 @@ def parseVerbosity(verbosity):
    return verbosityDict
 
 loggerManager = LoggerManager()
+atexit.register(flushLogging)
 
 def getHostname():
    import socket
@@ -1,14 +1,15 @@
 from __future__ import print_function
 
-from contextlib import closing
-from io import BytesIO
 import re
 import zlib
 
 from .log import getLogger
+from ..libs.python import PY_VERSION
 
 logging = getLogger(__name__)
 
+PREFDL_READ_SIZE = 256
+
 class InvalidPrefdlData( Exception ):
    pass
 
@@ -39,10 +40,14 @@ class TlvStrField(TlvField):
    def parse(self, value):
       if isinstance(value, str):
          return value
+      if isinstance(value, memoryview):
+         value = value.tobytes()
       return value.decode('ascii')
 
 class TlvIntField(TlvField):
    def parse(self, value):
+      if isinstance(value, memoryview):
+         value = bytes(value)
       return int(value)
 
    def toStr(self):
@@ -70,6 +75,81 @@ class TlvSerialField(TlvStrField):
          return True
       return False
 
+class PrefdlReader(object):
+   '''Sequential reader over a buffer or a file object
+
+   Values read from a buffer are memoryview slices of it, nothing is copied
+   and the crc is computed in a single pass over the consumed range. Data read
+   from a file is added to the crc as it comes.
+   '''
+   def __init__(self, source, crc=0):
+      self.f = None
+      self.buf = None
+      self.view = None
+      if hasattr(source, 'read'):
+         self.f = source
+      else:
+         self.view = memoryview(source)
+         self.buf = source if isinstance(source, (bytes, bytearray)) \
+                    else self.view.tobytes()
+      self.offset = 0
+      self.crc = crc
+
+   def getCrc(self):
+      if self.buf is not None:
+         return zlib.crc32(self.buf[:self.offset] if PY_VERSION == 2 else
+                           self.view[:self.offset], self.crc) & 0xffffffff
+      return self.crc & 0xffffffff
+
+   def readHeader(self, size):
+      '''Read a small hexadecimal field as an integer'''
+      if self.buf is not None:
+         data = self.buf[self.offset:self.offset + size]
+      else:
+         data = self.f.read(size)
+         self.crc = zlib.crc32(data, self.crc)
+      if len(data) < size:
+         raise InvalidPrefdlData('truncated prefdl at offset %d' % self.offset)
+      self.offset += size
+      return int(data, 16)
+
+   def read(self, size):
+      if self.buf is not None:
+         if PY_VERSION == 2:
+            data = self.buf[self.offset:self.offset + size]
+         else:
+            data = self.view[self.offset:self.offset + size]
+      else:
+         data = self.f.read(size)
+         self.crc = zlib.crc32(data, self.crc)
+      self.offset += len(data)
+      return data
+
+   def readTlv(self):
+      '''Return the code, value and value offset of the next field'''
+      if self.buf is None:
+         code = self.readHeader(2)
+         length = self.readHeader(4)
+         offset = self.offset
+         return code, self.read(length), offset
+      offset = self.offset + 6
+      header = self.buf[self.offset:offset]
+      if len(header) < 6:
+         raise InvalidPrefdlData('truncated prefdl at offset %d' % self.offset)
+      length = int(header[2:], 16)
+      self.offset = offset + length
+      if PY_VERSION == 2:
+         return int(header[:2], 16), self.buf[offset:self.offset], offset
+      return int(header[:2], 16), self.view[offset:self.offset], offset
+
+   def readCrc(self):
+      '''Read the expected crc, which is not part of the checksummed data'''
+      if self.buf is not None:
+         data = self.buf[self.offset:self.offset + 8]
+      else:
+         data = self.f.read(8)
+      return int(data, 16)
+
 class PrefdlBase(object):
    FIELDS = [
       TlvField(0x00, 'END', length=0),
@@ -90,12 +170,18 @@ class PrefdlBase(object):
    FIELD_NAME = {f.name : f for f in FIELDS}
    FIELD_NAME.update({a : f for f in FIELDS for a in f.aliases})
 
-   def __init__(self, f=None, data=None, version=b''):
+   def __init__(self, f=None, data=None, version=b'', fields=None):
       self._data = {}
       self._fields = []
-      self._buffer = version
+      self._offsets = {}
+      self._source = None
+      self._version = version
       self._crc = 0xffffffff
       self._crcOk = True
+      self._complete = True
+      self._wanted = None
+      if fields:
+         self._wanted = set(self.FIELD_NAME[name].name for name in fields)
       if data:
          self.parseData(data)
       if f:
@@ -110,12 +196,28 @@ class PrefdlBase(object):
    def getField(self, name):
       return self._data.get(name)
 
+   def getFieldOffset(self, name):
+      '''Return the (offset, length) of the raw value of a field'''
+      field = self.FIELD_NAME.get(name)
+      return self._offsets.get(field.name) if field else None
+
+   def getRawField(self, name):
+      '''Return the raw value of a field, a view on the parsed buffer'''
+      offset = self.getFieldOffset(name)
+      if offset is None or self._source is None:
+         return None
+      return self._source[offset[0]:offset[0] + offset[1]]
+
    def getCrc(self):
       return self._crc
 
    def isCrcValid(self):
       return self._crcOk
 
+   def isComplete(self):
+      '''False when parsing stopped once the requested fields were found'''
+      return self._complete
+
    def show(self):
       for key, value in sorted(self.toDict().items()):
          print("%s: %s" % (key, value))
@@ -124,8 +226,8 @@ class PrefdlBase(object):
       pass
 
    def checkCrc(self, f):
-      expected = int(f.read(8), 16)
-      computed = zlib.crc32(self._buffer) & 0xffffffff
+      computed = f.getCrc()
+      expected = f.readCrc()
       if expected != computed:
          logging.error('Eeprom CRC mismatch %#08x vs %#08x', expected, computed)
          self._crcOk = False
@@ -139,10 +241,24 @@ class PrefdlBase(object):
          self.addField(field, v)
 
    def parseFile(self, f):
+      if not isinstance(f, PrefdlReader):
+         f = PrefdlReader(f, crc=zlib.crc32(self._version))
+      if f.view is not None:
+         self._source = f.view
       self.preParse(f)
-      while self.parseTlvField(f):
-         pass
-      self.checkCrc(f)
+      wanted = self._wanted
+      if wanted is None:
+         while self.parseTlvField(f):
+            pass
+         self.checkCrc(f)
+         return
+      while not wanted.issubset(self._data):
+         if not self.parseTlvField(f):
+            self.checkCrc(f)
+            return
+      # the crc covers the whole prefdl, it cannot be checked after an early stop
+      self._complete = False
+      self._crcOk = None
 
    def addField(self, field, value):
       v = self._data.get(field.name)
@@ -156,27 +272,22 @@ class PrefdlBase(object):
       self._data[field.name] = value
 
    def readTlv(self, f):
-      code = f.read(2)
-      length = f.read(4)
-      self._buffer += code + length
-      code = int(code, 16)
-      length = int(length, 16)
-      value = f.read(length)
-      self._buffer += value
-      return code, value
+      return f.readTlv()
 
    def parseFixedField(self, field, f):
+      offset = f.offset
       value = f.read(field.length)
-      self._buffer += value
+      self._offsets[field.name] = (offset, len(value))
       self.addField(field, value)
 
    def parseTlvField(self, f):
-      code, value = self.readTlv(f)
+      code, value, offset = self.readTlv(f)
       if code == 0x00:
          return False
 
       field = self.FIELD_CODE.get(code)
       if field:
+         self._offsets[field.name] = (offset, len(value))
          self.addField(field, value)
       return True
 
@@ -211,16 +322,28 @@ class Prefdl(object):
          raise UnknownPrefdlVersion("unknown prefdl verison %s" % version)
 
    @classmethod
-   def fromBinFile(cls, path, version=None):
-      with open(path, mode='rb') as f:
-         version = version or f.read(4)
-         return cls.getPrefdlCls(version)(f=f, version=version)
+   def fromBinFile(cls, path, version=None, fields=None):
+      # small reads so that an early stop doesn't fetch the whole eeprom
+      with open(path, mode='rb', buffering=PREFDL_READ_SIZE) as f:
+         return cls.fromFile(f, version=version, fields=fields)
+
+   @classmethod
+   def fromFile(cls, f, version=None, fields=None):
+      version = version or f.read(4)
+      return cls.getPrefdlCls(version)(f=f, version=version, fields=fields)
 
    @classmethod
-   def fromBytes(cls, data, version=None):
-      with closing(BytesIO(data)) as f:
-         version = version or f.read(4) # pylint: disable=no-member
-         return cls.getPrefdlCls(version)(f=f, version=version)
+   def fromBytes(cls, data, version=None, fields=None):
+      '''Parse a prefdl from bytes, or any buffer, without copying it
+
+      When fields is given the parsing stops as soon as they are all found.
+      '''
+      if version is None:
+         f = PrefdlReader(data)
+         version = bytes(f.read(4))
+      else:
+         f = PrefdlReader(data, crc=zlib.crc32(version))
+      return cls.getPrefdlCls(version)(f=f, version=version, fields=fields)
 
    @classmethod
    def fromDict(cls, data):
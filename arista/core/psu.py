@@ -92,6 +92,21 @@ class PsuSlot(SlotComponent):
       self.psuInv = None
       self.load(cacheOnly=True) # no IO in the constructor
 
+   def readIdentity(self, verify=False):
+      # detectors keep what they read, they are shared by all the models
+      return {}
+
+   def getPmbusDetector(self, addr):
+      '''Return the detector of the psu in the slot at the given address'''
+      detectors = self.getIdentity()
+      if detectors is None:
+         return PsuPmbusDetect(addr)
+      key = str(addr)
+      detector = detectors.get(key)
+      if detector is None:
+         detector = detectors[key] = PsuPmbusDetect(addr)
+      return detector
+
    def autodetectPsuModel(self):
       psus = []
       for psuCls in self.psus:
@@ -256,8 +271,8 @@ class PsuModel(object):
       return None
 
    @classmethod
-   def detectPmbus(cls, addr):
-      detector = PsuPmbusDetect(addr)
+   def detectPmbus(cls, addr, detector=None):
+      detector = detector or PsuPmbusDetect(addr)
       try:
          logging.debug('testing model %s for %s : "%s"', cls.__name__,
                        detector.id(), detector.model())
@@ -273,17 +288,19 @@ class PsuModel(object):
       return None
 
    @classmethod
-   def detectPsu(cls, addrFunc):
+   def detectPsu(cls, addrFunc, getDetector=None):
       identifier = None
       if cls.AUTODETECT_PMBUS and cls.PMBUS_ADDR:
-         identifier = cls.detectPmbus(addrFunc(cls.PMBUS_ADDR))
+         addr = addrFunc(cls.PMBUS_ADDR)
+         detector = getDetector(addr) if getDetector else None
+         identifier = cls.detectPmbus(addr, detector=detector)
       if cls.AUTODETECT_IPMI and cls.IPMI_ADDR and identifier is None:
          identifier = cls.detectIpmi(addrFunc(cls.IPMI_ADDR))
       return identifier
 
    @classmethod
    def tryLoadPsu(cls, slot, *args, **kwargs):
-      identifier = cls.detectPsu(slot.addrFunc)
+      identifier = cls.detectPsu(slot.addrFunc, slot.getPmbusDetector)
       if identifier is None:
          return None
       return cls(identifier, *args, **kwargs)
@@ -0,0 +1,51 @@
+from __future__ import absolute_import, division, print_function
+
+from ...tests.testing import unittest, patch
+
+from .. import asic
+from ..asic import SwitchChip, waitForSwitchChips
+from ..types import PciAddr
+
+class MockSwitchChip(SwitchChip):
+   def __init__(self, bus, checksBeforePresent=0, **kwargs):
+      super(MockSwitchChip, self).__init__(PciAddr(bus=bus), **kwargs)
+      self.checksBeforePresent = checksBeforePresent
+      self.rescanned = 0
+
+   def isPresent(self):
+      if self.checksBeforePresent:
+         self.checksBeforePresent -= 1
+         return False
+      return True
+
+   def pciRescan(self):
+      self.rescanned += 1
+
+@patch.object(asic, 'inSimulation', lambda: False)
+@patch.object(asic, 'klog', lambda *args, **kwargs: None)
+@patch.object(asic, '_openUeventListener', lambda: None)
+@patch.object(asic, 'ASIC_POLL_DELAY', 0.01)
+class SwitchChipWaitTest(unittest.TestCase):
+   @patch('time.sleep')
+   def testAlreadyPresent(self, sleep):
+      chips = [MockSwitchChip(1), MockSwitchChip(2)]
+      self.assertTrue(waitForSwitchChips(chips))
+      sleep.assert_not_called()
+
+   @patch.object(asic, 'ASIC_YIELD_TIME', 0)
+   def testYieldOnce(self):
+      chips = [MockSwitchChip(1, 2), MockSwitchChip(2, 3)]
+      with patch.object(asic.time, 'sleep') as sleep:
+         self.assertTrue(waitForSwitchChips(chips))
+      yields = [c for c in sleep.call_args_list if c[0][0] == asic.ASIC_YIELD_TIME]
+      self.assertEqual(len(yields), 1)
+
+   @patch.object(asic, 'ASIC_YIELD_TIME', 0)
+   def testTimeoutAndRescan(self):
+      chips = [MockSwitchChip(1, 1000, rescan=True), MockSwitchChip(2, 1000)]
+      self.assertFalse(waitForSwitchChips(chips, timeout=0.1))
+      self.assertEqual(chips[0].rescanned, 1)
+      self.assertEqual(chips[1].rescanned, 0)
+
+if __name__ == '__main__':
+   unittest.main()
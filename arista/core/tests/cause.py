@@ -1,12 +1,23 @@
 
 import json
+import os
+import shutil
 import tempfile
+import threading
+import time
 
-from ...tests.testing import unittest
+from ...tests.testing import mock, unittest
 from ...libs.fs import touch, rmfile
 
-from ..cause import ReloadCauseDataStore, ReloadCauseEntry
+from ..cause import (
+   ReloadCauseCollector,
+   ReloadCauseDataStore,
+   ReloadCauseEntry,
+   ReloadCauseHistory,
+)
+from ..component import Component
 from ..config import Config
+from ..types import I2cAddr
 
 class ReloadCauseTest(unittest.TestCase):
    EXPECTED = [
@@ -69,5 +80,109 @@ class ReloadCauseTest(unittest.TestCase):
       self.assertEqual(len(cause.__dict__), len(expectedKeys))
       self.assertEqual(set(cause.__dict__), set(expectedKeys))
 
+class ReloadCauseHistoryTest(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp(prefix='unittest-arista-history-')
+      self.addCleanup(shutil.rmtree, self.tmpdir)
+      self.path = os.path.join(self.tmpdir, 'history')
+
+   def _newHistory(self, size=4):
+      return ReloadCauseHistory(name='history', path=self.path, size=size)
+
+   def _causes(self, *names):
+      return [ReloadCauseEntry(cause=n, rcTime='1970-01-01 00:00:0%d UTC' % i)
+              for i, n in enumerate(names)]
+
+   def _lineCount(self):
+      with open(self.path) as f:
+         return len(f.readlines())
+
+   def testAppendDeduplicates(self):
+      causes = self._causes('powerloss', 'reboot')
+      self.assertEqual(self._newHistory().append(causes), 2)
+      self.assertEqual(self._newHistory().append(causes), 0)
+      self.assertEqual(self._newHistory().append(causes + self._causes('a')), 1)
+      self.assertEqual(self._lineCount(), 3)
+      read = self._newHistory().readCauses()
+      self.assertEqual([c.cause for c in read], ['powerloss', 'reboot', 'a'])
+      self.assertEqual(set(read[0].__dict__), set(['cause', 'time',
+                                                   'description']))
+
+   def testCompaction(self):
+      history = self._newHistory(size=2)
+      for i in range(5):
+         history.append([ReloadCauseEntry(cause='c%d' % i, rcTime=str(i))])
+      # compacted when the log exceeded twice the retained entries
+      self.assertEqual(self._lineCount(), 2)
+      read = self._newHistory(size=2).readCauses()
+      self.assertEqual([c.cause for c in read], ['c3', 'c4'])
+
+   def testTornRecord(self):
+      self._newHistory().append(self._causes('powerloss'))
+      with open(self.path, 'a') as f:
+         f.write('{"cause": "tor')
+      history = self._newHistory()
+      self.assertEqual(len(history.readCauses()), 1)
+      history.append([ReloadCauseEntry(cause='reboot', rcTime='1')])
+      read = self._newHistory().readCauses()
+      self.assertEqual([c.cause for c in read], ['powerloss', 'reboot'])
+
+   def testMigrateLegacyHistory(self):
+      legacyPath = os.path.join(self.tmpdir, 'legacy')
+      legacy = ReloadCauseDataStore(name='legacy', path=legacyPath)
+      legacy.writeCauses(self._causes('powerloss', 'reboot'))
+      with mock.patch('arista.core.cause.ReloadCauseDataStore',
+                      return_value=legacy):
+         history = self._newHistory()
+         self.assertEqual(history.append(self._causes('powerloss')), 0)
+      self.assertEqual(len(legacy.readCauses()), 2)
+      self.assertEqual(len(self._newHistory().readCauses()), 2)
+
+class FakeProvider(Component):
+
+   RELOAD_CAUSE_PROVIDER = True
+
+   def __init__(self, name, delay=0, **kwargs):
+      super(FakeProvider, self).__init__(**kwargs)
+      self.name = name
+      self.delay = delay
+      self.threads = []
+
+   def getReloadCauses(self, clear=False):
+      self.threads.append(threading.current_thread())
+      time.sleep(self.delay)
+      return [ReloadCauseEntry(cause=self.name)]
+
+class ReloadCauseCollectorTest(unittest.TestCase):
+   def _newTree(self, providers):
+      root = Component()
+      parent = root.newComponent(Component)
+      for provider in providers:
+         parent.addComponent(provider)
+      return root
+
+   def testCollectInOrder(self):
+      providers = [
+         FakeProvider('a', addr=I2cAddr(1, 0x10), delay=0.05),
+         FakeProvider('b', addr=I2cAddr(2, 0x10)),
+         FakeProvider('c', addr=I2cAddr(1, 0x11)),
+      ]
+      causes = ReloadCauseCollector().run(self._newTree(providers))
+      self.assertEqual([c.cause for c in causes], ['a', 'b', 'c'])
+      # providers of a bus share a thread, buses get their own
+      self.assertEqual(providers[0].threads, providers[2].threads)
+      self.assertNotEqual(providers[0].threads, providers[1].threads)
+
+   def testProviderTimeout(self):
+      providers = [
+         FakeProvider('hung', addr=I2cAddr(1, 0x10), delay=1),
+         FakeProvider('queued', addr=I2cAddr(1, 0x11)),
+         FakeProvider('ok', addr=I2cAddr(2, 0x10)),
+      ]
+      begin = time.time()
+      causes = ReloadCauseCollector(timeout=0.1).run(self._newTree(providers))
+      self.assertLess(time.time() - begin, 0.9)
+      self.assertEqual([c.cause for c in causes], ['ok'])
+
 if __name__ == '__main__':
    unittest.main()
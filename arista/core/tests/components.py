@@ -1,11 +1,132 @@
 
 from __future__ import absolute_import, division, print_function
 
+import threading
+import time
+
 from ...tests.testing import unittest, patch
+from ...core.component import Component, Priority, SlotComponent
 from ...core.fixed import FixedSystem
 from ...core.platform import loadPlatforms, getPlatforms
+from ...core.types import I2cAddr
+
+class SetupRecorder(object):
+   def __init__(self):
+      self.lock = threading.Lock()
+      self.started = []
+      self.finished = []
+      self.running = 0
+      self.maxRunning = 0
+
+class RecordingComponent(Component):
+   def __init__(self, name, recorder, **kwargs):
+      super(RecordingComponent, self).__init__(**kwargs)
+      self.name = name
+      self.recorder = recorder
+
+   def setup(self):
+      rec = self.recorder
+      with rec.lock:
+         rec.started.append(self.name)
+         rec.running += 1
+         rec.maxRunning = max(rec.maxRunning, rec.running)
+      time.sleep(0.02)
+      with rec.lock:
+         rec.running -= 1
+         rec.finished.append(self.name)
+
+class IdentitySlot(SlotComponent):
+   def __init__(self, **kwargs):
+      super(IdentitySlot, self).__init__(**kwargs)
+      self.present = False
+      self.reads = 0
+
+   def getPresence(self):
+      return self.present
+
+   def readIdentity(self, verify=False):
+      self.reads += 1
+      return {'SKU': 'read%d' % self.reads}
+
+class SlotComponentTest(unittest.TestCase):
+   def testIdentityCache(self):
+      slot = IdentitySlot()
+      self.assertIsNone(slot.getIdentity())
+      slot.present = True
+      self.assertEqual(slot.getIdentity(), {'SKU': 'read1'})
+      self.assertEqual(slot.getIdentity(), {'SKU': 'read1'})
+      self.assertEqual(slot.getIdentity(verify=True), {'SKU': 'read2'})
+
+   def testIdentityPresenceChange(self):
+      slot = IdentitySlot()
+      slot.present = True
+      self.assertEqual(slot.getIdentity(), {'SKU': 'read1'})
+      generation = slot.presenceGeneration
+      slot.present = False
+      self.assertIsNone(slot.getIdentity())
+      slot.present = True
+      self.assertEqual(slot.getIdentity(), {'SKU': 'read2'})
+      self.assertEqual(slot.presenceGeneration, generation + 2)
 
 class ComponentTest(unittest.TestCase):
+   def _buildTree(self, recorder):
+      root = Component()
+      def add(parent, name, bus=None, **kwargs):
+         addr = I2cAddr(bus, 0x50 + len(parent.components)) if bus is not None \
+                else None
+         return parent.newComponent(RecordingComponent, name, recorder,
+                                    addr=addr, **kwargs)
+      a = add(root, 'a')
+      add(a, 'a1', bus=1)
+      add(a, 'a2', bus=1)
+      b = add(root, 'b')
+      add(b, 'b1', bus=2)
+      add(root, 'c', bus=3)
+      add(root, 'bg', priority=Priority.BACKGROUND)
+      return root
+
+   def _checkOrder(self, recorder):
+      started = recorder.started
+      finished = recorder.finished
+      self.assertEqual(sorted(started), ['a', 'a1', 'a2', 'b', 'b1', 'c'])
+      self.assertLess(finished.index('a'), started.index('a1'))
+      self.assertLess(finished.index('b'), started.index('b1'))
+      self.assertLess(finished.index('a1'), started.index('a2'))
+
+   def testSequentialSetup(self):
+      recorder = SetupRecorder()
+      self._buildTree(recorder).finish(jobs=1)
+      self._checkOrder(recorder)
+      self.assertEqual(recorder.started, ['a', 'b', 'c', 'a1', 'a2', 'b1'])
+      self.assertEqual(recorder.maxRunning, 1)
+
+   def testParallelSetup(self):
+      recorder = SetupRecorder()
+      root = self._buildTree(recorder)
+      root.finish(jobs=4)
+      self._checkOrder(recorder)
+      self.assertGreater(recorder.maxRunning, 1)
+
+      recorder.started = []
+      recorder.finished = []
+      root.finish(Priority.backgroundFilter, jobs=4)
+      self.assertEqual(recorder.started, ['bg'])
+
+   def testParallelSetupBarrier(self):
+      recorder = SetupRecorder()
+      root = self._buildTree(recorder)
+      root.finish(Priority.priorityFilter(Priority.DEFAULT, Priority.BACKGROUND),
+                  jobs=4)
+      self.assertEqual(recorder.started[-1], 'bg')
+      self.assertEqual(len(recorder.started), 7)
+
+   def testParallelSetupError(self):
+      recorder = SetupRecorder()
+      root = self._buildTree(recorder)
+      with patch.object(RecordingComponent, 'setup', side_effect=IOError('fail')):
+         with self.assertRaises(IOError):
+            root.finish(jobs=4)
+
    def testSetup(self):
       loadPlatforms()
       for platformCls in getPlatforms():
@@ -24,5 +145,22 @@ class ComponentTest(unittest.TestCase):
                # python2 mock version can be outdated, it will be check by py3
                mock.assert_called_once()
 
+   def testParallelPlatformSetup(self):
+      loadPlatforms()
+      for platformCls in getPlatforms():
+         if not issubclass(platformCls, FixedSystem):
+            continue
+         platform = platformCls()
+
+         mocks = []
+         for c in platform.iterComponents():
+            mocks.append(patch.object(c, 'setup').start())
+
+         platform.setup(jobs=4)
+
+         for mock in mocks:
+            if hasattr(mock, 'assert_called_once'):
+               mock.assert_called_once()
+
 if __name__ == '__main__':
    unittest.main()
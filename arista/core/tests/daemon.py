@@ -0,0 +1,226 @@
+from __future__ import absolute_import, division, print_function
+
+import sys
+
+from ...tests.testing import unittest, patch
+
+if sys.version_info.major == 2:
+   # the daemon is python3 only, see setup.py
+   raise unittest.SkipTest('daemon tests require python3')
+
+# pylint: disable=wrong-import-position
+import os
+import shutil
+import tempfile
+
+from ...daemon import prometheus
+from ...daemon import telemetry
+from ...daemon.fan import FanControlDaemonFeature
+from ...daemon.telemetry import collectTelemetry, readXcvrPresences
+from ...libs import sampling
+from ...daemon.prometheus import (
+   MetricCollector,
+   MetricSet,
+   PrometheusDaemonFeature,
+   adaptInterval,
+)
+from ...libs.stats import disableHwStats, enableHwStats
+from ..inventory import Inventory
+from ...drivers.scd.xcvr import ScdXcvrControl
+from ...inventory.xcvr import Xcvr
+from .mockinv import MockFan, MockPsuSlot, MockTemp, MockXcvr
+
+class MockPlatform(object):
+   def __init__(self):
+      self.inventory = Inventory()
+      self.inventory.addTemp(MockTemp(temperature=42))
+      self.inventory.addFan(MockFan(speed=60))
+      self.inventory.addPsuSlot(MockPsuSlot(presence=False))
+      self.inventory.xcvrs[1] = MockXcvr(portId=1, presence=True)
+
+   def getInventory(self):
+      return self.inventory
+
+class MockDaemon(object):
+   def __init__(self):
+      self.platform = MockPlatform()
+
+class PrometheusTest(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp()
+      self.path = os.path.join(self.tmpdir, 'arista.prom')
+
+   def tearDown(self):
+      disableHwStats()
+      shutil.rmtree(self.tmpdir)
+
+   def _collect(self, **kwargs):
+      metrics = MetricSet()
+      complete = MetricCollector(MockPlatform(), metrics, **kwargs).collect()
+      return complete, metrics.render()
+
+   def testCollect(self):
+      complete, data = self._collect()
+      self.assertTrue(complete)
+      self.assertIn('# TYPE arista_temperature_celsius gauge', data)
+      self.assertIn('arista_temperature_celsius{index="0",sensor="N/A"} 42.0',
+                    data)
+      self.assertIn('arista_temperature_high_threshold_celsius'
+                    '{index="0",sensor="N/A"} 50.0', data)
+      self.assertIn('arista_fan_pwm_percent{fan="fan1",index="0"} 60.0', data)
+      self.assertIn('arista_psu_present{index="0",psu="psu1"} 0.0', data)
+      self.assertIn('arista_xcvr_present{port="1",type="qsfp"} 1.0', data)
+      self.assertIn('# TYPE arista_fan_pwm_writes_avoided_total counter', data)
+      # the mock fans have no rpm nor presence
+      self.assertNotIn('arista_fan_rpm', data)
+
+   def testDuplicateNames(self):
+      platform = MockPlatform()
+      platform.inventory.addTemp(MockTemp(temperature=43))
+      metrics = MetricSet()
+      MetricCollector(platform, metrics).collect()
+      data = metrics.render()
+      self.assertIn('arista_temperature_celsius{index="0",sensor="N/A"} 42.0',
+                    data)
+      self.assertIn('arista_temperature_celsius{index="1",sensor="N/A"} 43.0',
+                    data)
+
+   def testCollectTimeout(self):
+      complete, data = self._collect(timeout=-1)
+      self.assertFalse(complete)
+      self.assertNotIn('arista_temperature_celsius', data)
+
+   def testBusStats(self):
+      stats = enableHwStats()
+      stats.record(('smbus', 'read', 0x4c, 3, 0x0), 0.001)
+      stats.record(('smbus', 'read', 0x4c, 3, 0x1), 0.001, error=True)
+      stats.record(('sysfs', 'read', None, None, 'temp1'), 0.001)
+      _, data = self._collect()
+      self.assertIn('# TYPE arista_i2c_errors_total counter', data)
+      self.assertIn('arista_i2c_transactions_total{bus="i2c-3"} 2.0', data)
+      self.assertIn('arista_i2c_errors_total{bus="i2c-3"} 1.0', data)
+
+   def testXcvrEepromStats(self):
+      with patch.object(prometheus, 'getXcvrEepromStats', return_value={
+            'hits': 5, 'misses': 2, 'live': 1, 'invalidations': 3}):
+         _, data = self._collect()
+      self.assertIn('# TYPE arista_xcvr_eeprom_cache_hits_total counter', data)
+      self.assertIn('arista_xcvr_eeprom_cache_hits_total 5.0', data)
+      self.assertIn('arista_xcvr_eeprom_cache_misses_total 2.0', data)
+      self.assertIn('arista_xcvr_eeprom_live_reads_total 1.0', data)
+      self.assertIn('arista_xcvr_eeprom_cache_invalidations_total 3.0', data)
+
+   def testEscapeLabel(self):
+      metrics = MetricSet()
+      metrics.add('metric', 'doc', 1, sensor='a "quoted"\\name')
+      self.assertIn(r'metric{sensor="a \"quoted\"\\name"} 1.0', metrics.render())
+
+   def testAdaptInterval(self):
+      self.assertEqual(adaptInterval(30., 0.1), 30.)
+      # a collection of 3s needs 60s to stay within 5%
+      self.assertEqual(adaptInterval(30., 3.), 60.)
+      self.assertEqual(adaptInterval(60., 2.5), 60.)
+      self.assertEqual(adaptInterval(60., 0.5), 30.)
+      self.assertEqual(adaptInterval(30., 100.), prometheus.PROMETHEUS_MAX_INTERVAL)
+
+   def testFeature(self):
+      feature = PrometheusDaemonFeature()
+      feature.attachToDaemon(MockDaemon())
+      with patch.object(prometheus, 'Config') as config:
+         config.return_value.prometheus_textfile = self.path
+         feature.callback(0)
+      with open(self.path) as f:
+         data = f.read()
+      self.assertIn('arista_exporter_collection_complete 1.0', data)
+      self.assertIn('arista_temperature_celsius', data)
+      self.assertEqual(os.listdir(self.tmpdir), ['arista.prom'])
+
+class FanControlTest(unittest.TestCase):
+   def testSimulation(self):
+      feature = FanControlDaemonFeature()
+      feature.attachToDaemon(MockDaemon())
+      feature.createControllers()
+      fans = feature.model.fans
+      clock = iter(range(0, 10000, 5))
+      patch.object(sampling, 'monotonicRaw',
+                   side_effect=lambda: float(next(clock))).start()
+      self.addCleanup(patch.stopall)
+      for _ in range(50):
+         feature.callback(5.)
+      self.assertIsNotNone(feature.latency)
+      speeds = set(fan.getSpeed() for fan in fans)
+      self.assertEqual(len(speeds), 1)
+      # the fans are only written when the decided speed changes
+      self.assertLess(fans[0].writes, 50)
+      feature.callback(5.)
+      writes = fans[0].writes
+      feature.callback(5.)
+      self.assertEqual(fans[0].writes, writes)
+
+   def testAbsentFan(self):
+      feature = FanControlDaemonFeature()
+      fan = MockFan(speed=60)
+      fan.getPresence = lambda: False
+      with patch.object(fan, 'setSpeed') as setSpeed:
+         feature.applySpeed(fan, 80)
+      setSpeed.assert_not_called()
+
+class MockXcvrControl(ScdXcvrControl):
+   def __init__(self, values):
+      super(MockXcvrControl, self).__init__(None)
+      self.values = values
+
+   def readRegisters(self):
+      if self.values is None:
+         raise IOError('no xcvr_registers attribute')
+      return self.values
+
+class HashableTemp(MockTemp):
+   __hash__ = object.__hash__
+
+class TelemetryTest(unittest.TestCase):
+   def testReadXcvrPresences(self):
+      inventory = Inventory()
+      for xcvrId in range(1, 5):
+         inventory.xcvrs[xcvrId] = MockXcvr(portId=xcvrId, presence=True)
+      control = inventory.addXcvrControl(MockXcvrControl({1: 0x0, 2: 0x4}))
+      for xcvrId in range(1, 4):
+         control.addXcvr(0xa000 + xcvrId * 0x10, xcvrId, Xcvr.QSFP)
+      failing = inventory.addXcvrControl(MockXcvrControl(None))
+      failing.addXcvr(0xa040, 4, Xcvr.QSFP)
+      # ports the kernel didn't report are read individually
+      self.assertEqual(readXcvrPresences(inventory),
+                       {1: True, 2: False, 3: True, 4: True})
+
+   def testDuplicateNames(self):
+      inventory = Inventory()
+      inventory.addTemp(MockTemp(diode=1, temperature=30))
+      inventory.addTemp(MockTemp(diode=2, temperature=40))
+      records, _ = collectTelemetry(inventory)
+      self.assertEqual(records[0].name, records[1].name)
+      self.assertEqual([(r.index, r.value) for r in records],
+                       [(0, 30), (1, 40)])
+
+   def testSampling(self):
+      inventory = Inventory()
+      temp = inventory.addTemp(HashableTemp(temperature=30))
+      presence = patch.object(temp, 'getPresence', return_value=True).start()
+      value = patch.object(temp, 'getTemperature', return_value=30).start()
+      now = [0.]
+      patch.object(sampling, 'monotonicRaw', lambda: now[0]).start()
+      patch.object(telemetry, 'monotonicRaw', lambda: now[0]).start()
+      self.addCleanup(patch.stopall)
+      sampler = sampling.AdaptiveSampler(1., maxInterval=10.)
+      stateSampler = sampling.AdaptiveSampler(5., maxInterval=5.)
+      for i in range(30):
+         now[0] = float(i)
+         records, _ = collectTelemetry(inventory, sampler=sampler,
+                                       stateSampler=stateSampler)
+      # the presence is read at a fixed interval, the cold sensor less often
+      self.assertEqual(presence.call_count, 6)
+      self.assertEqual(value.call_count, 3)
+      # the record is as old as its oldest read
+      self.assertEqual(records[0].time, 20.)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,66 @@
+from __future__ import absolute_import, division, print_function
+
+from ...tests.testing import unittest, mock, patch
+
+from .. import driver
+from ..driver import isModuleLoaded, modprobe, modprobeAll, rmmod
+
+PROC_MODULES = '''\
+i2c_dev 24576 0 - Live 0x0000000000000000
+eeprom 16384 0 - Live 0x0000000000000000
+'''
+
+@patch.object(driver, 'inSimulation', lambda: False)
+@patch.object(driver, 'inDebug', lambda: False)
+class ModuleLoadTest(unittest.TestCase):
+   def setUp(self):
+      driver._loadedModules = None # pylint: disable=protected-access
+      self.addCleanup(setattr, driver, '_loadedModules', None)
+      opener = patch('%s.open' % driver.__name__,
+                     mock.mock_open(read_data=PROC_MODULES),
+                     create=True)
+      self.open = opener.start()
+      self.addCleanup(opener.stop)
+      caller = patch.object(driver.subprocess, 'check_call')
+      self.call = caller.start()
+      self.addCleanup(caller.stop)
+
+   def testSnapshot(self):
+      self.assertTrue(isModuleLoaded('i2c-dev'))
+      self.assertFalse(isModuleLoaded('scd'))
+      self.assertEqual(self.open.call_count, 1)
+
+   def testModprobeSkipLoaded(self):
+      modprobe('eeprom')
+      self.call.assert_not_called()
+      modprobe('scd-hwmon')
+      modprobe('scd-hwmon')
+      self.call.assert_called_once_with(['modprobe', 'scd_hwmon'])
+
+   def testModprobeAll(self):
+      calls = modprobeAll([
+         ('eeprom', []),
+         ('i2c-dev', []),
+         ('pmbus', []),
+         ('lm75', []),
+         ('pmbus', []),
+         ('scd', ['foo=1']),
+         ('tmp468', None),
+      ])
+      self.assertEqual(calls, 3)
+      self.assertEqual([c[0][0] for c in self.call.call_args_list], [
+         ['modprobe', '-a', 'pmbus', 'lm75'],
+         ['modprobe', 'scd', 'foo=1'],
+         ['modprobe', '-a', 'tmp468'],
+      ])
+      modprobe('lm75')
+      self.assertEqual(self.call.call_count, 3)
+
+   def testRmmodInvalidates(self):
+      modprobe('lm75')
+      rmmod('lm75')
+      self.assertFalse(isModuleLoaded('lm75'))
+      self.assertEqual(self.open.call_count, 2)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,97 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+
+from ...tests.testing import benchmark, bench, unittest, patch
+
+from ...drivers import plx as plx_module
+from ...drivers.plx import PlxPexI2cDev, PlxPexI2cPciAddrMap
+from ..types import I2cAddr
+from .. import log as log_module
+from ..log import DEBUG, INFO, Logger, LoggerManager, parseVerbosity
+
+class FakePlxBus(object):
+   addr = I2cAddr(1, 0x38)
+
+   def read_bytes(self, addr, cmd, datalen):
+      return [0] * datalen
+
+   def write_bytes(self, addr, data):
+      pass
+
+class LoggingTestBase(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp()
+      self.logfile = os.path.join(self.tmpdir, 'arista.log')
+      self.manager = LoggerManager()
+      patch.object(log_module, 'loggerManager', self.manager).start()
+      self.addCleanup(patch.stopall)
+
+   def tearDown(self):
+      # python loggers are global, only the test ones are used here
+      for logger in self.manager.loggers.values():
+         del logger.handlers[:]
+      if self.manager.shared is not None:
+         self.manager.shared.close()
+      shutil.rmtree(self.tmpdir)
+
+   def readLogfile(self):
+      self.manager.flush()
+      with open(self.logfile) as f:
+         return f.read()
+
+class LoggingTest(LoggingTestBase):
+   def testSharedQueueHandler(self):
+      self.manager.setup({}, self.logfile, False)
+      first = Logger('test.first').getLogger()
+      second = Logger('test.second').getLogger()
+      handlers = set(first.handlers) & set(second.handlers)
+      self.assertEqual(len(handlers), 2)
+      Logger('test.first').debug('first %d', 1)
+      Logger('test.second').debug('second %d', 2)
+      data = self.readLogfile()
+      self.assertIn('DEBUG: first 1', data)
+      self.assertIn('DEBUG: second 2', data)
+
+   def testDebugDisabled(self):
+      self.manager.setup({}, None, False)
+      logger = Logger('test.quiet')
+      self.assertFalse(logger.isEnabledFor(DEBUG))
+      self.assertTrue(logger.isEnabledFor(INFO))
+
+   def testDebugVerbosity(self):
+      self.manager.setup(parseVerbosity('test.loud/DEBUG'), None, False)
+      self.assertTrue(Logger('test.loud').isEnabledFor(DEBUG))
+      self.assertFalse(Logger('test.other').isEnabledFor(INFO))
+
+   def testLogfileReconfigured(self):
+      self.manager.setup({}, self.logfile, False)
+      Logger('test.first').debug('before')
+      self.readLogfile()
+      shared = self.manager.shared
+      otherLogfile = os.path.join(self.tmpdir, 'other.log')
+      self.manager.setup({}, otherLogfile, False)
+      self.assertIsNone(self.manager.shared)
+      self.assertIsNone(shared.listener)
+
+@benchmark
+class LoggingBenchmark(LoggingTestBase):
+   '''Cost of the debug messages of the plx accessors for each transaction'''
+   def _bench(self, name):
+      patch.object(plx_module, 'logging', Logger('test.plx')).start()
+      dev = PlxPexI2cDev(FakePlxBus(), PlxPexI2cPciAddrMap())
+      return bench(name, lambda: dev.read(0x100), unit='transaction')
+
+   def testDebugDisabled(self):
+      self.manager.setup({}, None, False)
+      self._bench('plx-debug-disabled')
+
+   def testDebugLogfile(self):
+      self.manager.setup({}, self.logfile, False)
+      self._bench('plx-debug-logfile')
+      self.assertIn('read_bytes', self.readLogfile())
+
+if __name__ == '__main__':
+   unittest.main()
@@ -53,6 +53,7 @@ def mock_writeConfig(path, data):
 def mock_writeComponents(self, components, filename):
    assert components
    assert filename
+   return components
 
 def mock_sysfsRead(self):
    return '1'
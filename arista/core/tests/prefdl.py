@@ -2,10 +2,11 @@ from __future__ import print_function
 
 import contextlib
 import tempfile
+import zlib
 
-from ...tests.testing import unittest
+from ...tests.testing import benchmark, bench, unittest
 
-from ..prefdl import Prefdl, PrefdlBase
+from ..prefdl import InvalidPrefdlData, Prefdl, PrefdlBase
 
 PREFDL2 = b"0002PCA012345678MFG1234567812304000cASY012345678090010unknownfield0001" \
           b"0A000502.000B000502.1105000c11223344556602000e202010201255420C0007Prod" \
@@ -101,5 +102,58 @@ class PrefdlTest(unittest.TestCase):
          f.seek(0)
          pfdl.writeToFile(f.name)
 
+   def testEarlyStop(self):
+      pfdl = Prefdl.fromBytes(PREFDL3, fields=['Sid', 'SKU'])
+      self.assertFalse(pfdl.isComplete())
+      self.assertIsNone(pfdl.isCrcValid())
+      self.assertEqual(pfdl.getField('SID'), 'Product')
+      self.assertEqual(pfdl.getField('SKU'), 'DCS-1234AB-42')
+      # fields after the last requested one are not parsed
+      pfdl = Prefdl.fromBytes(PREFDL3, fields=['PCA'])
+      self.assertEqual(pfdl.data(), {'PCA': 'PCA012345678'})
+
+   def testEarlyStopFromBinFile(self):
+      with self._tempBinPrefdl(PREFDL2) as f:
+         pfdl = Prefdl.fromBinFile(f.name, fields=['MAC'])
+         self.assertEqual(pfdl.getField('MAC'), '11:22:33:44:55:66')
+         self.assertFalse(pfdl.isComplete())
+
+   def testFieldOffsets(self):
+      for data in [PREFDL2, PREFDL3]:
+         pfdl = Prefdl.fromBytes(data)
+         self.assertTrue(pfdl.isComplete())
+         for name, value in PREFDL_EXPECT.items():
+            if name in ['MAC', 'HwApi', 'HwRev']:
+               continue
+            offset, length = pfdl.getFieldOffset(name)
+            self.assertEqual(data[offset:offset + length], value.encode())
+            self.assertEqual(bytes(pfdl.getRawField(name)), value.encode())
+      self.assertIsNone(Prefdl.fromBytes(PREFDL3).getFieldOffset('Deviation'))
+
+   def testTruncated(self):
+      with self.assertRaises(InvalidPrefdlData):
+         Prefdl.fromBytes(PREFDL3[:40])
+
+def makeLargePrefdl(count):
+   '''Prefdl v3 with many fields unknown to the parser'''
+   body = b''.join(b'09%04X%s' % (12, b'FIELD%07d' % i) for i in range(count))
+   body = b'0003' + body + b'0C0007Product03000dDCS-1234AB-42' + b'000000'
+   return body + b'%08X' % (zlib.crc32(body) & 0xffffffff)
+
+@benchmark
+class PrefdlBenchmark(unittest.TestCase):
+   '''Parsing throughput over recorded prefdl blobs'''
+   def testBenchmark(self):
+      blobs = [
+         ('prefdl2', PREFDL2),
+         ('prefdl3', PREFDL3),
+         ('prefdl3-large', makeLargePrefdl(500)),
+      ]
+      for name, data in blobs:
+         self.assertTrue(Prefdl.fromBytes(data).isCrcValid())
+         bench(name, lambda d=data: Prefdl.fromBytes(d), unit='parse')
+         bench('%s-identity' % name,
+               lambda d=data: Prefdl.fromBytes(d, fields=['SID']), unit='parse')
+
 if __name__ == '__main__':
    unittest.main()
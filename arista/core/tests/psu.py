@@ -1,5 +1,5 @@
 
-from ...tests.testing import unittest
+from ...tests.testing import unittest, patch
 
 from ...descs.fan import FanDesc, FanPosition
 from ...descs.psu import PsuDesc
@@ -134,5 +134,23 @@ class TestPsu(unittest.TestCase):
       self._checkSystem(system)
       self._checkPsu(system, 0, PsuModel2)
 
+   def testPsuDetectorShared(self):
+      def psuFunc(_):
+         return { 'id': 'VENDOR1', 'model': 'MODEL2-0' }
+      system = MockFixedSystem([PsuModel1, PsuModel2], psuFunc=psuFunc)
+      slot = system.slots[0]
+      slot.presentGpio.value = 1
+      with patch.object(psu_module, 'PsuPmbusDetect',
+                        side_effect=MockPmbusDetect) as detect:
+         self._checkSystem(system)
+         self._checkPsu(system, 0, PsuModel2)
+         # both models are tested against the same pmbus identity
+         self.assertEqual(detect.call_count, 1)
+         slot.presentGpio.value = 0
+         slot.getIdentity()
+         slot.presentGpio.value = 1
+         slot.getPmbusDetector(psuFunc(0x58))
+         self.assertEqual(detect.call_count, 2)
+
 if __name__ == '__main__':
    unittest.main()
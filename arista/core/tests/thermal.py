@@ -1,8 +1,18 @@
 from __future__ import absolute_import, division, print_function
 
-from ...tests.testing import unittest
+import random
+
+from ...tests.testing import benchmark, bench, unittest, patch
 
 from .. import thermal_control
+from ..thermal_control import (
+   FanZone,
+   FanZoneController,
+   MAX_FAN_SPEED,
+   MIN_FAN_SPEED,
+   SensorArray,
+)
+from ..thermal_model import ThermalModel
 from ...descs.sensor import SensorDesc, Position
 
 class MockInvTemp(object):
@@ -88,5 +98,153 @@ class ThermalControlTest(unittest.TestCase):
       self.assertEqual(self.thermal_control.sensorsToFanSpeed([sensor1, sensor2]),
                        self.thermal_control.MIN_FAN_SPEED)
 
+def loopSensorsToFanSpeed(sensors):
+   '''Evaluation of each sensor in turn, used as a reference'''
+   targetFanSpeed = MIN_FAN_SPEED
+   for sensor in sensors:
+      if not sensor.get_presence():
+         continue
+      desc = sensor.get_inventory_object().getDesc()
+      maxTemp = min(desc.overheat, desc.critical)
+      if not int(desc.target) or not int(maxTemp):
+         continue
+      halfwayTemp = (desc.target + maxTemp) / 2
+      temp = sensor.get_temperature()
+      if temp < halfwayTemp:
+         continue
+      elif temp >= maxTemp:
+         targetFanSpeed = MAX_FAN_SPEED
+         continue
+      newFanSpeed = (temp - halfwayTemp) / (maxTemp - halfwayTemp) * \
+                    (MAX_FAN_SPEED - MIN_FAN_SPEED) + \
+                    MIN_FAN_SPEED
+      targetFanSpeed = max(targetFanSpeed, newFanSpeed)
+   return targetFanSpeed
+
+def makeChassisSensors(count, seed=0):
+   '''Sensors of a fully populated modular chassis'''
+   rand = random.Random(seed)
+   sensors = []
+   for _ in range(count):
+      target = rand.choice([0, 40, 50, 60])
+      overheat = target + rand.choice([30, 40])
+      sensors.append(MockSensor(rand.random() > 0.05, rand.uniform(20, 95),
+                                target, overheat, overheat + 10))
+   return sensors
+
+class SensorArrayTest(unittest.TestCase):
+   def _compare(self):
+      for seed in range(20):
+         sensors = makeChassisSensors(50, seed=seed)
+         self.assertAlmostEqual(thermal_control.sensorsToFanSpeed(sensors),
+                                loopSensorsToFanSpeed(sensors))
+
+   @unittest.skipIf(thermal_control.numpy is None, 'numpy is not available')
+   def testNumpy(self):
+      self._compare()
+
+   def testNoNumpy(self):
+      with patch.object(thermal_control, 'numpy', None):
+         self._compare()
+
+   def testThresholds(self):
+      sensors = [MockSensor(True, 0, 40, 80, 90) for _ in range(3)]
+      sensorArray = SensorArray([s.desc for s in sensors])
+      sensorArray.update([85, None, 95])
+      self.assertEqual(sensorArray.overheat(), [True, False, True])
+      self.assertEqual(sensorArray.critical(), [False, False, True])
+      sensorArray.update([None, None, None])
+      self.assertIsNone(sensorArray.fanSpeed())
+
+   def testTargetAboveMax(self):
+      sensors = [MockSensor(True, 0, 80, 80, 90),
+                 MockSensor(True, 0, 95, 90, 100)]
+      sensorArray = SensorArray([s.desc for s in sensors])
+      sensorArray.update([79, 89])
+      self.assertEqual(sensorArray.fanSpeed(), MIN_FAN_SPEED)
+      sensorArray.update([80, None])
+      self.assertEqual(sensorArray.fanSpeed(), MAX_FAN_SPEED)
+      sensorArray.update([None, 90])
+      self.assertEqual(sensorArray.fanSpeed(), MAX_FAN_SPEED)
+      with patch.object(thermal_control, 'numpy', None):
+         sensorArray = SensorArray([s.desc for s in sensors])
+         sensorArray.update([None, 90])
+         self.assertEqual(sensorArray.fanSpeed(), MAX_FAN_SPEED)
+
+@benchmark
+class SensorArrayBenchmark(unittest.TestCase):
+   '''Fan speed evaluation of the sensors of a modular chassis'''
+   SENSORS = 400
+
+   def testBenchmark(self):
+      sensors = makeChassisSensors(self.SENSORS)
+      sensorArray = SensorArray([s.desc for s in sensors])
+      values = [s.temp for s in sensors]
+      bench('loop', lambda: loopSensorsToFanSpeed(sensors))
+      bench('sensorsToFanSpeed',
+            lambda: thermal_control.sensorsToFanSpeed(sensors))
+      bench('array-evaluation', sensorArray.fanSpeed)
+      bench('array-update', lambda: sensorArray.update(values))
+      with patch.object(thermal_control, 'numpy', None):
+         sensorArray = SensorArray([s.desc for s in sensors])
+         sensorArray.update(values)
+         bench('array-evaluation-pure', sensorArray.fanSpeed)
+
+class FanZoneControllerTest(unittest.TestCase):
+   def setUp(self):
+      self.model = ThermalModel([
+         SensorDesc(diode=0, name='inlet', position=Position.INLET,
+                    target=40, overheat=80, critical=90),
+         SensorDesc(diode=1, name='asic', position=Position.OTHER,
+                    target=50, overheat=100, critical=110),
+      ], fanCount=4)
+      self.inlet, self.asic = self.model.temps
+      zone = FanZone('test', self.model.temps, self.model.fans)
+      self.controller = FanZoneController(zone, hysteresis=5, rampUp=10.,
+                                          rampDown=1.)
+
+   def update(self, inlet, asic, elapsed=1.):
+      return self.controller.update({self.inlet: inlet, self.asic: asic},
+                                    elapsed)
+
+   def testRamp(self):
+      self.assertEqual(self.update(50, 60), MIN_FAN_SPEED)
+      # halfway between 75 and 100 asks for 65% but ramps up by 10% per second
+      self.assertEqual(self.update(50, 87.5), MIN_FAN_SPEED + 10)
+      self.assertEqual(self.update(50, 87.5, elapsed=10.), 65)
+      self.assertEqual(self.update(50, 60, elapsed=4.), 61)
+
+   def testHysteresis(self):
+      self.assertEqual(self.update(50, 87.5), 65)
+      self.assertEqual(self.update(50, 86), 65)
+      self.assertEqual(self.update(50, 80, elapsed=2.), 63)
+
+   def testUnreadableSensors(self):
+      self.assertEqual(self.update(None, 60), MIN_FAN_SPEED)
+      self.controller.speed = None
+      self.assertEqual(self.update(None, None), MAX_FAN_SPEED)
+
+   def testNoThresholds(self):
+      desc = SensorDesc(diode=0, name='board', position=Position.OTHER,
+                        target=0, overheat=0, critical=0)
+      temp = ThermalModel([desc], fanCount=1).temps[0]
+      controller = FanZoneController(FanZone('test', [temp], []))
+      self.assertEqual(controller.update({temp: 60}, 1.), MIN_FAN_SPEED)
+      controller.speed = None
+      self.assertEqual(controller.update({temp: None}, 1.), MIN_FAN_SPEED)
+
+   def testClosedLoop(self):
+      for _ in range(200):
+         self.model.step(5.)
+         speed = self.update(self.inlet.getTemperature(),
+                             self.asic.getTemperature(), elapsed=5.)
+         for fan in self.model.fans:
+            fan.setSpeed(speed)
+      # the fans settle between the bounds and keep the sensors cool enough
+      self.assertGreater(speed, MIN_FAN_SPEED)
+      self.assertLess(speed, MAX_FAN_SPEED)
+      for temp in self.model.temps:
+         self.assertLess(temp.getTemperature(), temp.getDesc().overheat)
+
 if __name__ == '__main__':
    unittest.main()
@@ -1,12 +1,20 @@
 from __future__ import absolute_import, division, print_function
 
 import os
+import shutil
 import tempfile
+import threading
 from struct import pack, unpack
 
 from ...tests.testing import unittest
 
-from ..utils import FileResource, MmapResource, ResourceAccessor
+from ..utils import (
+   FileResource,
+   FileWaiter,
+   MmapResource,
+   ResourceAccessor,
+   waitFilesReady,
+)
 
 class ResourceTestBase(object):
    class TestClass(unittest.TestCase):
@@ -119,5 +127,59 @@ class FileResourceTest(ResourceTestBase.TestClass):
 class MmapResourceTest(ResourceTestBase.TestClass):
    CLASS_TO_TEST = MmapResource
 
+class FileWaiterTest(unittest.TestCase):
+   def setUp(self):
+      self.tempDir = tempfile.mkdtemp(prefix='unittest-arista-waiter-')
+
+   def tearDown(self):
+      shutil.rmtree(self.tempDir)
+
+   def _createLater(self, *parts):
+      def create():
+         path = self.tempDir
+         for part in parts[:-1]:
+            path = os.path.join(path, part)
+            os.mkdir(path)
+         with open(os.path.join(path, parts[-1]), 'w'):
+            pass
+      timer = threading.Timer(0.05, create)
+      timer.start()
+      self.addCleanup(timer.join)
+
+   def testExistingFile(self):
+      path = os.path.join(self.tempDir, 'ready')
+      with open(path, 'w'):
+         pass
+      self.assertTrue(FileWaiter(path, 1).waitFileReady())
+
+   def testNoFile(self):
+      self.assertFalse(FileWaiter().waitFileReady())
+
+   def testTimeout(self):
+      path = os.path.join(self.tempDir, 'missing')
+      self.assertFalse(FileWaiter(path, 0.1).waitFileReady())
+
+   def testFileCreated(self):
+      self._createLater('sub', 'ready')
+      path = os.path.join(self.tempDir, 'sub', 'ready')
+      self.assertTrue(FileWaiter(path, 5).waitFileReady())
+
+   def testPatternCreated(self):
+      self._createLater('hwmon', 'hwmon3')
+      waiter = FileWaiter((self.tempDir, 'hwmon', r'hwmon\d'), 5)
+      self.assertEqual(waiter.watchPath(), os.path.join(self.tempDir, 'hwmon'))
+      self.assertTrue(waiter.waitFileReady())
+
+   def testMultipleFiles(self):
+      self._createLater('a')
+      self._createLater('b')
+      waiters = [
+         FileWaiter(os.path.join(self.tempDir, 'a'), 5),
+         FileWaiter(os.path.join(self.tempDir, 'b'), 5),
+      ]
+      self.assertTrue(waitFilesReady(waiters))
+      waiters.append(FileWaiter(os.path.join(self.tempDir, 'c'), 0.1))
+      self.assertFalse(waitFilesReady(waiters, timeout=0.1))
+
 if __name__ == '__main__':
    unittest.main()
@@ -1,26 +1,182 @@
 from __future__ import absolute_import, division, print_function
 
+import math
+
+from array import array
+
+try:
+   import numpy
+except ImportError:
+   numpy = None
+
 MIN_FAN_SPEED = 30
 MAX_FAN_SPEED = 100
 
+# speed decreases smaller than this are ignored to avoid oscillations
+FAN_HYSTERESIS = 5
+# maximum speed change in percent per second
+FAN_RAMP_UP = 20.
+FAN_RAMP_DOWN = 2.
+
+NAN = float('nan')
+
+# width of the ramp of sensors whose target is not below their max temperature
+SENSOR_STEP = 1e-3
+
+def _floats(values):
+   return [NAN if v is None else float(v) for v in values]
+
+class SensorArray(object):
+   '''Thresholds and values of a group of sensors stored in flat arrays
+
+   The fan speed needed by each sensor is linear between the halfway and the
+   max temperatures, the speed of the group is evaluated in a single pass
+   over the arrays instead of going through the descriptions of each sensor.
+   Sensors without valid thresholds or value are NaN and ignored. NumPy is
+   used when available.
+   '''
+   def __init__(self, descs):
+      halfways = []
+      scales = []
+      for desc in descs:
+         maxTemp = min(desc.overheat, desc.critical)
+         if not int(desc.target) or not int(maxTemp):
+            halfways.append(NAN)
+            scales.append(NAN)
+            continue
+         if desc.target < maxTemp:
+            halfway = (desc.target + maxTemp) / 2
+         else:
+            # no room for a ramp, the speed steps to the max at maxTemp
+            halfway = maxTemp - SENSOR_STEP
+         halfways.append(halfway)
+         scales.append((MAX_FAN_SPEED - MIN_FAN_SPEED) / (maxTemp - halfway))
+      self.size = len(halfways)
+      # sensors which can contribute to the fan speed once read
+      self.usable = sum(1 for h in halfways if not math.isnan(h))
+      self.halfways = self._array(halfways)
+      self.scales = self._array(scales)
+      self.overheats = self._array(d.overheat for d in descs)
+      self.criticals = self._array(d.critical for d in descs)
+      self.values = self._array([NAN] * self.size)
+
+   @staticmethod
+   def _array(values):
+      if numpy is not None:
+         return numpy.array(list(values), dtype=float)
+      return array('d', values)
+
+   def update(self, values):
+      '''Set the values read for each sensor, None when not available'''
+      self.values[:] = self._array(_floats(values))
+
+   def fanSpeed(self):
+      '''Return the speed needed by the group, None without any valid sensor'''
+      if numpy is not None:
+         scaled = (self.values - self.halfways) * self.scales
+         scaled = scaled[~numpy.isnan(scaled)]
+         if not scaled.size:
+            return None
+         highest = float(scaled.max())
+      else:
+         scaled = [(v - h) * s for v, h, s in
+                   zip(self.values, self.halfways, self.scales)]
+         scaled = [x for x in scaled if not math.isnan(x)]
+         if not scaled:
+            return None
+         highest = max(scaled)
+      return min(MIN_FAN_SPEED + max(highest, 0.), MAX_FAN_SPEED)
+
+   def _above(self, thresholds):
+      if numpy is not None:
+         return (self.values > thresholds).tolist()
+      return [v > t for v, t in zip(self.values, thresholds)]
+
+   def overheat(self):
+      return self._above(self.overheats)
+
+   def critical(self):
+      return self._above(self.criticals)
+
+_sensorArrayCache = (None, None)
+
+def _getSensorArray(sensors):
+   # the thermal policy evaluates the same sensors every time
+   global _sensorArrayCache
+   key, sensorArray = _sensorArrayCache
+   if key != sensors:
+      sensorArray = SensorArray([s.get_inventory_object().getDesc()
+                                 for s in sensors])
+      _sensorArrayCache = (sensors, sensorArray)
+   return sensorArray
+
 def sensorsToFanSpeed(sensors):
-   targetFanSpeed = MIN_FAN_SPEED
-   for sensor in sensors:
-      if not sensor.get_presence():
-         continue
-      desc = sensor.get_inventory_object().getDesc()
-      maxTemp = min(desc.overheat, desc.critical)
-      if not int(desc.target) or not int(maxTemp):
-         continue
-      halfwayTemp = (desc.target + maxTemp) / 2
-      temp = sensor.get_temperature()
-      if temp < halfwayTemp:
-         continue
-      elif temp >= maxTemp:
-         targetFanSpeed = MAX_FAN_SPEED
-         continue
-      newFanSpeed = (temp - halfwayTemp) / (maxTemp - halfwayTemp) * \
-                    (MAX_FAN_SPEED - MIN_FAN_SPEED) + \
-                    MIN_FAN_SPEED
-      targetFanSpeed = max(targetFanSpeed, newFanSpeed)
+   sensors = tuple(sensors)
+   sensorArray = _getSensorArray(sensors)
+   sensorArray.update(s.get_temperature() if s.get_presence() else None
+                      for s in sensors)
+   targetFanSpeed = sensorArray.fanSpeed()
+   if targetFanSpeed is None:
+      return MIN_FAN_SPEED
    return targetFanSpeed
+
+class FanZone(object):
+   '''Fans cooling a set of temperature sensors'''
+   def __init__(self, name, temps, fans):
+      self.name = name
+      self.temps = temps
+      self.fans = fans
+
+   def __str__(self):
+      return 'FanZone(%s)' % self.name
+
+def _hasThresholds(temp):
+   try:
+      return temp.getDesc() is not None
+   except NotImplementedError:
+      return False
+
+def getFanZones(inventory):
+   # the platform descriptions don't describe the airflow, all the fans of a
+   # system are driven by all of its sensors
+   temps = [temp for temp in inventory.getTemps() if _hasThresholds(temp)]
+   return [FanZone('system', temps, inventory.getFans())]
+
+class FanZoneController(object):
+   '''Compute the speed of a zone from the temperatures of its sensors
+
+   Small decreases are ignored and the speed moves by at most the ramp rates
+   so that the fans don't oscillate around a threshold.
+   '''
+   def __init__(self, zone, hysteresis=FAN_HYSTERESIS, rampUp=FAN_RAMP_UP,
+                rampDown=FAN_RAMP_DOWN):
+      self.zone = zone
+      self.sensors = SensorArray([temp.getDesc() for temp in zone.temps])
+      self.hysteresis = hysteresis
+      self.rampUp = rampUp
+      self.rampDown = rampDown
+      self.speed = None
+
+   def targetSpeed(self, temperatures):
+      self.sensors.update(temperatures.get(temp) for temp in self.zone.temps)
+      targetFanSpeed = self.sensors.fanSpeed()
+      if targetFanSpeed is not None:
+         return targetFanSpeed
+      if self.sensors.usable:
+         # cooling blind, none of the sensors with thresholds could be read
+         return MAX_FAN_SPEED
+      # no sensor of the zone has valid thresholds
+      return MIN_FAN_SPEED
+
+   def update(self, temperatures, elapsed):
+      '''Return the speed to apply given the temperature read for each sensor'''
+      target = self.targetSpeed(temperatures)
+      speed = self.speed
+      if speed is None:
+         speed = target
+      elif target > speed:
+         speed = min(target, speed + self.rampUp * elapsed)
+      elif speed - target >= self.hysteresis:
+         speed = max(target, speed - self.rampDown * elapsed)
+      self.speed = speed
+      return int(round(speed))
@@ -0,0 +1,96 @@
+from __future__ import absolute_import, division, print_function
+
+import math
+
+from ..inventory.fan import Fan
+from ..inventory.temp import Temp
+from ..libs.pwm import PwmChannel
+from .thermal_control import FanZone, MIN_FAN_SPEED
+
+class ThermalModel(object):
+   '''First order model of a chassis used to run the fan control in simulation
+
+   Each sensor settles at a temperature above the ambient one which is
+   inversely proportional to the airflow. Under the nominal load, sensors
+   reach their overheat threshold when the fans run at the minimum speed.
+   '''
+   def __init__(self, descs, fanCount, ambient=25., load=1., timeConstant=30.,
+                speed=MIN_FAN_SPEED):
+      self.ambient = ambient
+      self.load = load
+      self.timeConstant = timeConstant
+      self.fans = [SimulatedFan(self, i + 1, speed) for i in range(fanCount)]
+      self.temps = [SimulatedTemp(self, desc) for desc in descs]
+      for temp in self.temps:
+         temp.value = self.steadyTemperature(temp.desc)
+
+   def airflow(self):
+      if not self.fans:
+         return 0
+      return sum(fan.speed for fan in self.fans) / len(self.fans)
+
+   def steadyTemperature(self, desc):
+      rise = min(desc.overheat, desc.critical) - self.ambient
+      return self.ambient + self.load * rise * \
+             (MIN_FAN_SPEED + 20) / (self.airflow() + 20)
+
+   def step(self, elapsed):
+      factor = 1 - math.exp(-elapsed / self.timeConstant)
+      for temp in self.temps:
+         steady = self.steadyTemperature(temp.desc)
+         temp.value += (steady - temp.value) * factor
+
+   def getFanZones(self):
+      return [FanZone('simulated', self.temps, self.fans)]
+
+class SimulatedFan(Fan):
+   def __init__(self, model, fanId, speed):
+      self.model = model
+      self.fanId = fanId
+      self.speed = speed
+      self.writes = 0
+      self.pwmChannel = PwmChannel(self.getName(), self._write,
+                                   read=self.getSpeed)
+
+   def getId(self):
+      return self.fanId
+
+   def getName(self):
+      return 'fan%d' % self.fanId
+
+   def getPresence(self):
+      return True
+
+   def getStatus(self):
+      return True
+
+   def getSpeed(self):
+      return self.speed
+
+   def _write(self, speed):
+      self.writes += 1
+      self.speed = speed
+
+   def setSpeed(self, speed):
+      self.pwmChannel.write(speed)
+
+class SimulatedTemp(Temp):
+   def __init__(self, model, desc):
+      self.model = model
+      self.desc = desc
+      self.value = model.ambient
+
+   def getName(self):
+      return self.desc.name
+
+   def getDesc(self):
+      return self.desc
+
+   def getPresence(self):
+      return True
+
+   def getStatus(self):
+      return True
+
+   def getTemperature(self):
+      return self.value
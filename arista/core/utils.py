@@ -5,12 +5,15 @@ import os
 import re
 import time
 
-from datetime import datetime
 from functools import wraps
 from struct import pack, unpack
 
 from .log import getLogger
-from ..libs.python import isinteger
+from ..libs.inotify import IN_APPEAR, IN_ONLYDIR, Inotify, inotifySupported
+from ..libs.python import isinteger, monotonicRaw
+from ..libs import stats
+from ..libs.stats import measure
+from ..libs.trace import span
 
 logging = getLogger(__name__)
 
@@ -47,6 +50,9 @@ class HwApi(object):
 
 class ResourceAccessor(object):
    ''' Base abstraction for accessing resource like files '''
+
+   STATS_KIND = 'resource'
+
    def __init__(self, path):
       self.path_ = path
 
@@ -72,12 +78,20 @@ class ResourceAccessor(object):
       self.closeResource()
 
    def _doRead(self, addr, size, unpackFormat):
-      val = self.readResource(addr, size)
+      if stats.hwStats is None:
+         val = self.readResource(addr, size)
+      else:
+         with measure(self.STATS_KIND, 'read', self.path_, attr=addr):
+            val = self.readResource(addr, size)
       return unpack('<%s' % unpackFormat, val)[0]
 
    def _doWrite(self, addr, size, value, packFormat):
       packedVal = pack('<%s' % packFormat, value)
-      self.writeResource(addr, size, packedVal)
+      if stats.hwStats is None:
+         self.writeResource(addr, size, packedVal)
+         return
+      with measure(self.STATS_KIND, 'write', self.path_, attr=addr):
+         self.writeResource(addr, size, packedVal)
 
    def read32(self, addr):
       return self._doRead(addr, 4, 'L')
@@ -99,12 +113,19 @@ class ResourceAccessor(object):
 
 class MmapResource(ResourceAccessor):
    """Resource implementation for a directly-mapped memory region."""
+
+   STATS_KIND = 'mmap'
+
    def __init__(self, *args, **kwargs):
       super(MmapResource, self).__init__(*args, **kwargs)
       self.mmap_ = None
 
    def map(self):
       assert not self.mmap_, "Resource already mapped"
+      with span(self.path_, 'mmap'), measure(self.STATS_KIND, 'map', self.path_):
+         return self._map()
+
+   def _map(self):
 
       try:
          fd = os.open(self.path_, os.O_RDWR)
@@ -152,6 +173,9 @@ class MmapResource(ResourceAccessor):
 
 class FileResource(ResourceAccessor):
    ''' Resource implementation for a file base memory region. '''
+
+   STATS_KIND = 'file'
+
    def __init__(self, *args, **kwargs):
       super(FileResource, self).__init__(*args, **kwargs)
       self.file_ = None
@@ -159,7 +183,8 @@ class FileResource(ResourceAccessor):
    def openResource(self):
       assert not self.file_, 'Resource already opened'
       try:
-         self.file_ = open(self.path_, mode='rb+')
+         with measure(self.STATS_KIND, 'open', self.path_):
+            self.file_ = open(self.path_, mode='rb+')
       except IOError:
          logging.error("failed to open file %s", self.path_)
          return False
@@ -218,7 +243,7 @@ class Retrying:
          def __init__(self, interval, delay, maxAttempts):
             self.attempt = 0
 
-            self.startedAt_ = datetime.now()
+            self.startedAt_ = monotonicRaw()
             self.interval_ = interval
             self.delay_ = delay
             self.maxAttempts_ = maxAttempts
@@ -236,7 +261,7 @@ class Retrying:
 
          def isExpired(self):
             return self.interval_ and \
-               (datetime.now() - self.startedAt_).total_seconds() > self.interval_
+               monotonicRaw() - self.startedAt_ > self.interval_
 
       return Iterator(self.interval, self.delay, self.maxAttempts)
 
@@ -245,6 +270,10 @@ WAITFILE_HWMON = 'hwmon'
 # Depreciate this object if we want to wait on access instead of waiting at start
 # and potentially failing
 class FileWaiter(object):
+
+   POLL_DELAY = 0.005
+   POLL_MAX_DELAY = 0.05
+
    def __init__(self, waitFile=None, waitTimeout=None):
       self.waitFile = waitFile
       self.waitTimeout = float(waitTimeout) if waitTimeout else 1.0
@@ -252,18 +281,18 @@ class FileWaiter(object):
    def waitFileReady(self):
       if not self.waitFile:
          return False
+      return waitFilesReady([self], timeout=self.waitTimeout)
 
-      logging.debug('Waiting file %s.', self.waitFile)
-
-      for r in Retrying(interval=self.waitTimeout):
-         if self.fileExists():
-            return True
-         logging.debug('Waiting file %s attempt %d.', self.waitFile, r.attempt)
-
-      if not os.path.exists(self.waitFile):
-         logging.error('Waiting file %s failed.', self.waitFile)
-         return False
-      return True
+   def watchPath(self):
+      '''Deepest directory known in advance to contain the waited file'''
+      if isinstance(self.waitFile, str):
+         return os.path.dirname(self.waitFile) or '.'
+      path = self.waitFile[0]
+      for pattern in self.waitFile[1:-1]:
+         if re.escape(pattern) != pattern:
+            break
+         path = os.path.join(path, pattern)
+      return path
 
    def fileExists(self):
       if isinstance(self.waitFile, str):
@@ -292,6 +321,80 @@ class FileWaiter(object):
 
          return _findFile(self.waitFile[0], self.waitFile[1:])
 
+def _existingAncestor(path):
+   while not os.path.isdir(path):
+      parent = os.path.dirname(path)
+      if parent == path:
+         break
+      path = parent
+   return path
+
+def _watchPendingFiles(notifier, watches, waiters):
+   for waiter in waiters:
+      directory = _existingAncestor(waiter.watchPath())
+      if directory in watches:
+         continue
+      try:
+         watches[directory] = notifier.addWatch(directory, IN_APPEAR | IN_ONLYDIR)
+      except OSError as e:
+         logging.debug('Cannot watch %s: %s', directory, e)
+         watches[directory] = None
+
+def waitFilesReady(waiters, timeout=None):
+   '''Wait for all the FileWaiter objects at once
+
+   The wait is woken up by inotify events on the closest existing parent
+   directory of each file. Since filesystems like sysfs don't generate events
+   for kernel created entries, the existence is also polled with an increasing
+   delay.
+   '''
+   with span('files', 'wait', count=len(waiters)):
+      return _waitFilesReady(waiters, timeout)
+
+def _waitFilesReady(waiters, timeout):
+   pending = [w for w in waiters if w.waitFile]
+   if timeout is None:
+      timeout = max([w.waitTimeout for w in pending] or [0])
+   deadline = monotonicRaw() + timeout
+
+   notifier = None
+   if inotifySupported():
+      try:
+         notifier = Inotify()
+      except OSError as e:
+         logging.debug('inotify unavailable, polling files: %s', e)
+
+   watches = {}
+   delay = FileWaiter.POLL_DELAY
+   attempt = 0
+   try:
+      while True:
+         pending = [w for w in pending if not w.fileExists()]
+         if not pending:
+            return True
+
+         remaining = deadline - monotonicRaw()
+         if remaining <= 0:
+            break
+
+         attempt += 1
+         for waiter in pending:
+            logging.debug('Waiting file %s attempt %d.', waiter.waitFile, attempt)
+
+         if notifier is not None:
+            _watchPendingFiles(notifier, watches, pending)
+            notifier.read(timeout=min(delay, remaining))
+         else:
+            time.sleep(min(delay, remaining))
+         delay = min(delay * 2, FileWaiter.POLL_MAX_DELAY)
+   finally:
+      if notifier is not None:
+         notifier.close()
+
+   for waiter in pending:
+      logging.error('Waiting file %s failed.', waiter.waitFile)
+   return False
+
 class FileLock:
    def __init__(self, lock_file, auto_release=False):
       self.f = open(lock_file, 'w')
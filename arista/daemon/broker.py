@@ -0,0 +1,150 @@
+from __future__ import absolute_import, division, print_function
+
+import asyncio
+import json
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ..core.component.executor import setupBusKey
+from ..core.config import Config
+from ..core.daemon import registerDaemonFeature, DaemonFeature
+from ..core.log import getLogger
+from ..libs.broker import (
+   BROKER_METHODS,
+   BrokerError,
+   encodeResponse,
+   getBrokerKey,
+   iterBrokerObjects,
+)
+
+logging = getLogger(__name__)
+
+# reads of the same accessor within this delay share the same result
+BROKER_CACHE_TTL = 1.
+
+def getBusKey(obj):
+   '''Accesses to objects sharing a key are serialized'''
+   for holder in [obj, getattr(obj, 'driver', None)]:
+      if getattr(holder, 'addr', None) is not None:
+         return setupBusKey(holder)
+   return None
+
+class InventoryBroker(object):
+   '''Serve the inventory reads of the clients from the daemon platform
+
+   Reads run in one worker thread per bus so that a slow device only delays
+   the requests for its own bus. Concurrent requests for the same accessor
+   are merged and results are kept for BROKER_CACHE_TTL seconds.
+   '''
+   def __init__(self, inventory, loop, ttl=BROKER_CACHE_TTL):
+      self.inventory = inventory
+      self.loop = loop
+      self.ttl = ttl
+      self.objects = {}
+      self.executors = {}
+      self.cache = {}
+      self.pending = {}
+
+   def getObject(self, kind, key):
+      if kind not in BROKER_METHODS:
+         raise BrokerError('unknown inventory kind %s' % kind)
+      objects = self.objects.get(kind)
+      if objects is None or key not in objects:
+         # objects can be added to the inventory while the daemon runs
+         objects = self.objects[kind] = {
+            getBrokerKey(kind, obj, index): obj
+            for index, obj in enumerate(iterBrokerObjects(self.inventory, kind))
+         }
+      obj = objects.get(key)
+      if obj is None:
+         raise BrokerError('no %s matching %s' % (kind, key))
+      return obj
+
+   def getExecutor(self, obj):
+      key = getBusKey(obj)
+      executor = self.executors.get(key)
+      if executor is None:
+         executor = self.executors[key] = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='broker')
+      return executor
+
+   async def call(self, kind, key, method):
+      if method not in BROKER_METHODS.get(kind, []):
+         raise BrokerError('%s cannot be called on %s' % (method, kind))
+      cacheKey = (kind, key, method)
+      cached = self.cache.get(cacheKey)
+      if cached is not None and self.loop.time() - cached[0] < self.ttl:
+         return cached[1]
+
+      future = self.pending.get(cacheKey)
+      if future is None:
+         obj = self.getObject(kind, key)
+         future = self.loop.run_in_executor(self.getExecutor(obj),
+                                            getattr(obj, method))
+         self.pending[cacheKey] = future
+         future.add_done_callback(
+            lambda f, k=cacheKey: self._complete(k, f))
+      return await future
+
+   def _complete(self, cacheKey, future):
+      del self.pending[cacheKey]
+      if not future.cancelled() and future.exception() is None:
+         self.cache[cacheKey] = (self.loop.time(), future.result())
+
+   async def handle(self, reader, writer):
+      try:
+         while True:
+            line = await reader.readline()
+            if not line:
+               break
+            try:
+               request = json.loads(line.decode())
+               key = request['key']
+               if isinstance(key, list):
+                  key = tuple(key)
+               result = await self.call(request['kind'], key,
+                                        request['method'])
+            except Exception as e: # pylint: disable=broad-except
+               logging.debug('broker: request %s failed: %s', line, e)
+               writer.write(encodeResponse(error=e))
+            else:
+               writer.write(encodeResponse(result=result))
+            await writer.drain()
+      except (IOError, OSError) as e:
+         logging.debug('broker: client connection error: %s', e)
+      finally:
+         writer.close()
+
+   def close(self):
+      for executor in self.executors.values():
+         executor.shutdown(wait=False)
+
+@registerDaemonFeature()
+class BrokerDaemonFeature(DaemonFeature):
+
+   NAME = 'broker'
+
+   def __init__(self):
+      super(BrokerDaemonFeature, self).__init__()
+      self.broker = None
+      self.server = None
+
+   @classmethod
+   def runnable(cls, daemon):
+      return bool(Config().broker_socket)
+
+   def init(self):
+      self.broker = InventoryBroker(self.daemon.platform.getInventory(),
+                                    self.daemon.loop)
+      self.daemon.loop.create_task(self.serve(Config().broker_socket))
+
+   async def serve(self, path):
+      if os.path.exists(path):
+         os.remove(path)
+      dirPath = os.path.dirname(path)
+      if not os.path.isdir(dirPath):
+         os.makedirs(dirPath)
+      self.server = await asyncio.start_unix_server(self.broker.handle,
+                                                    path=path)
+      logging.info('broker: serving inventory reads on %s', path)
@@ -0,0 +1,119 @@
+from __future__ import absolute_import, division, print_function
+
+from ..core.config import Config
+from ..core.daemon import registerDaemonFeature, PollDaemonFeature
+from ..core.log import getLogger, DEBUG
+from ..core.thermal_control import FanZoneController, getFanZones
+from ..core.thermal_model import ThermalModel
+from ..core.utils import inSimulation
+from ..libs.python import monotonicRaw
+from ..libs.sampling import AdaptiveSampler, temperatureLimit
+
+logging = getLogger(__name__)
+
+FAN_CONTROL_INTERVAL = 5.
+
+def _read(temp, func):
+   try:
+      return func()
+   except Exception as e: # pylint: disable=broad-except
+      logging.debug('fancontrol: failed to read %s: %s', temp.getName(), e)
+      return None
+
+def readTemperatures(zones, sampler):
+   '''Read each sensor once, even when it belongs to several zones
+
+   The presence is checked at every poll, temperatures far from their
+   thresholds are not read at every poll.
+   '''
+   temperatures = {}
+   for zone in zones:
+      for temp in zone.temps:
+         if temp in temperatures:
+            continue
+         if not _read(temp, temp.getPresence):
+            sampler.reset(temp)
+            temperatures[temp] = None
+            continue
+         temperatures[temp] = sampler.sample(
+            'temps', temp, lambda t=temp: _read(t, t.getTemperature),
+            limit=temperatureLimit(temp))
+   return temperatures
+
+def createSimulationModel(inventory):
+   descs = []
+   for temp in inventory.getTemps():
+      try:
+         descs.append(temp.getDesc())
+      except NotImplementedError:
+         pass
+   return ThermalModel([d for d in descs if d is not None],
+                       max(len(inventory.getFans()), 1))
+
+@registerDaemonFeature()
+class FanControlDaemonFeature(PollDaemonFeature):
+   '''Drive the fans from the temperature sensors
+
+   This replaces the thermal control policy of SONiC and is therefore only
+   enabled by configuration. In simulation it drives a thermal model.
+   '''
+
+   NAME = 'fancontrol'
+   INTERVAL = FAN_CONTROL_INTERVAL
+
+   @classmethod
+   def runnable(cls, daemon):
+      return Config().fan_control or inSimulation()
+
+   def __init__(self):
+      super(FanControlDaemonFeature, self).__init__()
+      self.model = None
+      self.controllers = []
+      self.sampler = AdaptiveSampler(FAN_CONTROL_INTERVAL)
+      self.latency = None
+      self.maxLatency = 0.
+
+   def createControllers(self):
+      inventory = self.daemon.platform.getInventory()
+      if inSimulation():
+         self.model = createSimulationModel(inventory)
+         zones = self.model.getFanZones()
+      else:
+         zones = getFanZones(inventory)
+      self.controllers = [FanZoneController(zone) for zone in zones]
+
+   def init(self):
+      self.createControllers()
+      PollDaemonFeature.init(self)
+
+   def applySpeed(self, fan, speed):
+      # redundant writes are skipped by the pwm channel of the fan
+      try:
+         if not fan.getPresence():
+            return
+         fan.setSpeed(speed)
+      except Exception as e: # pylint: disable=broad-except
+         logging.error('fancontrol: failed to set %s speed to %d: %s',
+                       fan.getName(), speed, e)
+
+   def callback(self, elapsed):
+      if self.model is not None:
+         self.model.step(elapsed)
+
+      begin = monotonicRaw()
+      temperatures = readTemperatures((c.zone for c in self.controllers),
+                                      self.sampler)
+      decisions = [(c, c.update(temperatures, elapsed))
+                   for c in self.controllers]
+      self.latency = monotonicRaw() - begin
+      self.maxLatency = max(self.maxLatency, self.latency)
+
+      for controller, speed in decisions:
+         for fan in controller.zone.fans:
+            self.applySpeed(fan, speed)
+         if logging.isEnabledFor(DEBUG):
+            logging.debug('fancontrol: %s speed %d decided in %.1fms',
+                          controller.zone, speed, self.latency * 1000)
+
+      if self.latency > self.interval / 2:
+         logging.warning('fancontrol: decision took %.1fs', self.latency)
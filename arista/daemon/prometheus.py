@@ -0,0 +1,289 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+
+from collections import OrderedDict
+
+from ..core.config import Config
+from ..core.daemon import registerDaemonFeature, PollDaemonFeature
+from ..core.log import getLogger
+from ..inventory.xcvr import Xcvr
+from ..libs.pwm import getPwmStats
+from ..libs.python import monotonicRaw
+from ..libs.sampling import getSamplingStats
+from ..libs.stats import getHwStats
+from ..libs.xcvr import getXcvrEepromStats
+
+logging = getLogger(__name__)
+
+PROMETHEUS_INTERVAL = 30.
+PROMETHEUS_MAX_INTERVAL = 600.
+# collections stop reading the hardware past this delay
+PROMETHEUS_COLLECT_TIMEOUT = 5.
+# share of the interval the collection is allowed to take
+PROMETHEUS_COST_BUDGET = 0.05
+
+def escapeLabel(value):
+   return str(value).replace('\\', r'\\').replace('\n', r'\n') \
+                    .replace('"', r'\"')
+
+class MetricFamily(object):
+   def __init__(self, name, doc, kind):
+      self.name = name
+      self.doc = doc
+      self.kind = kind
+      self.samples = []
+
+   def render(self):
+      lines = [
+         '# HELP %s %s' % (self.name, self.doc),
+         '# TYPE %s %s' % (self.name, self.kind),
+      ]
+      for labels, value in self.samples:
+         if labels:
+            labels = '{%s}' % ','.join('%s="%s"' % (k, escapeLabel(v))
+                                       for k, v in labels)
+         lines.append('%s%s %s' % (self.name, labels or '', repr(float(value))))
+      return '\n'.join(lines)
+
+class MetricSet(object):
+   '''Samples grouped by metric in the prometheus text format'''
+   def __init__(self):
+      self.families = OrderedDict()
+
+   def add(self, name, doc, value, kind='gauge', **labels):
+      if value is None:
+         return
+      family = self.families.get(name)
+      if family is None:
+         family = self.families[name] = MetricFamily(name, doc, kind)
+      family.samples.append((sorted(labels.items()), value))
+
+   def render(self):
+      return ''.join(f.render() + '\n' for f in self.families.values())
+
+class CollectionTimeout(Exception):
+   pass
+
+class MetricCollector(object):
+   '''Read the inventory values exported, giving up past the deadline
+
+   Each read is checked against the deadline so that a slow device only
+   truncates the output instead of stalling the daemon.
+   '''
+   def __init__(self, platform, metrics, timeout=PROMETHEUS_COLLECT_TIMEOUT):
+      self.platform = platform
+      self.metrics = metrics
+      self.deadline = monotonicRaw() + timeout
+      self.errors = 0
+
+   def read(self, obj, method):
+      if monotonicRaw() > self.deadline:
+         raise CollectionTimeout()
+      func = getattr(obj, method, None)
+      if func is None:
+         return None
+      try:
+         return func()
+      except NotImplementedError:
+         return None
+      except Exception as e: # pylint: disable=broad-except
+         logging.debug('prometheus: failed to read %s.%s: %s', obj, method, e)
+         self.errors += 1
+         return None
+
+   def collectTemps(self, inventory):
+      # names are not unique, the index in the inventory tells the series
+      # apart like it identifies the records of the telemetry snapshot
+      add = self.metrics.add
+      for index, temp in enumerate(inventory.getTemps()):
+         name = temp.getName()
+         add('arista_temperature_celsius', 'Temperature of the sensor',
+             self.read(temp, 'getTemperature'), sensor=name, index=index)
+         add('arista_temperature_high_threshold_celsius',
+             'Alert threshold of the sensor',
+             self.read(temp, 'getHighThreshold'), sensor=name, index=index)
+         add('arista_temperature_critical_threshold_celsius',
+             'Critical threshold of the sensor',
+             self.read(temp, 'getHighCriticalThreshold'), sensor=name,
+             index=index)
+
+   def collectFans(self, inventory):
+      add = self.metrics.add
+      for index, fan in enumerate(inventory.getFans()):
+         name = fan.getName()
+         add('arista_fan_pwm_percent', 'Speed setting of the fan',
+             self.read(fan, 'getSpeed'), fan=name, index=index)
+         add('arista_fan_rpm', 'Measured speed of the fan',
+             self.read(fan, 'getRpm'), fan=name, index=index)
+         add('arista_fan_present', 'Presence of the fan',
+             self.read(fan, 'getPresence'), fan=name, index=index)
+         add('arista_fan_status', 'Fan without fault',
+             self.read(fan, 'getStatus'), fan=name, index=index)
+
+   def collectPsus(self, inventory):
+      add = self.metrics.add
+      for index, slot in enumerate(inventory.getPsuSlots()):
+         name = slot.getName()
+         add('arista_psu_present', 'Presence of the power supply',
+             self.read(slot, 'getPresence'), psu=name, index=index)
+         add('arista_psu_status', 'Power supply output is good',
+             self.read(slot, 'getStatus'), psu=name, index=index)
+
+   def collectXcvrs(self, inventory):
+      for xcvrId, xcvr in sorted(inventory.getXcvrs().items()):
+         self.metrics.add('arista_xcvr_present', 'Presence of the transceiver',
+                          self.read(xcvr, 'getPresence'), port=xcvrId,
+                          type=Xcvr.typeStr(xcvr.getType()))
+
+   def collectWatchdog(self, inventory):
+      status = self.read(inventory.getWatchdog(), 'status')
+      if not isinstance(status, dict):
+         return
+      self.metrics.add('arista_watchdog_enabled', 'Hardware watchdog is armed',
+                       status.get('enabled'))
+      # the scd counts the timeout in units of 10ms
+      timeout = status.get('timeout')
+      self.metrics.add('arista_watchdog_timeout_seconds',
+                       'Timeout of the hardware watchdog',
+                       timeout / 100. if timeout is not None else None)
+
+   def collectSeu(self):
+      syscpld = getattr(self.platform, 'syscpld', None)
+      if syscpld is not None:
+         self.metrics.add('arista_seu_error',
+                          'Single event upset detected by the system cpld',
+                          self.read(syscpld, 'hasSeuError'))
+
+   def collectBusStats(self):
+      # only available when the hardware accesses are counted
+      stats = getHwStats()
+      if stats is None:
+         return
+      buses = {}
+      for row in stats.rows():
+         if row['kind'] not in ['smbus', 'i2c'] or row['bus'] is None:
+            continue
+         count, errors = buses.get(row['bus'], (0, 0))
+         buses[row['bus']] = (count + row['count'], errors + row['errors'])
+      for bus, (count, errors) in sorted(buses.items()):
+         self.metrics.add('arista_i2c_transactions_total',
+                          'I2C transactions issued by the daemon', count,
+                          kind='counter', bus=bus)
+         self.metrics.add('arista_i2c_errors_total',
+                          'I2C transactions of the daemon which failed', errors,
+                          kind='counter', bus=bus)
+
+   def collectPwmStats(self):
+      stats = getPwmStats()
+      add = self.metrics.add
+      add('arista_fan_pwm_writes_total', 'Fan pwm values written',
+          stats['writes'], kind='counter')
+      add('arista_fan_pwm_writes_avoided_total',
+          'Fan pwm writes skipped as the value was already applied',
+          stats['avoided'], kind='counter')
+      add('arista_fan_pwm_drifts_total',
+          'Fan pwm values found changed when asserted again',
+          stats['drifts'], kind='counter')
+
+   def collectSamplingStats(self):
+      add = self.metrics.add
+      for kind, stats in sorted(getSamplingStats().items()):
+         add('arista_sampling_reads_total',
+             'Values read by the daemon polling', stats['reads'],
+             kind='counter', sensor_kind=kind)
+         add('arista_sampling_skipped_total',
+             'Reads saved as the values were not due yet', stats['skipped'],
+             kind='counter', sensor_kind=kind)
+
+   def collectXcvrEepromStats(self):
+      stats = getXcvrEepromStats()
+      add = self.metrics.add
+      add('arista_xcvr_eeprom_cache_hits_total',
+          'Transceiver eeprom reads served from the cache', stats['hits'],
+          kind='counter')
+      add('arista_xcvr_eeprom_cache_misses_total',
+          'Transceiver eeprom regions read and then cached', stats['misses'],
+          kind='counter')
+      add('arista_xcvr_eeprom_live_reads_total',
+          'Transceiver eeprom ranges always read from the module',
+          stats['live'], kind='counter')
+      add('arista_xcvr_eeprom_cache_invalidations_total',
+          'Transceiver eeprom caches dropped on a module change',
+          stats['invalidations'], kind='counter')
+
+   def collect(self):
+      '''Return False if the collection was cut short by the deadline'''
+      inventory = self.platform.getInventory()
+      try:
+         self.collectTemps(inventory)
+         self.collectFans(inventory)
+         self.collectPsus(inventory)
+         self.collectXcvrs(inventory)
+         self.collectWatchdog(inventory)
+         self.collectSeu()
+      except CollectionTimeout:
+         return False
+      finally:
+         self.collectPwmStats()
+         self.collectSamplingStats()
+         self.collectXcvrEepromStats()
+         self.collectBusStats()
+      return True
+
+def writeTextfile(path, data):
+   '''Replace the file at once, the node exporter never sees it partial'''
+   tmpPath = '%s.%d.tmp' % (path, os.getpid())
+   with open(tmpPath, 'w') as f:
+      f.write(data)
+   os.rename(tmpPath, path)
+
+def adaptInterval(interval, cost, base=PROMETHEUS_INTERVAL,
+                  budget=PROMETHEUS_COST_BUDGET,
+                  maxInterval=PROMETHEUS_MAX_INTERVAL):
+   '''Return the interval keeping the collection cost within the budget
+
+   The interval grows as soon as a collection overruns its share and comes
+   back towards the base one when collections get cheaper.
+   '''
+   needed = cost / budget
+   if needed > interval:
+      return min(needed, maxInterval)
+   if needed < interval / 2:
+      return max(needed, base)
+   return interval
+
+@registerDaemonFeature()
+class PrometheusDaemonFeature(PollDaemonFeature):
+
+   NAME = 'prometheus'
+   INTERVAL = PROMETHEUS_INTERVAL
+
+   @classmethod
+   def runnable(cls, daemon):
+      return bool(Config().prometheus_textfile)
+
+   def callback(self, elapsed):
+      begin = monotonicRaw()
+      metrics = MetricSet()
+      collector = MetricCollector(self.daemon.platform, metrics)
+      complete = collector.collect()
+      cost = monotonicRaw() - begin
+      if not complete:
+         logging.warning('prometheus: collection stopped after %.1fs', cost)
+
+      self.interval = adaptInterval(self.interval, cost)
+      add = metrics.add
+      add('arista_exporter_collection_seconds',
+          'Time spent reading the hardware', cost)
+      add('arista_exporter_collection_complete',
+          'All the metrics could be read before the deadline', complete)
+      add('arista_exporter_read_errors', 'Reads which failed', collector.errors)
+      add('arista_exporter_interval_seconds',
+          'Current interval between two collections', self.interval)
+
+      try:
+         writeTextfile(Config().prometheus_textfile, metrics.render())
+      except (IOError, OSError) as e:
+         logging.error('prometheus: failed to write %s: %s',
+                       Config().prometheus_textfile, e)
@@ -0,0 +1,25 @@
+from __future__ import absolute_import, division, print_function
+
+from ..core.daemon import registerDaemonFeature, PollDaemonFeature
+from ..core.log import getLogger
+from ..core.utils import StoredData
+from ..libs.stats import HW_STATS_FILE, hwStatsEnabled, saveHwStats
+
+logging = getLogger(__name__)
+
+@registerDaemonFeature()
+class HwStatsDaemonFeature(PollDaemonFeature):
+
+   NAME = 'stats'
+   INTERVAL = 60
+
+   @classmethod
+   def runnable(cls, daemon):
+      return hwStatsEnabled()
+
+   def callback(self, elapsed):
+      # the daemon never exits cleanly, publish its counters periodically
+      try:
+         saveHwStats(StoredData(HW_STATS_FILE).path, command='arista daemon')
+      except (IOError, OSError) as e:
+         logging.warning('failed to save the hardware access counters: %s', e)
@@ -0,0 +1,176 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+
+from ..core.daemon import registerDaemonFeature, PollDaemonFeature
+from ..core.log import getLogger
+from ..core.utils import StoredData
+from ..libs.history import (
+   HISTORY_FILE,
+   HISTORY_SYNC_INTERVAL,
+   PERSISTENT_HISTORY_FILE,
+   HistoryWriter,
+)
+from ..libs.python import monotonicRaw
+from ..libs.sampling import AdaptiveSampler, temperatureLimit
+from ..libs.telemetry import (
+   TELEMETRY_FILE,
+   TELEMETRY_INTERVAL,
+   TELEMETRY_MAX_AGE,
+   TelemetryRecord,
+   TelemetryWriter,
+)
+
+logging = getLogger(__name__)
+
+# sensors are sampled at most at this interval, the sampler decides which
+# ones need to be read at each poll
+TELEMETRY_POLL_INTERVAL = 1.
+# values are read again before readers consider their record outdated
+TELEMETRY_VALUE_MAX_INTERVAL = TELEMETRY_MAX_AGE - TELEMETRY_INTERVAL
+
+def _read(func):
+   try:
+      return func()
+   except Exception: # pylint: disable=broad-except
+      return None
+
+# reads return their time first, then the values of the record
+def _readState(item):
+   return monotonicRaw(), _read(item.getPresence), _read(item.getStatus)
+
+def _readTempValues(temp):
+   return (monotonicRaw(), _read(temp.getTemperature),
+           _read(temp.getHighThreshold), _read(temp.getHighCriticalThreshold))
+
+def _readFanValues(fan):
+   return monotonicRaw(), _read(fan.getSpeed), None, None
+
+def _sampledValue(values):
+   return values[1]
+
+def _readAll(kind, key, read, **kwargs):
+   return read()
+
+def readXcvrPresences(inventory):
+   '''Read the presence of the transceivers, in bulk where possible'''
+   presences = {}
+   for control in inventory.getXcvrControls():
+      try:
+         values = control.readRegisters()
+      except (IOError, OSError) as e:
+         logging.debug('telemetry: failed to read %s: %s', control, e)
+         continue
+      bitmap = control.getBitmap('present', values)
+      for xcvrId in values:
+         presences[xcvrId] = bool(bitmap & (1 << xcvrId))
+   for xcvrId, xcvr in inventory.getXcvrs().items():
+      if xcvrId in presences:
+         continue
+      presence = _read(xcvr.getPresence)
+      if presence is not None:
+         presences[xcvrId] = presence
+   return presences
+
+def collectTelemetry(inventory, sampler=None, stateSampler=None,
+                     xcvrSampler=None):
+   '''Read the values published in the telemetry snapshot
+
+   Presence and status are read by the state sampler, the values by the
+   other one. Values which are not due according to the samplers are the
+   ones previously read. Records carry the time of their oldest read.
+   '''
+   sample = sampler.sample if sampler is not None else _readAll
+   sampleState = stateSampler.sample if stateSampler is not None else _readAll
+   sampleXcvr = xcvrSampler.sample if xcvrSampler is not None else _readAll
+
+   def record(kind, index, item, read=None, limit=None):
+      stateTime, present, status = sampleState(
+         kind, item, lambda: _readState(item))
+      valuesTime, value, high, critical = stateTime, None, None, None
+      if read is not None:
+         valuesTime, value, high, critical = sample(
+            kind, item, read, value=_sampledValue, limit=limit)
+      return TelemetryRecord(kind, index, item.getName(), present, status,
+                             value, high, critical, min(stateTime, valuesTime))
+
+   records = []
+   for index, temp in enumerate(inventory.getTemps()):
+      records.append(record('temps', index, temp,
+                            lambda t=temp: _readTempValues(t),
+                            limit=temperatureLimit(temp)))
+   for index, fan in enumerate(inventory.getFans()):
+      records.append(record('fans', index, fan,
+                            lambda f=fan: _readFanValues(f)))
+   for index, slot in enumerate(inventory.getPsuSlots()):
+      records.append(record('psuSlots', index, slot))
+   xcvrs = sampleXcvr('xcvrs', inventory, lambda: readXcvrPresences(inventory))
+   return records, xcvrs
+
+def historySamples(records):
+   return [(r.kind, r.index, r.name, r.value) for r in records
+           if r.kind in ['temps', 'fans']]
+
+def openHistory():
+   '''Open the live history, restoring the copy saved before a reboot'''
+   path = StoredData(HISTORY_FILE).path
+   persistentPath = StoredData(PERSISTENT_HISTORY_FILE,
+                               lifespan='persistent').path
+   if not os.path.exists(path) and os.path.exists(persistentPath):
+      logging.info('telemetry: restoring the history from %s', persistentPath)
+      shutil.copyfile(persistentPath, path)
+   return HistoryWriter(path), persistentPath
+
+@registerDaemonFeature()
+class TelemetryDaemonFeature(PollDaemonFeature):
+
+   NAME = 'telemetry'
+   INTERVAL = TELEMETRY_POLL_INTERVAL
+
+   def __init__(self):
+      super(TelemetryDaemonFeature, self).__init__()
+      self.writer = None
+      self.sampler = AdaptiveSampler(
+         TELEMETRY_POLL_INTERVAL, maxInterval=TELEMETRY_VALUE_MAX_INTERVAL)
+      # presence and status changes have to be reported quickly, they are
+      # read at a fixed interval
+      self.stateSampler = AdaptiveSampler(TELEMETRY_INTERVAL,
+                                          maxInterval=TELEMETRY_INTERVAL)
+      self.xcvrSampler = AdaptiveSampler(TELEMETRY_INTERVAL,
+                                         maxInterval=TELEMETRY_INTERVAL)
+      self.history = None
+      self.persistentHistoryPath = None
+      self.nextHistorySync = None
+
+   def callback(self, elapsed):
+      if self.writer is None:
+         try:
+            self.writer = TelemetryWriter(StoredData(TELEMETRY_FILE).path)
+         except (IOError, OSError) as e:
+            logging.error('telemetry: cannot create the snapshot file: %s', e)
+            return
+      records, xcvrs = collectTelemetry(self.daemon.platform.getInventory(),
+                                        sampler=self.sampler,
+                                        stateSampler=self.stateSampler,
+                                        xcvrSampler=self.xcvrSampler)
+      self.writer.publish(records, xcvrs)
+      self.recordHistory(records)
+
+   def recordHistory(self, records):
+      if self.history is None:
+         try:
+            self.history, self.persistentHistoryPath = openHistory()
+         except (IOError, OSError) as e:
+            logging.error('telemetry: cannot open the history file: %s', e)
+            return
+         self.nextHistorySync = monotonicRaw() + HISTORY_SYNC_INTERVAL
+      self.history.append(historySamples(records))
+
+      if monotonicRaw() < self.nextHistorySync:
+         return
+      self.nextHistorySync = monotonicRaw() + HISTORY_SYNC_INTERVAL
+      try:
+         self.history.sync(self.persistentHistoryPath)
+      except (IOError, OSError) as e:
+         logging.error('telemetry: failed to save the history: %s', e)
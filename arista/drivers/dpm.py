@@ -1,7 +1,7 @@
 from ..core.driver import Driver
 from ..core.i2c_utils import I2cMsg
 from ..core.utils import inSimulation, SMBus
-from ..core.log import getLogger
+from ..core.log import DEBUG, getLogger
 
 logging = getLogger(__name__)
 
@@ -26,11 +26,20 @@ class UcdI2cDevDriver(Driver):
       self.bus.close()
 
    def dumpReg(self, name, data):
-      logging.debug('%s reg: %s', name, ' '.join('%02x' % s for s in data))
+      if logging.isEnabledFor(DEBUG):
+         logging.debug('%s reg: %s', name, ' '.join('%02x' % s for s in data))
 
-   def getBlock(self, reg):
-      size = self.bus.read_byte_data(self.addr.address, reg) + 1
-      data = self.busMsg.read_bytes(self.addr.address, [reg], size)
+   def getBlock(self, reg, size=None):
+      '''Read a block register, in a single transfer when its size is known
+
+      The size is only a hint, the register is read again if the device
+      reports a longer block.
+      '''
+      if size is None:
+         size = self.bus.read_byte_data(self.addr.address, reg)
+      data = self.busMsg.read_bytes(self.addr.address, [reg], size + 1)
+      if data[0] > size:
+         data = self.busMsg.read_bytes(self.addr.address, [reg], data[0] + 1)
       return data[1:data[0]+1]
 
    def setBlock(self, reg, data):
@@ -48,7 +57,8 @@ class UcdI2cDevDriver(Driver):
    def readFaults(self):
       if inSimulation():
          return [ 0 ] * self.registers.LOGGED_FAULTS_COUNT
-      res = self.getBlock(self.registers.LOGGED_FAULTS)
+      res = self.getBlock(self.registers.LOGGED_FAULTS,
+                          size=self.registers.LOGGED_FAULTS_COUNT)
       self.dumpReg('faults', res)
       return res
 
@@ -72,6 +82,10 @@ class UcdI2cDevDriver(Driver):
          return [ 0 ] * self.registers.LOGGED_FAULT_DETAIL_COUNT
       self.bus.write_word_data(self.addr.address,
                                self.registers.LOGGED_FAULT_DETAIL_INDEX, num)
-      res = self.getBlock(self.registers.LOGGED_FAULT_DETAIL)
+      res = self.getBlock(self.registers.LOGGED_FAULT_DETAIL,
+                          size=self.registers.LOGGED_FAULT_DETAIL_COUNT)
       self.dumpReg('fault %d' % num, res)
       return res
+
+   def getFaultDetails(self):
+      return [self.getFaultNum(i) for i in range(self.getFaultCount())]
@@ -1,8 +1,10 @@
 
-from contextlib import closing
+from contextlib import closing, contextmanager
 import os
 
 from ..core.driver import Driver
+from ..core.i2c_utils import I2cMsg
+from ..core.prefdl import PREFDL_READ_SIZE
 from ..core.utils import SMBus
 
 from .kernel import I2cKernelDriver
@@ -16,11 +18,34 @@ class EepromKernelDriver(I2cKernelDriver):
       with open(path, 'rb') as f:
          return bytearray(f.read())
 
+   @contextmanager
+   def stream(self):
+      '''File object over the eeprom, only the bytes consumed are read'''
+      path = os.path.join(self.getSysfsPath(), 'eeprom')
+      with open(path, 'rb', buffering=PREFDL_READ_SIZE) as f:
+         yield f
+
+class SeepromStream(object):
+   '''Sequential reader of an eeprom, fetching it in block transfers'''
+   def __init__(self, msg, addr, blockSize):
+      self.msg = msg
+      self.addr = addr
+      self.blockSize = blockSize
+      self.buf = bytearray()
+
+   def read(self, size):
+      while len(self.buf) < size:
+         self.buf.extend(self.msg.read_current(self.addr.address, self.blockSize))
+      data = bytes(self.buf[:size])
+      del self.buf[:size]
+      return data
+
 class SeepromI2cDevDriver(Driver):
 
    offset = 0
    length = 256
    header_size = 8
+   block_size = 32
 
    def __init__(self, addr=None, **kwargs):
       super(SeepromI2cDevDriver, self).__init__(**kwargs)
@@ -49,3 +74,12 @@ class SeepromI2cDevDriver(Driver):
          for _ in range(self.offset + self.header_size, length):
             data.append(bus.read_byte(self.addr.address))
          return data
+
+   @contextmanager
+   def stream(self):
+      '''File object over the prefdl, after the header, read by blocks'''
+      with I2cMsg(self.addr) as msg:
+         msg.write_bytes(self.addr.address, [0x00, 0x00])
+         f = SeepromStream(msg, self.addr, self.block_size)
+         f.read(self.header_size)
+         yield f
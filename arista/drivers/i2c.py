@@ -8,6 +8,9 @@ from ..core.driver import Driver, KernelDriver
 from ..core import utils
 from ..core.log import getLogger
 from ..core.utils import SMBus
+from ..libs.i2c import getI2cDeviceBatch
+from ..libs import stats
+from ..libs.stats import measure
 
 logging = getLogger(__name__)
 
@@ -16,6 +19,9 @@ def busNameToId(name):
    return int(name[4:])
 
 class I2cKernelDriver(Driver):
+
+   BATCH_SETUP = True
+
    def __init__(self, name=None, addr=None, waitFile=None, waitTimeout=None,
                 module=None, **kwargs):
       self.name = name
@@ -55,7 +61,10 @@ class I2cKernelDriver(Driver):
                     self.name, addr.bus, addr.address)
       if utils.inSimulation():
          return
-      if os.path.exists(devicePath):
+      batch = getI2cDeviceBatch()
+      if batch is not None:
+         batch.add(addr, self.name, waiter=self.fileWaiter)
+      elif os.path.exists(devicePath):
          logging.debug('i2c device %s already exists', devicePath)
       else:
          with open(path, 'w') as f:
@@ -63,6 +72,11 @@ class I2cKernelDriver(Driver):
          self.fileWaiter.waitFileReady()
       super(I2cKernelDriver, self).setup()
 
+   def getKernelModules(self):
+      if self.kernelDriver:
+         return self.kernelDriver.getKernelModules()
+      return []
+
    def clean(self):
       # i2c kernel devices are automatically cleaned when the module is removed
       if utils.inSimulation():
@@ -124,17 +138,29 @@ class I2cDevDriver(Driver):
       return True
 
    def read_byte_data(self, reg):
-      return self.bus.read_byte_data(self.addr.address, reg)
+      if stats.hwStats is None:
+         return self.bus.read_byte_data(self.addr.address, reg)
+      with measure('smbus', 'read_byte', self.addr, self.addr.bus, reg):
+         return self.bus.read_byte_data(self.addr.address, reg)
 
    def write_byte_data(self, reg, data):
-      return self.bus.write_byte_data(self.addr.address, reg, data)
+      if stats.hwStats is None:
+         return self.bus.write_byte_data(self.addr.address, reg, data)
+      with measure('smbus', 'write_byte', self.addr, self.addr.bus, reg):
+         return self.bus.write_byte_data(self.addr.address, reg, data)
 
-   def read_block_data(self, reg):
+   def _read_block_data(self, reg):
       if self.addr.supportSmbusBlock:
          return self.bus.read_block_data(self.addr.address, reg)
       data = self.bus.read_i2c_block_data(self.addr.address, reg)
       return data[1:data[0] + 1]
 
+   def read_block_data(self, reg):
+      if stats.hwStats is None:
+         return self._read_block_data(reg)
+      with measure('smbus', 'read_block', self.addr, self.addr.bus, reg):
+         return self._read_block_data(reg)
+
    def read_block_data_str(self, reg):
       return ''.join(chr(c) for c in self.read_block_data(reg))
 
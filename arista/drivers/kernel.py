@@ -11,6 +11,7 @@ from ..core.driver import (
 from ..core.log import getLogger
 from ..core.utils import inSimulation
 from ..core import utils
+from ..libs.i2c import getI2cDeviceBatch
 
 from .sysfs import (
    FanSysfsImpl,
@@ -41,6 +42,11 @@ class KernelDriver(Driver):
          return
       modprobe(self.module, self.margs)
 
+   def getKernelModules(self):
+      if self.PASSIVE or not self.module:
+         return []
+      return [(self.module, self.margs)]
+
    def clean(self):
       if self.PASSIVE:
          return
@@ -100,6 +106,7 @@ class KernelDriver(Driver):
 class I2cKernelDriver(KernelDriver):
 
    NAME = None
+   BATCH_SETUP = True
 
    def __init__(self, addr=None, name=None, **kwargs):
       super(I2cKernelDriver, self).__init__(**kwargs)
@@ -116,7 +123,10 @@ class I2cKernelDriver(KernelDriver):
                     self.name, self.addr.bus, self.addr.address)
       if inSimulation():
          return
-      if os.path.exists(devPath):
+      batch = getI2cDeviceBatch()
+      if batch is not None:
+         batch.add(self.addr, self.name)
+      elif os.path.exists(devPath):
          logging.debug('i2c device %s already exists', devPath)
       else:
          with open(path, 'w') as f:
@@ -61,7 +61,8 @@ class MicrosemiDriver(MicrosemiConsts, MicrosemiMRPC, MicrosemiGAS, Driver):
    def gasWait(self):
       def status():
          return self.read32(self.GAS_STATUS)
-      waitFor(lambda: (status() == self.GAS_DONE))
+      waitFor(lambda: (status() == self.GAS_DONE), "microsemi GAS completion",
+              delay=0.001)
       return self.read32(self.GAS_RETURNVALUE)
 
    def doGas(self, argument, cmd):
@@ -123,7 +123,8 @@ class PciSwitchPortDriver(Driver):
       # We need to wait for the port to disapear. If we don't and the kernel is not
       # done processing the link down event, proceeding with things like turning off
       # power, may generate PCI error.
-      waitFor(lambda: not self.upstreamPortExists())
+      waitFor(lambda: not self.upstreamPortExists(),
+              "upstream port %s to disappear" % self.upstreamAddr)
 
 class PciKernelDriver(KernelDriver):
    def __init__(self, addr=None, registerCls=None, **kwargs):
@@ -2,7 +2,7 @@ from contextlib import closing
 
 from ..core.i2c_utils import I2cMsg
 from ..core.driver import Driver
-from ..core.log import getLogger
+from ..core.log import DEBUG, getLogger
 
 logging = getLogger(__name__)
 
@@ -255,24 +255,28 @@ class PlxPexI2cDev(object):
 
    def _read(self, order, addr):
       cmd = self.addrmap.command(PEX_I2C_RD, order, addr)
-      logging.debug("%s._read(%d, %#x): %s",
-                    self, order, addr, cmd)
+      debug = logging.isEnabledFor(DEBUG)
+      if debug:
+         logging.debug("%s._read(%d, %#x): %s",
+                       self, order, addr, cmd)
       data = self.bus.read_bytes(self.devId, cmd, 4)
-      logging.debug("%s.read_bytes(%#x, [%s], 4) = [%s]",
-                    self.bus, self.devId,
-                    ', '.join(["%#x" % c for c in cmd]),
-                    ', '.join(["%#x" % d for d in data]))
+      if debug:
+         logging.debug("%s.read_bytes(%#x, [%s], 4) = [%s]",
+                       self.bus, self.devId,
+                       ', '.join(["%#x" % c for c in cmd]),
+                       ', '.join(["%#x" % d for d in data]))
       return cmd.rdval(data)
 
    def _write(self, order, addr, val):
       cmd = self.addrmap.command(PEX_I2C_WR, order, addr)
-      logging.debug("%s._write(%d, %#x, %#x): %s",
-                    self, order, addr, val, cmd)
       data = cmd.wrdata(val)
-      logging.debug("%s.write_bytes(%#x, [%s] + [%s])",
-                    self.bus, self.devId,
-                    ', '.join(["%#x" % c for c in cmd]),
-                    ', '.join(["%#x" % d for d in data]))
+      if logging.isEnabledFor(DEBUG):
+         logging.debug("%s._write(%d, %#x, %#x): %s",
+                       self, order, addr, val, cmd)
+         logging.debug("%s.write_bytes(%#x, [%s] + [%s])",
+                       self.bus, self.devId,
+                       ', '.join(["%#x" % c for c in cmd]),
+                       ', '.join(["%#x" % d for d in data]))
       self.bus.write_bytes(self.devId, list(cmd) + data)
 
    def read(self, addr):
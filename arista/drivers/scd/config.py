@@ -0,0 +1,127 @@
+from __future__ import absolute_import, division, print_function
+
+from collections import OrderedDict, namedtuple
+
+from ...core.log import getLogger
+
+logging = getLogger(__name__)
+
+class ScdConfigError(Exception):
+   pass
+
+# addr is the register of the object, ident what the kernel identifies it by
+ScdObject = namedtuple('ScdObject', ['kind', 'addr', 'bit', 'ident', 'line'])
+
+BIT_KINDS = ['reset', 'gpio']
+
+class ScdConfig(object):
+   '''Canonical list of the SCD objects and smbus tweaks of a platform'''
+   def __init__(self, objects=None, tweaks=None):
+      self.objects = objects or []
+      self.tweaks = tweaks or []
+
+   def tweakLines(self):
+      '''Lines of the smbus tweaks, once the i2c offset of the scd is known
+
+      The tweaks are addressed by global bus number, which is only known
+      after the kernel registered the smbus masters of the scd.
+      '''
+      return list(OrderedDict((tweak, None)
+                              for tweak in iterScdTweaks(self.tweaks)))
+
+def iterScdObjects(scd):
+   for addr, info in scd.smbusMasters.items():
+      yield ScdObject('smbus_master', addr, None, ('smbus_master', info['id']),
+                      "smbus_master %#x %d %d" % (addr, info['id'], info['bus']))
+
+   for addr, info in scd.mdioMasters.items():
+      yield ScdObject('mdio_master', addr, None, ('mdio_master', info['id']),
+                      "mdio_master %#x %d %d %d" % (addr, info['id'], info['bus'],
+                                                    info['speed']))
+
+   for mdio in scd.mdios:
+      yield ScdObject('mdio_device', None, None,
+                      ('mdio_device', mdio.master, mdio.bus, mdio.id),
+                      "mdio_device %d %d %d %d %d %d" % (
+                         mdio.master, mdio.bus, mdio.id, mdio.portAddr,
+                         mdio.deviceAddr, mdio.clause))
+
+   for addr, info in scd.uartPorts.items():
+      yield ScdObject('uart', addr, None, ('uart', info['id']),
+                      "uart %#x %d" % (addr, info['id']))
+
+   for addr, platform, num in scd.fanGroups:
+      yield ScdObject('fan_group', addr, None, ('fan_group', addr),
+                      "fan_group %#x %u %u" % (addr, platform, num))
+
+   for addr, name in scd.leds:
+      yield ScdObject('led', addr, None, ('led', name),
+                      "led %#x %s" % (addr, name))
+
+   for kind, xcvrs in [('osfp', scd.osfps), ('qsfp', scd.qsfps),
+                       ('sfp', scd.sfps)]:
+      for addr, xcvrId in xcvrs:
+         yield ScdObject(kind, addr, None, (kind, xcvrId),
+                         "%s %#x %u" % (kind, addr, xcvrId))
+
+   # resets and gpios both create an attribute named after them
+   for reset in scd.resets:
+      yield ScdObject('reset', reset.addr, reset.bit, ('attr', reset.name),
+                      "reset %#x %s %u" % (reset.addr, reset.name, reset.bit))
+
+   for gpio in scd.gpios:
+      yield ScdObject('gpio', gpio.addr, gpio.bit, ('attr', gpio.name),
+                      "gpio %#x %s %u %d %d" % (gpio.addr, gpio.name, gpio.bit,
+                                                int(gpio.ro), int(gpio.activeLow)))
+
+def iterScdTweaks(tweaks):
+   for tweak in tweaks:
+      yield "%#x %#x %#x %#x %#x %#x" % (
+         tweak.addr.bus, tweak.addr.address, tweak.t, tweak.datr, tweak.datw,
+         tweak.ed)
+
+def compileScdConfig(scd):
+   '''Deduplicate and validate the objects declared on the scd
+
+   Identical declarations are merged. Two objects sharing an identifier, a
+   register (other than reset and gpio bits) or a register bit are reported
+   with an ScdConfigError.
+   '''
+   errors = []
+   objects = OrderedDict()
+   idents = {}
+   registers = {}
+   bits = {}
+   for obj in iterScdObjects(scd):
+      if obj.line in objects:
+         logging.debug('%s: duplicate scd object %s', scd, obj.line)
+         continue
+
+      other = idents.get(obj.ident)
+      if other is not None:
+         errors.append('%s and %s share the same identifier' % (other.line,
+                                                                obj.line))
+      idents[obj.ident] = obj
+
+      if obj.addr is not None:
+         other = registers.get(obj.addr)
+         if other is not None and (obj.kind not in BIT_KINDS or
+                                   other.kind not in BIT_KINDS):
+            errors.append('%s and %s overlap at %#x' % (other.line, obj.line,
+                                                        obj.addr))
+         registers.setdefault(obj.addr, obj)
+
+      if obj.bit is not None:
+         other = bits.get((obj.addr, obj.bit))
+         if other is not None:
+            errors.append('%s and %s use the same bit' % (other.line, obj.line))
+         bits[(obj.addr, obj.bit)] = obj
+
+      objects[obj.line] = obj
+
+   if errors:
+      for error in errors:
+         logging.error('%s: invalid scd configuration, %s', scd, error)
+      raise ScdConfigError('%s: %d invalid scd objects' % (scd, len(errors)))
+
+   return ScdConfig(objects=list(objects), tweaks=list(scd.tweaks))
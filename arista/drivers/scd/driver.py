@@ -10,10 +10,30 @@ from ...core.log import getLogger
 from ..i2c import I2cDevDriver
 from ..pci import PciKernelDriver
 from ..sysfs import FanSysfsImpl, LedSysfsImpl
+from .config import compileScdConfig
 
 logging = getLogger(__name__)
 
 SCD_WAIT_TIMEOUT = 5.
+SCD_STATE_FILE = 'scd-%s.json'
+# the network devices of the mdio devices have no parent
+NET_CLASS_PATH = '/sys/class/net'
+
+def _listDir(path):
+   try:
+      return set(os.listdir(path))
+   except OSError:
+      return set()
+
+def _hwmonNames(path):
+   names = set()
+   for hwmon in _listDir(path):
+      try:
+         with open(os.path.join(path, hwmon, 'name')) as f:
+            names.add(f.read().rstrip())
+      except IOError:
+         pass
+   return names
 
 _i2cBuses = OrderedDict()
 def getKernelI2cBuses(force=False):
@@ -41,27 +61,48 @@ def i2cBusFromName(name, idx=0, force=False):
 class ScdKernelDriver(PciKernelDriver):
    def __init__(self, scd=None, **kwargs):
       self.scd = scd
+      self.state = None
+      self.config = None
       super(ScdKernelDriver, self).__init__(module='scd-hwmon', **kwargs)
 
    def __str__(self):
       return '%s(addr=%s)' % (self.__class__.__name__, self.addr)
 
+   def _writeEntries(self, filename, entries):
+      path = self.addr.getSysfsPath()
+      data = '\n'.join(entries)
+      if utils.inSimulation():
+         utils.writeConfig(path, {filename: data})
+         return True
+      try:
+         with open(os.path.join(path, filename), 'w') as f:
+            f.write(data)
+      except IOError as e:
+         logging.error('%s: failed to write %d entries to %s: %s', self,
+                       len(entries), filename, e.strerror)
+         return False
+      return True
+
    def writeComponents(self, components, filename):
+      '''Write entries one page at a time, return the ones accepted'''
       PAGE_SIZE = 4096
+      written = []
       data = []
       data_size = 0
 
       for entry in components:
          entry_size = len(entry) + 1
          if entry_size + data_size > PAGE_SIZE:
-            utils.writeConfig(self.addr.getSysfsPath(), {filename: '\n'.join(data)})
+            if self._writeEntries(filename, data):
+               written.extend(data)
             data_size = 0
             data = []
          data.append(entry)
          data_size += entry_size
 
-      if data:
-         utils.writeConfig(self.addr.getSysfsPath(), {filename: '\n'.join(data)})
+      if data and self._writeEntries(filename, data):
+         written.extend(data)
+      return written
 
    def waitReadySim(self):
       logging.info('Waiting SCD %s.', os.path.join(self.addr.getSysfsPath(),
@@ -81,53 +122,122 @@ class ScdKernelDriver(PciKernelDriver):
       else:
          self.scd.i2cOffset = 2
 
+   def getDriverInstance(self):
+      '''Identify the current binding of the scd driver to the device
+
+      The sysfs attributes are recreated with a new inode every time the
+      driver probes the device, previously applied objects are lost then.
+      '''
+      if utils.inSimulation():
+         return None
+      try:
+         st = os.stat(os.path.join(self.addr.getSysfsPath(), 'new_object'))
+      except OSError:
+         return None
+      return '%d-%d' % (st.st_ino, int(st.st_ctime))
+
+   def _stateStore(self):
+      return utils.JsonStoredData(SCD_STATE_FILE % self.addr)
+
+   def readState(self):
+      '''What previous setups applied to the current driver instance'''
+      instance = self.getDriverInstance()
+      state = {
+         'instance': instance,
+         'objects': [],
+         'tweaks': [],
+         'locked': False,
+      }
+      if instance is None:
+         return state
+      stored = self._stateStore().readOrClear()
+      if isinstance(stored, dict) and stored.get('instance') == instance:
+         state.update(stored)
+      return state
+
+   def writeState(self, state):
+      if state['instance'] is None:
+         return
+      self._stateStore().write(state, mode='w')
+
+   def readLiveObjects(self, objects):
+      '''Objects with a sysfs footprint that already exist, found in one pass'''
+      if utils.inSimulation():
+         return set()
+      path = self.addr.getSysfsPath()
+      entries = _listDir(path)
+      if not entries:
+         return set()
+
+      # the devices created by the scd are listed lazily, by class
+      listed = {}
+      def listChildren(name, lister=_listDir):
+         childPath = os.path.join(path, name)
+         if childPath not in listed:
+            listed[childPath] = lister(childPath)
+         return listed[childPath]
+
+      adapters = None
+      present = set()
+      for obj in objects:
+         fields = obj.split()
+         kind = fields[0]
+         if kind == 'led':
+            found = fields[2] in listChildren('leds')
+         elif kind in ['osfp', 'qsfp', 'sfp']:
+            found = '%s%s_present' % (kind, fields[2]) in entries
+         elif kind in ['reset', 'gpio']:
+            found = fields[2] in entries
+         elif kind == 'smbus_master':
+            if adapters is None:
+               adapters = set(getKernelI2cBuses(force=True).values())
+            found = all('SCD %s SMBus master %s bus %d' % (self.addr, fields[2], bus)
+                        in adapters for bus in range(int(fields[3])))
+         elif kind == 'mdio_master':
+            buses = listChildren('mdio_bus')
+            found = all('scd-%s-mdio-%02x:%02x' % (self.addr, int(fields[2]),
+                                                   bus) in buses
+                        for bus in range(int(fields[3])))
+         elif kind == 'mdio_device':
+            found = 'mdio%s_%s_%s' % tuple(fields[1:4]) in \
+                    listChildren(NET_CLASS_PATH)
+         elif kind == 'uart':
+            found = 'ttySCD%s' % fields[2] in listChildren('tty')
+         elif kind == 'fan_group':
+            found = 'scd_fan_p%s' % fields[2] in \
+                    listChildren('hwmon', lister=_hwmonNames)
+         else:
+            found = False
+         if found:
+            present.add(obj)
+      return present
+
+   def getConfig(self):
+      if self.config is None:
+         self.config = compileScdConfig(self.scd)
+      return self.config
+
    def setup(self):
       super(ScdKernelDriver, self).setup()
 
       scd = self.scd
-      data = []
-
-      for addr, info in scd.smbusMasters.items():
-         data += ["smbus_master %#x %d %d" % (addr, info['id'], info['bus'])]
-
-      for addr, info in scd.mdioMasters.items():
-         data += ["mdio_master %#x %d %d %d" % (addr, info['id'], info['bus'],
-                                                info['speed'])]
-
-      for mdio in scd.mdios:
-         data += ["mdio_device %d %d %d %d %d %d" % \
-                  (mdio.master, mdio.bus, mdio.id, mdio.portAddr, mdio.deviceAddr, \
-                   mdio.clause)]
-
-      for addr, info in scd.uartPorts.items():
-         data += ["uart %#x %d" % (addr, info['id'])]
-
-      for addr, platform, num in scd.fanGroups:
-         data += ["fan_group %#x %u %u" % (addr, platform, num)]
-
-      for addr, name in scd.leds:
-         data += ["led %#x %s" % (addr, name)]
-
-      for addr, xcvrId in scd.osfps:
-         data += ["osfp %#x %u" % (addr, xcvrId)]
-
-      for addr, xcvrId in scd.qsfps:
-         data += ["qsfp %#x %u" % (addr, xcvrId)]
-
-      for addr, xcvrId in scd.sfps:
-         data += ["sfp %#x %u" % (addr, xcvrId)]
-
-      for reset in scd.resets:
-         data += ["reset %#x %s %u" % (reset.addr, reset.name, reset.bit)]
-
-      for gpio in scd.gpios:
-         data += ["gpio %#x %s %u %d %d" % (gpio.addr, gpio.name, gpio.bit,
-                                            int(gpio.ro), int(gpio.activeLow))]
+      config = self.getConfig()
+      objects = config.objects
 
       self.waitReady()
 
-      logging.debug('creating scd objects')
-      self.writeComponents(data, "new_object")
+      # only apply what is missing from the kernel, a warm setup is then a no-op
+      # and a partially failed one can be resumed
+      state = self.readState()
+      applied = set(state['objects']) | self.readLiveObjects(objects)
+      missing = [obj for obj in objects if obj not in applied]
+      if missing:
+         logging.debug('creating %d/%d scd objects', len(missing), len(objects))
+         written = self.writeComponents(missing, "new_object") or []
+         applied.update(written)
+      else:
+         logging.debug('scd objects already created')
+      state['objects'] = [obj for obj in objects if obj in applied]
 
       if scd.msiRearmOffset:
          path = self.addr.getSysfsPath()
@@ -137,21 +247,33 @@ class ScdKernelDriver(PciKernelDriver):
 
       self.refresh() # sync with kernel runtime state
 
-      tweaks = []
-      for tweak in scd.tweaks:
-         tweaks += ["%#x %#x %#x %#x %#x %#x" % (
-            tweak.addr.bus, tweak.addr.address, tweak.t, tweak.datr, tweak.datw,
-            tweak.ed)]
-
-      if tweaks:
+      tweaks = config.tweakLines()
+      appliedTweaks = set(state['tweaks'])
+      missing = [tweak for tweak in tweaks if tweak not in appliedTweaks]
+      if missing:
          logging.debug('applying scd tweaks')
-         self.writeComponents(tweaks, "smbus_tweaks")
+         written = self.writeComponents(missing, "smbus_tweaks") or []
+         appliedTweaks.update(written)
+      state['tweaks'] = [tweak for tweak in tweaks if tweak in appliedTweaks]
+
+      self.state = state
+      self.writeState(state)
+
+      # finish() locks the configuration, it must never be locked with entries
+      # missing, the next setup resumes from the saved state
+      failed = len(objects) + len(tweaks) - len(state['objects']) - \
+               len(state['tweaks'])
+      if failed:
+         raise IOError('%s: %d scd entries could not be applied' % (self, failed))
 
    def finish(self):
-      logging.debug('applying scd configuration')
+      state = self.state or self.readState()
       path = self.addr.getSysfsPath()
-      if Config().lock_scd_conf:
+      if Config().lock_scd_conf and not state['locked']:
+         logging.debug('applying scd configuration')
          utils.writeConfig(path, {'init_trigger': '1'})
+         state['locked'] = True
+         self.writeState(state)
       super(ScdKernelDriver, self).finish()
 
    def resetSim(self, value):
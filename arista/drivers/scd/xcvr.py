@@ -0,0 +1,164 @@
+import os
+
+from collections import namedtuple
+
+from ...core.log import getLogger
+from ...core.utils import inSimulation
+from ...inventory.xcvr import Xcvr
+
+logging = getLogger(__name__)
+
+XcvrRegister = namedtuple('XcvrRegister', ['addr', 'xcvrId', 'xcvrType'])
+
+XcvrBit = namedtuple('XcvrBit', ['bitpos', 'activeLow', 'types'])
+
+# layout of the control register of each transceiver, see src/scd-xcvr.c
+QSFP_TYPES = [Xcvr.QSFP, Xcvr.OSFP]
+XCVR_BITS = {
+   'present': XcvrBit(2, True, [Xcvr.SFP, Xcvr.QSFP, Xcvr.OSFP]),
+   'txdisable': XcvrBit(6, False, [Xcvr.SFP]),
+   'lpmode': XcvrBit(6, False, QSFP_TYPES),
+   'reset': XcvrBit(7, False, QSFP_TYPES),
+   'modsel': XcvrBit(8, True, QSFP_TYPES),
+}
+
+# sysfs hands at most a page to the kernel for each write
+XCVR_REGISTERS_WRITE_SIZE = 4096
+
+class ScdXcvrControl(object):
+   '''Bulk read of the control registers of the transceivers of a scd
+
+   The registers of all the transceivers are dumped by the xcvr_registers
+   attribute of the kernel driver, one file read instead of one sysfs file
+   per signal and transceiver. The kernel keeps track of the clear on read
+   bits while dumping them, the *_changed attributes still report the events.
+
+   Reads return bitmaps indexed by xcvrId with the bits of the active signals
+   set. Writes are sent to the same attribute as one mask and value per
+   register, the kernel does the read modify write of all of them under the
+   scd lock.
+   '''
+   def __init__(self, driver, registers=None):
+      self.driver = driver
+      self.registers = list(registers or [])
+
+   def __str__(self):
+      return '%s(%s)' % (self.__class__.__name__, self.driver)
+
+   def addXcvr(self, addr, xcvrId, xcvrType):
+      self.registers.append(XcvrRegister(addr, xcvrId, xcvrType))
+
+   def getXcvrIds(self):
+      return [r.xcvrId for r in self.registers]
+
+   def getRegistersPath(self):
+      return os.path.join(self.driver.getSysfsPath(), 'xcvr_registers')
+
+   def _registerName(self, register):
+      return '%s%d' % (Xcvr.typeStr(register.xcvrType), register.xcvrId)
+
+   def readRegisters(self):
+      '''Return the raw register value of each transceiver'''
+      if inSimulation():
+         return {r.xcvrId: 0 for r in self.registers}
+      with open(self.getRegistersPath()) as f:
+         dump = dict(line.split() for line in f if line.strip())
+      values = {}
+      for register in self.registers:
+         name = self._registerName(register)
+         if name in dump:
+            values[register.xcvrId] = int(dump[name], 16)
+      return values
+
+   def _supported(self, name):
+      types = XCVR_BITS[name].types
+      return [r for r in self.registers if r.xcvrType in types]
+
+   def getBitmap(self, name, values=None):
+      '''Return the bitmap of the transceivers with the signal active'''
+      bit = XCVR_BITS[name]
+      values = values if values is not None else self.readRegisters()
+      bitmap = 0
+      for register in self._supported(name):
+         if register.xcvrId not in values:
+            continue
+         active = (values[register.xcvrId] >> bit.bitpos) & 1
+         if active != bit.activeLow:
+            bitmap |= 1 << register.xcvrId
+      return bitmap
+
+   def getBitmaps(self, names=None):
+      '''Return the bitmaps of several signals from a single read'''
+      values = self.readRegisters()
+      return {name: self.getBitmap(name, values)
+              for name in (names or XCVR_BITS.keys())}
+
+   def getPresence(self):
+      return self.getBitmap('present')
+
+   def getLowPowerMode(self):
+      return self.getBitmap('lpmode')
+
+   def getModuleSelect(self):
+      return self.getBitmap('modsel')
+
+   def getReset(self):
+      return self.getBitmap('reset')
+
+   def getTxDisable(self):
+      return self.getBitmap('txdisable')
+
+   def _writeRegisters(self, lines):
+      chunks = ['']
+      for line in lines:
+         if len(chunks[-1]) + len(line) > XCVR_REGISTERS_WRITE_SIZE:
+            chunks.append('')
+         chunks[-1] += line
+      with open(self.getRegistersPath(), 'w') as f:
+         for chunk in chunks:
+            f.write(chunk)
+            f.flush()
+
+   def update(self, changes):
+      '''Apply {signal: {xcvrId: value}} with a single write to the kernel
+
+      Return the number of registers updated.
+      '''
+      updates = {}
+      for name, states in changes.items():
+         bit = XCVR_BITS[name]
+         supported = set(r.xcvrId for r in self._supported(name))
+         for xcvrId, value in states.items():
+            if xcvrId not in supported:
+               continue
+            mask, bits = updates.get(xcvrId, (0, 0))
+            mask |= 1 << bit.bitpos
+            if bool(value) != bit.activeLow:
+               bits |= 1 << bit.bitpos
+            updates[xcvrId] = (mask, bits)
+
+      lines = []
+      for register in self.registers:
+         if register.xcvrId not in updates:
+            continue
+         mask, bits = updates[register.xcvrId]
+         lines.append('%s %#x %#x\n' % (self._registerName(register), mask,
+                                        bits))
+      if not lines:
+         return 0
+      logging.debug('%s: updating %d transceiver registers', self, len(lines))
+      if not inSimulation():
+         self._writeRegisters(lines)
+      return len(lines)
+
+   def setLowPowerMode(self, states):
+      return self.update({'lpmode': states})
+
+   def setModuleSelect(self, states):
+      return self.update({'modsel': states})
+
+   def setReset(self, states):
+      return self.update({'reset': states})
+
+   def setTxDisable(self, states):
+      return self.update({'txdisable': states})
@@ -5,6 +5,9 @@ import os
 from ..core.driver import Driver
 from ..core import utils
 from ..core.log import getLogger
+from ..libs.pwm import getPwmChannel
+from ..libs import stats
+from ..libs.stats import measure
 
 from ..descs.led import LedColor
 
@@ -51,10 +54,24 @@ class SysfsEntry(object):
          f.write(value)
 
    def read(self):
-      return self._readConversion(self._read().rstrip())
+      if stats.hwStats is None:
+         value = self._read()
+      else:
+         with measure('sysfs', 'read', self.driver, attr=self.name):
+            value = self._read()
+      return self._readConversion(value.rstrip())
+
+   def readBackValue(self, value):
+      '''Value read once the given one is written, conversions may round it'''
+      return self._readConversion(self._writeConversion(value))
 
    def write(self, value):
-      self._write(self._writeConversion(value))
+      value = self._writeConversion(value)
+      if stats.hwStats is None:
+         self._write(value)
+         return
+      with measure('sysfs', 'write', self.driver, attr=self.name):
+         self._write(value)
 
 class SysfsEntryInt(SysfsEntry):
    def _readConversion(self, value):
@@ -133,6 +150,7 @@ class FanSysfsImpl(Fan):
       self.maxPwm = maxPwm
       self.led = led
       self.lastSpeed = None
+      self.pwmChannel = None
       self.pwm = SysfsEntryIntLinear(self, 'pwm%d' % self.fanId,
                                      fromRange=(0, maxPwm), toRange=(0, 100))
       self.input = SysfsEntryInt(self, 'fan%d_input' % self.fanId)
@@ -156,6 +174,9 @@ class FanSysfsImpl(Fan):
    def getSpeed(self):
       return self.pwm.read()
 
+   def getRpm(self):
+      return self.input.read()
+
    def getFault(self):
       if self.faultGpio is not None:
          if self.faultGpio.isActive():
@@ -173,7 +194,13 @@ class FanSysfsImpl(Fan):
       elif self.lastSpeed != self.MAX_FAN_SPEED and speed == self.MAX_FAN_SPEED:
          logging.warn("%s fan speed set to max", self.getName())
       self.lastSpeed = speed
-      return self.pwm.write(speed)
+      if self.pwmChannel is None:
+         # fans driven by the same pwm output share its channel
+         read = None if utils.inSimulation() else self.pwm.read
+         self.pwmChannel = getPwmChannel(self.pwm.entryPath, self.pwm.write,
+                                         read=read,
+                                         expect=self.pwm.readBackValue)
+      return self.pwmChannel.write(speed)
 
    def getPresence(self):
       if self.present.exists():
@@ -0,0 +1,72 @@
+from __future__ import absolute_import, division, print_function
+
+import zlib
+
+from ...tests.testing import unittest, patch
+
+from ...components.eeprom import PrefdlSeeprom
+from ...core.tests.prefdl import PREFDL3
+from ...core.types import I2cAddr
+from ...core.utils import StoredData
+
+def makeIdentityFirstPrefdl(count):
+   '''Prefdl v3 starting with its SKU and SID, followed by unknown fields'''
+   body = b'0003' + b'03000dDCS-1234AB-42' + b'0C0007Product'
+   body += b''.join(b'09%04X%s' % (12, b'FIELD%07d' % i) for i in range(count))
+   body += b'000000'
+   return body + b'%08X' % (zlib.crc32(body) & 0xffffffff)
+
+class FakeEepromMsg(object):
+   def __init__(self, data):
+      self.data = data
+      self.offset = 0
+      self.reads = 0
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *args):
+      pass
+
+   def write_bytes(self, addr, data):
+      self.offset = (data[0] << 8) | data[1]
+
+   def read_current(self, addr, datalen):
+      self.reads += 1
+      data = self.data[self.offset:self.offset + datalen]
+      self.offset += datalen
+      return list(bytearray(data.ljust(datalen, b'\xff')))
+
+class SeepromIdentityTest(unittest.TestCase):
+   def setUp(self):
+      patch.object(StoredData, 'maybeCreatePath').start()
+      patch.object(StoredData, 'exist', return_value=False).start()
+      self.addCleanup(patch.stopall)
+      self.eeprom = PrefdlSeeprom(addr=I2cAddr(1, 0x50))
+
+   def _identity(self, prefdl):
+      msg = FakeEepromMsg(b'\0' * 8 + prefdl)
+      with patch('arista.drivers.eeprom.I2cMsg', return_value=msg):
+         return msg, self.eeprom.identity()
+
+   def testIdentityStopsEarly(self):
+      msg, data = self._identity(makeIdentityFirstPrefdl(64))
+      self.assertEqual(data, {'SKU': 'DCS-1234AB-42', 'SID': 'Product'})
+      # header, version, SKU and SID fit in two blocks
+      self.assertEqual(msg.reads, 2)
+
+   def testIdentityLastFields(self):
+      msg, data = self._identity(PREFDL3)
+      self.assertEqual(data['SKU'], 'DCS-1234AB-42')
+      self.assertEqual(data['SID'], 'Product')
+      # the parsing stops after the SKU, before the end field and the crc
+      size = 8 + PREFDL3.index(b'DCS-1234AB-42') + len('DCS-1234AB-42')
+      self.assertEqual(msg.reads, -(-size // 32))
+
+   def testIdentityFallback(self):
+      with patch.object(self.eeprom, 'prefdl', return_value={'SKU': 'Full'}):
+         _, data = self._identity(b'\xff' * 64)
+      self.assertEqual(data, {'SKU': 'Full'})
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,282 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+
+from ...tests.testing import mock, unittest, patch
+
+from ...components.scd import Scd
+from ...core import utils
+from ...core.inventory import Inventory
+from ...core.types import PciAddr, ResetGpio
+from ...descs.gpio import GpioDesc
+from ...inventory.xcvr import Xcvr
+from ..kernel import KernelDriver
+from ..scd import driver, xcvr
+from ..scd.config import ScdConfigError, compileScdConfig
+from ..scd.driver import ScdKernelDriver
+from ..scd.xcvr import ScdXcvrControl
+
+class ScdSetupTest(unittest.TestCase):
+   def setUp(self):
+      self.root = tempfile.mkdtemp()
+      self.addCleanup(shutil.rmtree, self.root)
+      self.sysfs = os.path.join(self.root, 'pci')
+      os.mkdir(self.sysfs)
+      self.cache = os.path.join(self.root, 'cache')
+      os.mkdir(self.cache)
+
+      self.instance = 'instance-1'
+      self.failures = 0
+      self.writes = []
+      self.configWrites = {}
+      for target, attr, new in [
+            (utils, 'inSimulation', lambda: False),
+            (utils, 'TMPFS_MOUNT', self.cache),
+            (utils, 'writeConfig', self._writeConfig),
+            (PciAddr, 'getSysfsPath', lambda _: self.sysfs),
+            (KernelDriver, 'setup', lambda _: None),
+            (ScdKernelDriver, 'waitReady', lambda _: None),
+            (ScdKernelDriver, 'getDriverInstance', lambda _: self.instance),
+            (ScdKernelDriver, '_writeEntries', self._writeEntries),
+            (driver, 'i2cBusFromName', lambda *args, **kwargs: 2),
+            (driver, 'getKernelI2cBuses', lambda force=False: {}),
+         ]:
+         patcher = patch.object(target, attr, new)
+         patcher.start()
+         self.addCleanup(patcher.stop)
+
+   def _writeConfig(self, path, data):
+      self.configWrites.update(data)
+
+   def _writeEntries(self, filename, entries):
+      if self.failures:
+         self.failures -= 1
+         return False
+      self.writes.append((filename, list(entries)))
+      return True
+
+   def _newScd(self):
+      scd = Scd(PciAddr(bus=0x2), inventory=Inventory())
+      scd.addSmbusMaster(0x8000, 0)
+      scd.addLed(0x6050, 'status')
+      scd.addReset(ResetGpio(0x4000, 0, False, 'switch_chip_reset'))
+      scd.i2cAddr(0, 0x50)
+      return scd
+
+   def _setup(self):
+      self.writes = []
+      scd = self._newScd()
+      scd.driver.setup()
+      scd.driver.finish()
+      return dict(self.writes)
+
+   def testWarmSetup(self):
+      writes = self._setup()
+      self.assertEqual(len(writes['new_object']), 3)
+      self.assertEqual(len(writes['smbus_tweaks']), 1)
+      self.assertEqual(self._setup(), {})
+
+   def testResumeFailure(self):
+      self.failures = 1
+      with self.assertRaises(IOError):
+         self._setup()
+      writes = dict(self.writes)
+      self.assertNotIn('new_object', writes)
+      self.assertIn('smbus_tweaks', writes)
+      # the configuration is not locked with objects missing
+      self.assertNotIn('init_trigger', self.configWrites)
+      writes = self._setup()
+      self.assertEqual(len(writes['new_object']), 3)
+      self.assertNotIn('smbus_tweaks', writes)
+      self.assertIn('init_trigger', self.configWrites)
+
+   def testTweakBus(self):
+      scd = self._newScd()
+      scd.i2cAddr(3, 0x4c)
+      scd.driver.setup()
+      # the tweaks are addressed by the global bus, past the scd offset
+      self.assertEqual(scd.i2cOffset, 2)
+      self.assertEqual(dict(self.writes)['smbus_tweaks'], [
+         '0x2 0x50 0x1 0x3 0x3 0x0',
+         '0x5 0x4c 0x1 0x3 0x3 0x0',
+      ])
+
+   def testLiveObjects(self):
+      os.makedirs(os.path.join(self.sysfs, 'leds', 'status'))
+      open(os.path.join(self.sysfs, 'switch_chip_reset'), 'w').close()
+      writes = self._setup()
+      self.assertEqual(writes['new_object'], ['smbus_master 0x8000 0 8'])
+
+   def testLiveDevices(self):
+      net = os.path.join(self.root, 'net')
+      os.makedirs(os.path.join(net, 'mdio0_0_0'))
+      patch.object(driver, 'NET_CLASS_PATH', net).start()
+      self.addCleanup(patch.stopall)
+      os.makedirs(os.path.join(self.sysfs, 'mdio_bus',
+                               'scd-0000:02:00.0-mdio-00:00'))
+      os.makedirs(os.path.join(self.sysfs, 'tty', 'ttySCD0'))
+      os.makedirs(os.path.join(self.sysfs, 'hwmon', 'hwmon3'))
+      with open(os.path.join(self.sysfs, 'hwmon', 'hwmon3', 'name'), 'w') as f:
+         f.write('scd_fan_p1\n')
+      scd = self._newScd()
+      scd.addMdioMaster(0x9000, 0)
+      scd.addMdio(0, 0x10)
+      scd.addUartPort(0x9100, 0)
+      scd.addFanGroup(0x9200, 1, 4)
+      objects = scd.driver.getConfig().objects
+      # existing devices are not created again after an upgrade
+      self.assertEqual(scd.driver.readLiveObjects(objects), set([
+         'mdio_master 0x9000 0 1 %d' % scd.mdioMasters[0x9000]['speed'],
+         'mdio_device 0 0 0 16 1 2',
+         'uart 0x9100 0',
+         'fan_group 0x9200 1 4',
+      ]))
+
+   def testNewDriverInstance(self):
+      self._setup()
+      self.instance = 'instance-2'
+      writes = self._setup()
+      self.assertEqual(len(writes['new_object']), 3)
+
+   def testTweakDedup(self):
+      scd = self._newScd()
+      scd.i2cAddr(0, 0x50)
+      scd.i2cAddr(1, 0x50)
+      scd.i2cAddr(0, 0x50, datr=1)
+      self.assertEqual(len(scd.tweaks), 2)
+      self.assertEqual(scd.tweaks[0].datr, 1)
+
+   def testCompileDedup(self):
+      scd = self._newScd()
+      scd.addLed(0x6050, 'status')
+      scd.addGpio(GpioDesc("some_gpio", 0x4000, 1, ro=True))
+      compiled = compileScdConfig(scd)
+      self.assertEqual(len(compiled.objects), 4)
+      self.assertEqual(len(compiled.tweaks), 1)
+
+   def testCompileErrors(self):
+      for declare in [
+            lambda scd: scd.addLed(0x6050, 'other'),
+            lambda scd: scd.addLed(0x6060, 'status'),
+            lambda scd: scd.addReset(ResetGpio(0x4000, 0, False, 'other_reset')),
+            lambda scd: scd.addReset(ResetGpio(0x6050, 1, False, 'led_reset')),
+            lambda scd: scd.addSmbusMaster(0x8100, 0),
+         ]:
+         scd = self._newScd()
+         declare(scd)
+         with self.assertRaises(ScdConfigError):
+            compileScdConfig(scd)
+
+   def testResetOutXcvrs(self):
+      scd = self._newScd()
+      scd.xcvrControl.addXcvr(0xa010, 1, Xcvr.QSFP)
+      with patch.object(ScdXcvrControl, 'update', return_value=1) as update:
+         scd.resetOut()
+      update.assert_called_once_with({
+         'modsel': {1: True},
+         'txdisable': {1: False},
+         'lpmode': {1: False},
+      })
+
+   def testResetOutXcvrsFallback(self):
+      scd = self._newScd()
+      scd.xcvrControl.addXcvr(0xa010, 1, Xcvr.QSFP)
+      port = mock.Mock()
+      port.getLowPowerMode.return_value = True
+      scd.xcvrs = [port]
+      with patch.object(ScdXcvrControl, 'update', side_effect=IOError):
+         scd.resetOut()
+      port.setModuleSelect.assert_called_once_with(True)
+      port.setTxDisable.assert_called_once_with(False)
+      port.setLowPowerMode.assert_called_once_with(False)
+
+   def testConfigMemo(self):
+      scd = self._newScd()
+      with patch.object(driver, 'compileScdConfig',
+                        wraps=compileScdConfig) as compiler:
+         first = scd.driver.getConfig()
+         self.assertIs(scd.driver.getConfig(), first)
+         self.assertEqual(compiler.call_count, 1)
+
+class FakeScdDriver(object):
+   def __init__(self, sysfsPath):
+      self.sysfsPath = sysfsPath
+
+   def getSysfsPath(self):
+      return self.sysfsPath
+
+class ScdXcvrControlTest(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp()
+      self.addCleanup(shutil.rmtree, self.tmpdir)
+      patcher = patch.object(xcvr, 'inSimulation', return_value=False)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+      self.control = ScdXcvrControl(FakeScdDriver(self.tmpdir))
+      self.control.addXcvr(0xa010, 1, Xcvr.SFP)
+      self.control.addXcvr(0xa020, 2, Xcvr.QSFP)
+      self.control.addXcvr(0xa030, 3, Xcvr.OSFP)
+      # sfp 1 present, qsfp 2 absent in low power, osfp 3 present and selected
+      self._writeRegisters({'sfp1': 0x0, 'qsfp2': 0x144, 'osfp3': 0x0})
+
+   def _writeRegisters(self, registers):
+      with open(self.control.getRegistersPath(), 'w') as f:
+         for name, value in registers.items():
+            f.write('%s 0x%08x\n' % (name, value))
+
+   def testBitmaps(self):
+      self.assertEqual(self.control.getPresence(), (1 << 1) | (1 << 3))
+      self.assertEqual(self.control.getLowPowerMode(), 1 << 2)
+      self.assertEqual(self.control.getModuleSelect(), 1 << 3)
+      self.assertEqual(self.control.getTxDisable(), 0)
+      bitmaps = self.control.getBitmaps(['present', 'reset'])
+      self.assertEqual(bitmaps['reset'], 0)
+      self.assertEqual(bitmaps['present'], (1 << 1) | (1 << 3))
+
+   def testMissingRegister(self):
+      self._writeRegisters({'sfp1': 0x4})
+      values = self.control.readRegisters()
+      self.assertEqual(values, {1: 0x4})
+      self.assertEqual(self.control.getPresence(), 0)
+
+   def testMissingAttribute(self):
+      os.remove(self.control.getRegistersPath())
+      with self.assertRaises(IOError):
+         self.control.readRegisters()
+
+   def testUpdate(self):
+      written = self.control.update({
+         'modsel': {2: True, 3: True},
+         'txdisable': {1: False, 2: True},
+         'lpmode': {2: False, 3: False},
+      })
+      self.assertEqual(written, 3)
+      with open(self.control.getRegistersPath()) as f:
+         self.assertEqual(f.read().splitlines(), [
+            'sfp1 0x40 0x0',
+            'qsfp2 0x140 0x0',
+            'osfp3 0x140 0x0',
+         ])
+      self.assertEqual(self.control.setTxDisable({1: True}), 1)
+      with open(self.control.getRegistersPath()) as f:
+         self.assertEqual(f.read(), 'sfp1 0x40 0x40\n')
+      self.assertEqual(self.control.setReset({1: True}), 0)
+
+   def testUpdateChunks(self):
+      with patch.object(xcvr, 'XCVR_REGISTERS_WRITE_SIZE', 30), \
+           patch.object(xcvr, 'open', create=True) as fopen:
+         self.control.setLowPowerMode({2: True, 3: True})
+         self.control.update({'txdisable': {1: True}, 'lpmode': {2: False}})
+      writes = [c[0][0] for c in fopen.return_value.__enter__.return_value
+                                      .write.call_args_list]
+      # lines are never split across writes
+      self.assertEqual(writes, [
+         'qsfp2 0x40 0x40\n',
+         'osfp3 0x40 0x40\n',
+         'sfp1 0x40 0x40\nqsfp2 0x40 0x0\n',
+      ])
+
+if __name__ == '__main__':
+   unittest.main()
@@ -22,6 +22,10 @@ class Fan(InventoryInterface):
    def setSpeed(self, speed):
       raise NotImplementedError
 
+   @diagmethod('rpm', io=True)
+   def getRpm(self):
+      raise NotImplementedError
+
    @diagmethod('direction', io=True)
    def getDirection(self):
       raise NotImplementedError
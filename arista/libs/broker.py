@@ -0,0 +1,227 @@
+from __future__ import absolute_import, division, print_function
+
+import json
+import socket
+import threading
+
+from ..core.config import Config
+from ..core.log import getLogger
+from .python import monotonicRaw
+
+logging = getLogger(__name__)
+
+BROKER_TIMEOUT = 2.
+# a missing daemon is only looked for again after this delay
+BROKER_RETRY_DELAY = 30.
+
+# read-only accessors served by the daemon for each kind of inventory object
+BROKER_METHODS = {
+   'fans': ['getSpeed', 'getStatus', 'getPresence', 'getDirection', 'getFault'],
+   'fanSlots': ['getPresence', 'getDirection', 'getFault'],
+   'psuSlots': ['getPresence', 'getStatus'],
+   'temps': ['getTemperature', 'getPresence', 'getStatus', 'getLowThreshold',
+             'getHighThreshold', 'getLowCriticalThreshold',
+             'getHighCriticalThreshold'],
+   'xcvrs': ['getPresence', 'getLowPowerMode', 'getTxDisable'],
+}
+
+# exceptions raised by the daemon and raised again by the client
+BROKER_EXCEPTIONS = {
+   'IOError': IOError,
+   'OSError': OSError,
+   'ValueError': ValueError,
+   'NotImplementedError': NotImplementedError,
+}
+
+class BrokerError(Exception):
+   pass
+
+class BrokerUnavailable(BrokerError):
+   pass
+
+def getBrokerKey(kind, obj, index):
+   '''Identifier of an inventory object shared by the daemon and its clients
+
+   Objects are identified by their index in the inventory as names are not
+   unique. The name is part of the key so that an index pointing to another
+   object in the daemon, as lists like the fans depend on what each process
+   loaded, is rejected instead of served. Transceivers are identified by port.
+   '''
+   if kind == 'xcvrs':
+      return obj.xcvrId
+   return (index, obj.getName())
+
+def iterBrokerObjects(inventory, kind):
+   if kind == 'xcvrs':
+      return inventory.getXcvrs().values()
+   return {
+      'fans': inventory.getFans,
+      'fanSlots': inventory.getFanSlots,
+      'psuSlots': inventory.getPsuSlots,
+      'temps': inventory.getTemps,
+   }[kind]()
+
+def encodeRequest(kind, key, method):
+   return (json.dumps({'kind': kind, 'key': key, 'method': method}) +
+           '\n').encode()
+
+def encodeResponse(result=None, error=None):
+   if error is not None:
+      data = {'error': str(error), 'type': error.__class__.__name__}
+   else:
+      data = {'result': result}
+   return (json.dumps(data, default=str) + '\n').encode()
+
+def decodeResponse(line):
+   data = json.loads(line.decode())
+   if 'error' in data:
+      excCls = BROKER_EXCEPTIONS.get(data.get('type'), BrokerError)
+      raise excCls(data['error'])
+   return data.get('result')
+
+class BrokerClient(object):
+   '''Blocking client of the hardware access broker of arista daemon'''
+   def __init__(self, path=None, timeout=BROKER_TIMEOUT):
+      self.path = path or Config().broker_socket
+      self.timeout = timeout
+      self.sock = None
+      self.rfile = None
+      self.retryTime = None
+      self.lock = threading.Lock()
+
+   def _connect(self):
+      now = monotonicRaw()
+      if self.retryTime is not None and now < self.retryTime:
+         raise BrokerUnavailable('daemon unavailable')
+      sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      sock.settimeout(self.timeout)
+      try:
+         sock.connect(self.path)
+      except (IOError, OSError) as e:
+         sock.close()
+         self.retryTime = now + BROKER_RETRY_DELAY
+         logging.debug('hardware access broker unavailable: %s', e)
+         raise BrokerUnavailable(str(e))
+      self.retryTime = None
+      self.sock = sock
+      self.rfile = sock.makefile('rb')
+
+   def close(self):
+      if self.sock is not None:
+         self.rfile.close()
+         self.sock.close()
+         self.sock = None
+         self.rfile = None
+
+   def call(self, kind, key, method):
+      with self.lock:
+         if self.sock is None:
+            self._connect()
+         try:
+            self.sock.sendall(encodeRequest(kind, key, method))
+            line = self.rfile.readline()
+         except (IOError, OSError, socket.timeout) as e:
+            self.close()
+            raise BrokerUnavailable(str(e))
+         if not line:
+            self.close()
+            raise BrokerUnavailable('connection closed by the daemon')
+      return decodeResponse(line)
+
+class BrokeredObject(object):
+   '''Inventory object whose reads are served by the daemon when it runs'''
+   def __init__(self, obj, kind, client, index=None):
+      self._obj = obj
+      self._kind = kind
+      self._key = getBrokerKey(kind, obj, index)
+      self._client = client
+
+   def __getattr__(self, name):
+      attr = getattr(self._obj, name)
+      if name not in BROKER_METHODS[self._kind]:
+         return attr
+
+      def call(*args, **kwargs):
+         if args or kwargs:
+            return attr(*args, **kwargs)
+         try:
+            return self._client.call(self._kind, self._key, name)
+         except BrokerError as e:
+            if not isinstance(e, BrokerUnavailable):
+               logging.debug('broker: %s.%s of %s read locally: %s',
+                             self._kind, name, self._key, e)
+            return attr()
+      return call
+
+   def getInventoryObject(self):
+      return self._obj
+
+class BrokeredFanSlot(BrokeredObject):
+   '''Fan slot handing out the brokered objects of its fans'''
+   def __init__(self, obj, kind, client, index=None, inventory=None):
+      super(BrokeredFanSlot, self).__init__(obj, kind, client, index)
+      self._inventory = inventory
+
+   def getFans(self):
+      brokered = {id(fan.getInventoryObject()): fan
+                  for fan in self._inventory.getFans()}
+      return [brokered.get(id(fan), fan) for fan in self._obj.getFans()]
+
+class BrokeredInventory(object):
+   '''Inventory handing out objects which go through the daemon when it runs'''
+   def __init__(self, inventory, client=None):
+      self._inventory = inventory
+      self._client = client or BrokerClient()
+      self._objects = {}
+
+   def __getattr__(self, name):
+      return getattr(self._inventory, name)
+
+   def _wrap(self, kind, obj, index=None):
+      if obj is None:
+         return None
+      cacheKey = (id(obj), index)
+      wrapped = self._objects.get(cacheKey)
+      if wrapped is None or wrapped.getInventoryObject() is not obj:
+         if kind == 'fanSlots':
+            wrapped = BrokeredFanSlot(obj, kind, self._client, index, self)
+         else:
+            wrapped = BrokeredObject(obj, kind, self._client, index)
+         self._objects[cacheKey] = wrapped
+      return wrapped
+
+   def _wrapList(self, kind, objs):
+      return [self._wrap(kind, obj, i) for i, obj in enumerate(objs)]
+
+   def getXcvrs(self):
+      return {xcvrId: self._wrap('xcvrs', xcvr)
+              for xcvrId, xcvr in self._inventory.getXcvrs().items()}
+
+   def getXcvr(self, xcvrId):
+      return self._wrap('xcvrs', self._inventory.getXcvr(xcvrId))
+
+   def getPsuSlot(self, index):
+      return self.getPsuSlots()[index]
+
+   def getPsuSlots(self):
+      return self._wrapList('psuSlots', self._inventory.getPsuSlots())
+
+   def getFan(self, index):
+      return self.getFans()[index]
+
+   def getFans(self):
+      return self._wrapList('fans', self._inventory.getFans())
+
+   def getFanSlot(self, slotId):
+      return self.getFanSlots()[slotId]
+
+   def getFanSlots(self):
+      return self._wrapList('fanSlots', self._inventory.getFanSlots())
+
+   def getTemps(self):
+      return self._wrapList('temps', self._inventory.getTemps())
+
+def getBrokeredInventory(inventory):
+   if not Config().broker_socket:
+      return inventory
+   return BrokeredInventory(inventory)
@@ -0,0 +1,309 @@
+from __future__ import absolute_import, division, print_function
+
+import mmap
+import os
+import struct
+import time
+
+from collections import namedtuple
+
+from ..core import utils
+from ..core.log import getLogger
+
+logging = getLogger(__name__)
+
+HISTORY_FILE = 'history.bin'
+PERSISTENT_HISTORY_FILE = 'arista-history.bin'
+HISTORY_MAGIC = b'ARHS'
+HISTORY_VERSION = 2
+
+# resolution in seconds and number of buckets of each level, every sample is
+# aggregated in all of them
+HistoryLevel = namedtuple('HistoryLevel', ['name', 'resolution', 'size'])
+HISTORY_LEVELS = [
+   HistoryLevel('seconds', 5, 120),
+   HistoryLevel('minutes', 60, 240),
+   HistoryLevel('hours', 3600, 168),
+]
+
+HISTORY_MAX_SERIES = 256
+HISTORY_NAME_SIZE = 48
+HISTORY_KINDS = ['temps', 'fans']
+
+# the live file is on tmpfs, a copy is kept on flash for the post mortem of
+# a reboot and restored when the tmpfs one is missing
+HISTORY_SYNC_INTERVAL = 900
+
+# magic, version, series count, sequence
+HEADER = struct.Struct('<4sHHI4x')
+SEQ = struct.Struct('<I')
+SEQ_OFFSET = 8
+# kind, inventory index, name, head bucket of each level
+SERIES = struct.Struct('<BxH%ds%dH' % (HISTORY_NAME_SIZE, len(HISTORY_LEVELS)))
+# start time, sample count, min, max, sum
+BUCKET = struct.Struct('<IH2xfff')
+
+SERIES_BUCKETS = sum(level.size for level in HISTORY_LEVELS)
+SERIES_SIZE = SERIES_BUCKETS * BUCKET.size
+BUCKETS_OFFSET = HEADER.size + SERIES.size * HISTORY_MAX_SERIES
+HISTORY_SIZE = BUCKETS_OFFSET + SERIES_SIZE * HISTORY_MAX_SERIES
+
+HISTORY_READ_RETRIES = 100
+
+HistorySample = namedtuple('HistorySample', ['time', 'min', 'max', 'avg'])
+
+def _seriesName(name):
+   return name.encode()[:HISTORY_NAME_SIZE]
+
+def _seriesKey(kind, index, name):
+   # series are identified like telemetry records, names are not unique and
+   # longer ones are truncated, they are looked up the same way
+   return kind, index, _seriesName(name).decode('utf-8', 'ignore')
+
+def _levelOffset(level):
+   return sum(l.size for l in HISTORY_LEVELS[:level]) * BUCKET.size
+
+def _bucketOffset(series, level, index):
+   return BUCKETS_OFFSET + series * SERIES_SIZE + _levelOffset(level) + \
+          index * BUCKET.size
+
+def _syncDir(path):
+   fd = os.open(os.path.dirname(path), os.O_RDONLY)
+   try:
+      os.fsync(fd)
+   finally:
+      os.close(fd)
+
+class HistoryWriter(object):
+   '''Append samples to fixed size rings of buckets in a mapped file
+
+   Appending only updates the head bucket of each level, or moves the head
+   to the next one once its period is over. As for the telemetry snapshot,
+   the sequence number is odd while samples are being appended.
+   '''
+   def __init__(self, path):
+      self.path = path
+      self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+      header = os.read(self.fd, HEADER.size)
+      valid = os.fstat(self.fd).st_size == HISTORY_SIZE and \
+              header[:6] == HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, 0, 0)[:6]
+      if not valid:
+         # the file stays sparse until series are recorded
+         os.ftruncate(self.fd, 0)
+         os.ftruncate(self.fd, HISTORY_SIZE)
+      self.mm = mmap.mmap(self.fd, HISTORY_SIZE)
+      _, _, count, self.seq = HEADER.unpack_from(self.mm)
+      if self.seq % 2:
+         self.seq += 1
+      self.series = {}
+      self.heads = []
+      for i in range(count):
+         kind, index, name, heads = self._readSeries(i)
+         self.series[(kind, index, name)] = i
+         self.heads.append(heads)
+      self._writeHeader()
+      # samples were appended since the last copy
+      self.dirty = False
+
+   def _readSeries(self, series):
+      data = SERIES.unpack_from(self.mm, HEADER.size + series * SERIES.size)
+      return data[0], data[1], data[2].rstrip(b'\0'), list(data[3:])
+
+   def _writeSeries(self, series, kind, index, name):
+      SERIES.pack_into(self.mm, HEADER.size + series * SERIES.size, kind,
+                       index, name, *self.heads[series])
+
+   def _writeHeader(self):
+      HEADER.pack_into(self.mm, 0, HISTORY_MAGIC, HISTORY_VERSION,
+                       len(self.series), self.seq)
+
+   def _getSeries(self, kind, index, name):
+      key = (HISTORY_KINDS.index(kind), index, _seriesName(name))
+      series = self.series.get(key)
+      if series is None:
+         if len(self.series) >= HISTORY_MAX_SERIES:
+            return None
+         series = self.series[key] = len(self.series)
+         self.heads.append([0] * len(HISTORY_LEVELS))
+      return key, series
+
+   def _append(self, series, value, now):
+      heads = self.heads[series]
+      for level, info in enumerate(HISTORY_LEVELS):
+         start = now - now % info.resolution
+         offset = _bucketOffset(series, level, heads[level])
+         bucketTime, count, low, high, total = BUCKET.unpack_from(self.mm, offset)
+         if count and bucketTime == start:
+            BUCKET.pack_into(self.mm, offset, start, min(count + 1, 0xffff),
+                             min(low, value), max(high, value), total + value)
+            continue
+         if count:
+            heads[level] = (heads[level] + 1) % info.size
+            offset = _bucketOffset(series, level, heads[level])
+         BUCKET.pack_into(self.mm, offset, start, 1, value, value, value)
+
+   def append(self, samples, now=None):
+      '''Record (kind, index, name, value) samples, None values are skipped'''
+      now = int(time.time() if now is None else now)
+      self.seq = (self.seq + 1) & 0xffffffff
+      SEQ.pack_into(self.mm, SEQ_OFFSET, self.seq)
+      for kind, index, name, value in samples:
+         if value is None:
+            continue
+         series = self._getSeries(kind, index, name)
+         if series is None:
+            logging.debug('history: no room left for %s %s', kind, name)
+            continue
+         key, series = series
+         self._append(series, float(value), now)
+         self._writeSeries(series, *key)
+         self.dirty = True
+      self.seq = (self.seq + 1) & 0xffffffff
+      self._writeHeader()
+
+   def sync(self, path):
+      '''Copy the history to another file, replaced at once
+
+      The copy is meant for flash, only the buckets of the allocated series
+      are written and the rest of the file is left sparse. Nothing is written
+      when no sample was appended since the previous copy. Return whether
+      the copy was written.
+      '''
+      if not self.dirty:
+         return False
+      used = BUCKETS_OFFSET + len(self.series) * SERIES_SIZE
+      tmpPath = '%s.tmp' % path
+      with open(tmpPath, 'wb') as f:
+         f.write(self.mm[:used])
+         f.truncate(HISTORY_SIZE)
+         f.flush()
+         os.fsync(f.fileno())
+      os.rename(tmpPath, path)
+      _syncDir(path)
+      self.dirty = False
+      return True
+
+   def close(self):
+      self.mm.close()
+      os.close(self.fd)
+
+class HistoryReader(object):
+   '''Read the history from a mapping of the file
+
+   Only the series table and the buckets of the requested series are copied,
+   reads are retried when the writer appended meanwhile.
+   '''
+   def __init__(self, path):
+      self.path = path
+      self.mm = None
+
+   def _map(self):
+      if self.mm is not None:
+         return True
+      try:
+         with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size != HISTORY_SIZE:
+               return False
+            self.mm = mmap.mmap(f.fileno(), HISTORY_SIZE,
+                                access=mmap.ACCESS_READ)
+      except (IOError, OSError, ValueError):
+         return False
+      return True
+
+   def _consistent(self, func):
+      for _ in range(HISTORY_READ_RETRIES):
+         seq = SEQ.unpack_from(self.mm, SEQ_OFFSET)[0]
+         if seq % 2:
+            continue
+         result = func()
+         if SEQ.unpack_from(self.mm, SEQ_OFFSET)[0] == seq:
+            return result
+      logging.debug('history kept changing while being read')
+      return None
+
+   def _readSeriesTable(self):
+      magic, version, count, _ = HEADER.unpack_from(self.mm)
+      if magic != HISTORY_MAGIC or version != HISTORY_VERSION:
+         return None
+      table = {}
+      for series in range(min(count, HISTORY_MAX_SERIES)):
+         fields = SERIES.unpack_from(self.mm, HEADER.size + series * SERIES.size)
+         if fields[0] >= len(HISTORY_KINDS):
+            continue
+         key = (HISTORY_KINDS[fields[0]], fields[1],
+                fields[2].rstrip(b'\0').decode('utf-8', 'ignore'))
+         table[key] = (series, fields[3:])
+      return table
+
+   def _readSamples(self, series, heads, level):
+      size = HISTORY_LEVELS[level].size
+      data = self.mm[_bucketOffset(series, level, 0):
+                     _bucketOffset(series, level, size)]
+      samples = []
+      for i in range(heads[level] + 1, heads[level] + 1 + size):
+         bucketTime, count, low, high, total = \
+            BUCKET.unpack_from(data, (i % size) * BUCKET.size)
+         if count:
+            samples.append(HistorySample(bucketTime, low, high, total / count))
+      return samples
+
+   def read(self, level='minutes', series=None):
+      '''Return the samples of each series, from the oldest to the newest
+
+      The result maps (kind, index, name) to a list of HistorySample,
+      restricted to the given (kind, index, name) series when provided.
+      '''
+      if not self._map():
+         return None
+      levelIndex = [l.name for l in HISTORY_LEVELS].index(level)
+
+      def readAll():
+         table = self._readSeriesTable()
+         if table is None:
+            return None
+         if series is None:
+            keys = list(table.keys())
+         else:
+            keys = [_seriesKey(*k) for k in series]
+         return {k: self._readSamples(table[k][0], table[k][1], levelIndex)
+                 for k in keys if k in table}
+
+      return self._consistent(readAll)
+
+   def close(self):
+      if self.mm is not None:
+         self.mm.close()
+         self.mm = None
+
+def getHistoryPath():
+   return os.path.join(utils.TMPFS_MOUNT, HISTORY_FILE)
+
+def getPersistentHistoryPath():
+   return os.path.join(utils.FLASH_MOUNT, PERSISTENT_HISTORY_FILE)
+
+def readHistory(level='minutes', series=None):
+   '''Read the live history, or the one saved on flash before a reboot'''
+   for path in [getHistoryPath(), getPersistentHistoryPath()]:
+      if os.path.exists(path):
+         reader = HistoryReader(path)
+         try:
+            return reader.read(level=level, series=series)
+         finally:
+            reader.close()
+   return None
+
+_reader = None
+
+def getRecordedRange(kind, index, name):
+   '''Return the lowest and highest values recorded for a series, if any'''
+   global _reader
+   if utils.inSimulation() or index is None:
+      return None
+   if _reader is None:
+      _reader = HistoryReader(getHistoryPath())
+   history = _reader.read(level=HISTORY_LEVELS[-1].name,
+                          series=[(kind, index, name)])
+   samples = (history or {}).get(_seriesKey(kind, index, name))
+   if not samples:
+      return None
+   return min(s.min for s in samples), max(s.max for s in samples)
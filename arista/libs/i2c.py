@@ -0,0 +1,104 @@
+from __future__ import absolute_import, division, print_function
+
+import contextlib
+import os
+import threading
+
+from collections import OrderedDict
+
+from ..core.log import getLogger
+from ..core.utils import FileWaiter, inSimulation, waitFilesReady
+from .python import monotonicRaw
+
+logging = getLogger(__name__)
+
+SYS_I2C_DEVICES = '/sys/bus/i2c/devices'
+
+_activeBatch = threading.local()
+
+def getI2cDeviceBatch():
+   '''Return the batch i2c clients should be declared in, if any'''
+   return getattr(_activeBatch, 'batch', None)
+
+class I2cDeviceBatch(object):
+   '''Instantiate many kernel i2c clients at once
+
+   Clients are declared by the drivers during setup and only created on commit,
+   bus by bus, with a single lookup of the existing devices and a single open
+   of each new_device file. Their appearance is then waited for collectively.
+   '''
+   def __init__(self, timeout=None):
+      self.timeout = timeout
+      self.devices = OrderedDict()
+
+   def __len__(self):
+      return len(self.devices)
+
+   def add(self, addr, name, waiter=None):
+      key = (addr.bus, addr.address)
+      if key in self.devices:
+         logging.debug('i2c device %s already declared at %s', name, addr)
+         return
+      self.devices[key] = (addr, name, waiter)
+
+   @contextlib.contextmanager
+   def active(self):
+      previous = getI2cDeviceBatch()
+      _activeBatch.batch = self
+      try:
+         yield self
+      finally:
+         _activeBatch.batch = previous
+
+   def _newDevices(self, bus, devices):
+      error = None
+      path = os.path.join(SYS_I2C_DEVICES, 'i2c-%d' % bus, 'new_device')
+      with open(path, 'w') as f:
+         for addr, name, _ in devices:
+            # the kernel only parses one device per write
+            try:
+               f.write('%s 0x%02x\n' % (name, addr.address))
+               f.flush()
+            except (IOError, OSError) as e:
+               logging.error('failed to create i2c device %s at %s: %s',
+                             name, addr, e)
+               error = error or e
+      return error
+
+   def commit(self):
+      devices = list(self.devices.values())
+      self.devices.clear()
+      if not devices or inSimulation():
+         return True
+
+      begin = monotonicRaw()
+      existing = set(os.listdir(SYS_I2C_DEVICES))
+      buses = OrderedDict()
+      for device in devices:
+         addr = device[0]
+         if str(addr) in existing:
+            logging.debug('i2c device %s already exists', addr.getSysfsPath())
+            continue
+         buses.setdefault(addr.bus, []).append(device)
+
+      error = None
+      for bus, busDevices in buses.items():
+         try:
+            busError = self._newDevices(bus, busDevices)
+            error = error or busError
+         except (IOError, OSError) as e:
+            logging.error('failed to create i2c devices on bus %d: %s', bus, e)
+            error = error or e
+
+      waiters = []
+      for addr, _, waiter in devices:
+         waiters.append(FileWaiter(addr.getSysfsPath()))
+         if waiter is not None:
+            waiters.append(waiter)
+      ready = waitFilesReady(waiters, timeout=self.timeout)
+      logging.debug('created %d i2c devices on %d buses in %.3fs',
+                    sum(len(d) for d in buses.values()), len(buses),
+                    monotonicRaw() - begin)
+      if error is not None:
+         raise error
+      return ready
@@ -0,0 +1,122 @@
+from __future__ import absolute_import, division, print_function
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+
+from ..core.log import getLogger
+
+logging = getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# events that can make a path appear under a watched directory
+IN_APPEAR = IN_CREATE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+
+_EVENT_HDR = struct.Struct('iIII')
+_EVENT_BUF_SIZE = 4096
+
+_libc = None
+
+def _getLibc():
+   global _libc
+   if _libc is None:
+      try:
+         libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                            use_errno=True)
+         libc.inotify_init1 # pylint: disable=pointless-statement
+      except (OSError, AttributeError):
+         libc = False
+      _libc = libc
+   return _libc
+
+def inotifySupported():
+   return bool(_getLibc())
+
+class InotifyEvent(object):
+   def __init__(self, wd, mask, cookie, name):
+      self.wd = wd
+      self.mask = mask
+      self.cookie = cookie
+      self.name = name
+
+   def __str__(self):
+      return '%s(wd=%d, mask=%#x, name=%s)' % (self.__class__.__name__, self.wd,
+                                               self.mask, self.name)
+
+class Inotify(object):
+   '''Minimal ctypes wrapper around the linux inotify API'''
+   def __init__(self):
+      libc = _getLibc()
+      if not libc:
+         raise OSError(errno.ENOSYS, 'inotify is not available')
+      self.libc = libc
+      self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+      if self.fd < 0:
+         err = ctypes.get_errno()
+         raise OSError(err, os.strerror(err))
+      self.poller = select.poll()
+      self.poller.register(self.fd, select.POLLIN)
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *args):
+      self.close()
+
+   def fileno(self):
+      return self.fd
+
+   def close(self):
+      if self.fd is not None and self.fd >= 0:
+         os.close(self.fd)
+      self.fd = None
+
+   def addWatch(self, path, mask):
+      if not isinstance(path, bytes):
+         path = path.encode()
+      wd = self.libc.inotify_add_watch(self.fd, ctypes.c_char_p(path), mask)
+      if wd < 0:
+         err = ctypes.get_errno()
+         raise OSError(err, os.strerror(err), path)
+      return wd
+
+   def removeWatch(self, wd):
+      # failing here only means the watch is already gone
+      self.libc.inotify_rm_watch(self.fd, wd)
+
+   def read(self, timeout=None):
+      '''Return the pending events, waiting at most timeout seconds for them'''
+      timeoutMs = -1 if timeout is None else max(0, int(timeout * 1000))
+      if not self.poller.poll(timeoutMs):
+         return []
+
+      try:
+         data = os.read(self.fd, _EVENT_BUF_SIZE)
+      except OSError as e:
+         if e.errno in (errno.EAGAIN, errno.EINTR):
+            return []
+         raise
+
+      events = []
+      offset = 0
+      while offset + _EVENT_HDR.size <= len(data):
+         wd, mask, cookie, length = _EVENT_HDR.unpack_from(data, offset)
+         offset += _EVENT_HDR.size
+         name = data[offset:offset + length].rstrip(b'\0').decode()
+         offset += length
+         events.append(InotifyEvent(wd, mask, cookie, name))
+      return events
@@ -1,3 +1,4 @@
+import os
 
 from ..core.log import getLogger
 
@@ -8,3 +9,17 @@ def pciRescan():
    with open('/sys/bus/pci/rescan', 'w') as f:
       f.write('1')
 
+def pciBusRescan(addr):
+   '''Rescan only the bus behind the bridge the device is expected on
+
+   Falls back to a global rescan if that bridge itself is not enumerated yet.
+   '''
+   path = '/sys/class/pci_bus/%04x:%02x/rescan' % (addr.domain, addr.bus)
+   if not os.path.exists(path):
+      logging.debug('pci bus of %s not found, rescanning everything', addr)
+      pciRescan()
+      return
+   logging.info('triggering kernel pci rescan of bus %04x:%02x', addr.domain,
+                addr.bus)
+   with open(path, 'w') as f:
+      f.write('1')
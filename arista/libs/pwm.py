@@ -0,0 +1,91 @@
+from __future__ import absolute_import, division, print_function
+
+from ..core.log import getLogger
+from .python import monotonicRaw
+
+logging = getLogger(__name__)
+
+# a value already applied is written again after this delay, which also
+# checks that the hardware still holds it
+PWM_REASSERT_INTERVAL = 60.
+
+class PwmStats(object):
+   def __init__(self):
+      self.writes = 0
+      self.avoided = 0
+      self.reasserts = 0
+      self.drifts = 0
+
+   def toDict(self):
+      return {
+         'writes': self.writes,
+         'avoided': self.avoided,
+         'reasserts': self.reasserts,
+         'drifts': self.drifts,
+      }
+
+pwmStats = PwmStats()
+
+class PwmChannel(object):
+   '''Physical pwm output shared by all the fans it drives
+
+   Writes of the value last applied are skipped until the reassert interval
+   elapsed. The value is then read back to detect a drift and written again.
+   '''
+   def __init__(self, name, write, read=None, expect=None,
+                reassertInterval=PWM_REASSERT_INTERVAL, stats=None):
+      self.name = name
+      self._write = write
+      self._read = read
+      self.expect = expect or (lambda value: value)
+      self.reassertInterval = reassertInterval
+      self.stats = stats or pwmStats
+      self.value = None
+      self.nextReassert = None
+
+   def __str__(self):
+      return 'PwmChannel(%s)' % self.name
+
+   def checkDrift(self):
+      if self._read is None:
+         return
+      try:
+         current = self._read()
+      except Exception as e: # pylint: disable=broad-except
+         logging.debug('%s: failed to read back the value: %s', self, e)
+         return
+      if current != self.expect(self.value):
+         logging.warning('%s: value drifted from %s to %s', self,
+                         self.expect(self.value), current)
+         self.stats.drifts += 1
+
+   def write(self, value):
+      now = monotonicRaw()
+      if value == self.value:
+         if now < self.nextReassert:
+            self.stats.avoided += 1
+            return
+         self.stats.reasserts += 1
+         self.checkDrift()
+      try:
+         self._write(value)
+      except Exception:
+         # the state of the hardware is unknown, write it next time
+         self.value = None
+         raise
+      self.value = value
+      self.nextReassert = now + self.reassertInterval
+      self.stats.writes += 1
+
+_channels = {}
+
+def getPwmChannel(name, write, read=None, expect=None):
+   '''Return the channel of the given name, fans sharing an output share it'''
+   channel = _channels.get(name)
+   if channel is None:
+      channel = _channels[name] = PwmChannel(name, write, read=read,
+                                             expect=expect)
+   return channel
+
+def getPwmStats():
+   return pwmStats.toDict()
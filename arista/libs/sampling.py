@@ -0,0 +1,131 @@
+from __future__ import absolute_import, division, print_function
+
+from collections import defaultdict
+
+from .python import monotonicRaw
+
+# every value is read at least this often
+SAMPLING_MAX_INTERVAL = 30.
+# temperatures closer than the margin to their threshold are read at every poll
+SAMPLING_MARGIN = 2.
+# values without thresholds are read at this interval while they change
+SAMPLING_BASE_INTERVAL = 5.
+# reads are scheduled to happen several times before a temperature rising at
+# its current rate reaches its threshold
+SAMPLING_RATE_FACTOR = 0.25
+
+class SamplingStats(object):
+   def __init__(self):
+      self.reads = defaultdict(int)
+      self.skipped = defaultdict(int)
+
+   def toDict(self):
+      return {
+         kind: {
+            'reads': self.reads[kind],
+            'skipped': self.skipped[kind],
+         } for kind in set(self.reads) | set(self.skipped)
+      }
+
+samplingStats = SamplingStats()
+
+class SampleState(object):
+   __slots__ = ['result', 'value', 'time', 'rate', 'interval', 'nextTime']
+
+   def __init__(self):
+      self.result = None
+      self.value = None
+      self.time = None
+      self.rate = 0.
+      self.interval = None
+      self.nextTime = None
+
+def temperatureLimit(temp):
+   '''Return the threshold a temperature must stay away from, if any'''
+   try:
+      desc = temp.getDesc()
+   except NotImplementedError:
+      return None
+   if desc is None:
+      return None
+   limit = min(desc.overheat, desc.critical)
+   return limit if int(limit) else None
+
+class AdaptiveSampler(object):
+   '''Decide for each value whether it needs to be read at this poll
+
+   Temperatures are read more often as they get closer to their threshold
+   or heat up faster, other values while they keep changing. The previous
+   result is returned for values which are not due yet.
+   '''
+   def __init__(self, minInterval, maxInterval=SAMPLING_MAX_INTERVAL,
+                margin=SAMPLING_MARGIN, baseInterval=SAMPLING_BASE_INTERVAL,
+                stats=None):
+      self.minInterval = minInterval
+      self.maxInterval = maxInterval
+      self.margin = margin
+      self.baseInterval = max(baseInterval, minInterval)
+      self.stats = stats or samplingStats
+      self.states = {}
+
+   def _clamp(self, interval):
+      return min(max(interval, self.minInterval), self.maxInterval)
+
+   def _thresholdInterval(self, state, limit):
+      margin = limit - state.value
+      if margin <= self.margin:
+         return self.minInterval
+      interval = self.minInterval * margin / self.margin
+      if state.rate > 0:
+         interval = min(interval, SAMPLING_RATE_FACTOR * margin / state.rate)
+      return self._clamp(interval)
+
+   def _stabilityInterval(self, state, value):
+      if state.interval is None or value != state.value:
+         return self.baseInterval
+      return self._clamp(state.interval * 2)
+
+   def _update(self, state, result, value, limit, now):
+      numeric = isinstance(value, (int, float)) and \
+                not isinstance(value, bool)
+      if numeric and isinstance(state.value, (int, float)) and \
+            state.time is not None and now > state.time:
+         state.rate = (value - state.value) / (now - state.time)
+      else:
+         state.rate = 0.
+      if numeric and limit is not None:
+         state.value = value
+         state.interval = self._thresholdInterval(state, limit)
+      else:
+         state.interval = self._stabilityInterval(state, value)
+         state.value = value
+      state.result = result
+      state.time = now
+      state.nextTime = now + state.interval
+
+   def sample(self, kind, key, read, value=None, limit=None, now=None):
+      '''Return the result of read, or the previous one until it is due
+
+      value extracts the value to track from the result, limit is the
+      threshold it must stay below.
+      '''
+      now = monotonicRaw() if now is None else now
+      state = self.states.get(key)
+      # a small tolerance keeps values due at this poll from being delayed
+      if state is not None and now < state.nextTime - self.minInterval / 10:
+         self.stats.skipped[kind] += 1
+         return state.result
+      result = read()
+      self.stats.reads[kind] += 1
+      if state is None:
+         state = self.states[key] = SampleState()
+      self._update(state, result, value(result) if value else result, limit,
+                   now)
+      return result
+
+   def reset(self, key):
+      '''Read the value at the next poll, e.g. once its sensor is back'''
+      self.states.pop(key, None)
+
+def getSamplingStats():
+   return samplingStats.toDict()
@@ -0,0 +1,222 @@
+from __future__ import absolute_import, division, print_function
+
+import json
+import os
+import sys
+import threading
+
+from ..core.log import getLogger
+from .python import isinteger, monotonicRaw
+
+logging = getLogger(__name__)
+
+HW_STATS_FILE = 'hw_stats.json'
+
+# upper bounds in seconds of the latency histogram buckets, the last bucket
+# collects everything above
+LATENCY_BUCKETS = [0.00001, 0.0001, 0.001, 0.01, 0.1, 1.]
+
+STATS_FIELDS = ['kind', 'op', 'device', 'bus', 'attr']
+
+class AccessStat(object):
+   __slots__ = ['count', 'errors', 'total', 'max', 'buckets']
+
+   def __init__(self):
+      self.count = 0
+      self.errors = 0
+      self.total = 0.
+      self.max = 0.
+      self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+   def add(self, duration, error=False):
+      self.count += 1
+      if error:
+         self.errors += 1
+      self.total += duration
+      if duration > self.max:
+         self.max = duration
+      for i, bound in enumerate(LATENCY_BUCKETS):
+         if duration <= bound:
+            self.buckets[i] += 1
+            return
+      self.buckets[-1] += 1
+
+   def merge(self, other):
+      self.count += other.count
+      self.errors += other.errors
+      self.total += other.total
+      self.max = max(self.max, other.max)
+      self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+   def percentile(self, ratio):
+      '''Upper bound of the bucket holding the given ratio of the accesses'''
+      target = self.count * ratio
+      seen = 0
+      for i, count in enumerate(self.buckets):
+         seen += count
+         if seen >= target and count:
+            if i < len(LATENCY_BUCKETS):
+               return min(LATENCY_BUCKETS[i], self.max)
+            return self.max
+      return self.max
+
+   def toDict(self):
+      return {
+         'count': self.count,
+         'errors': self.errors,
+         'total': self.total,
+         'max': self.max,
+         'buckets': self.buckets,
+      }
+
+   @classmethod
+   def fromDict(cls, data):
+      stat = cls()
+      stat.count = data.get('count', 0)
+      stat.errors = data.get('errors', 0)
+      stat.total = data.get('total', 0.)
+      stat.max = data.get('max', 0.)
+      buckets = data.get('buckets', [])
+      if len(buckets) == len(stat.buckets):
+         stat.buckets = list(buckets)
+      return stat
+
+def _formatField(field, value):
+   if value is None:
+      return None
+   if isinteger(value):
+      # integer buses are i2c bus numbers, other integers are registers
+      return 'i2c-%d' % value if field == 'bus' else '%#x' % value
+   return str(value)
+
+class HwStats(object):
+   '''Counters and latency histograms of the hardware accesses of a process
+
+   Accesses are keyed by kind, operation, device, bus and attribute. Keys are
+   only converted to strings when dumped so recording stays cheap.
+   '''
+   def __init__(self):
+      self.pid = os.getpid()
+      self.lock = threading.Lock()
+      self.entries = {}
+
+   def record(self, key, duration, error=False):
+      with self.lock:
+         stat = self.entries.get(key)
+         if stat is None:
+            stat = self.entries[key] = AccessStat()
+         stat.add(duration, error)
+
+   def rows(self):
+      with self.lock:
+         entries = list(self.entries.items())
+      merged = {}
+      for key, stat in entries:
+         key = tuple(_formatField(f, v) for f, v in zip(STATS_FIELDS, key))
+         current = merged.get(key)
+         if current is None:
+            current = merged[key] = AccessStat()
+         current.merge(stat)
+      rows = []
+      for key, stat in merged.items():
+         row = dict(zip(STATS_FIELDS, key))
+         row.update(stat.toDict())
+         rows.append(row)
+      return rows
+
+# None unless the stats are enabled, hot paths check it through the module
+# before calling measure() so that a disabled access costs a single lookup
+hwStats = None
+
+def enableHwStats():
+   global hwStats
+   if hwStats is None:
+      hwStats = HwStats()
+   return hwStats
+
+def disableHwStats():
+   global hwStats
+   hwStats = None
+
+def hwStatsEnabled():
+   return hwStats is not None
+
+def getHwStats():
+   return hwStats
+
+class _NoMeasure(object):
+   __slots__ = []
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *args):
+      return False
+
+NO_MEASURE = _NoMeasure()
+
+class Measure(object):
+   __slots__ = ['stats', 'key', 'begin']
+
+   def __init__(self, stats, key):
+      self.stats = stats
+      self.key = key
+      self.begin = None
+
+   def __enter__(self):
+      self.begin = monotonicRaw()
+      return self
+
+   def __exit__(self, excType, excValue, tb):
+      self.stats.record(self.key, monotonicRaw() - self.begin,
+                        excType is not None)
+      return False
+
+def measure(kind, op, device=None, bus=None, attr=None):
+   '''Count the enclosed hardware access when the stats are enabled'''
+   stats = hwStats
+   if stats is None:
+      return NO_MEASURE
+   return Measure(stats, (kind, op, device, bus, attr))
+
+def loadHwStats(path):
+   try:
+      with open(path) as f:
+         return json.load(f).get('processes', [])
+   except (IOError, OSError, ValueError, AttributeError):
+      return []
+
+def saveHwStats(path, command=None):
+   '''Store the counters of this process in the stats file at path
+
+   A process saving several times, like the daemon, replaces its own entry.
+   '''
+   stats = hwStats
+   if stats is None:
+      return
+   rows = stats.rows()
+   if not rows:
+      return
+   processes = [p for p in loadHwStats(path) if p.get('pid') != stats.pid]
+   processes.append({
+      'pid': stats.pid,
+      'name': command or ' '.join(sys.argv),
+      'rows': rows,
+   })
+   tmpPath = '%s.tmp' % path
+   with open(tmpPath, 'w') as f:
+      json.dump({'processes': processes}, f)
+   os.rename(tmpPath, path)
+   logging.debug('saved %d hardware access counters to %s', len(rows), path)
+
+def aggregateHwStats(processes, groupBy):
+   '''Merge the rows of all the processes by the given fields'''
+   merged = {}
+   for process in processes:
+      for row in process.get('rows', []):
+         key = tuple(row.get(field) for field in groupBy)
+         stat = merged.get(key)
+         if stat is None:
+            stat = merged[key] = AccessStat()
+         stat.merge(AccessStat.fromDict(row))
+   return merged
@@ -0,0 +1,275 @@
+from __future__ import absolute_import, division, print_function
+
+import math
+import mmap
+import os
+import struct
+
+from collections import namedtuple
+
+from ..core import utils
+from ..core.log import getLogger
+from .python import monotonicRaw
+
+logging = getLogger(__name__)
+
+TELEMETRY_FILE = 'telemetry.bin'
+TELEMETRY_MAGIC = b'ARTM'
+TELEMETRY_VERSION = 3
+
+# the daemon publishes a snapshot every interval, readers ignore it when it
+# was not refreshed for a few intervals, and records which were not read for
+# as long since the daemon doesn't read every value at each poll
+TELEMETRY_INTERVAL = 5.
+TELEMETRY_MAX_AGE = 3 * TELEMETRY_INTERVAL
+
+TELEMETRY_MAX_RECORDS = 256
+TELEMETRY_MAX_XCVRS = 256
+TELEMETRY_NAME_SIZE = 48
+
+# magic, version, record count, sequence, timestamp, xcvr known and present
+# bitmaps
+HEADER = struct.Struct('<4sHHI4xd%ds%ds' % (TELEMETRY_MAX_XCVRS // 8,
+                                            TELEMETRY_MAX_XCVRS // 8))
+SEQ = struct.Struct('<I')
+SEQ_OFFSET = 8
+# kind, flags, index, name, value, high threshold, critical threshold, time of
+# the oldest read
+RECORD = struct.Struct('<BBH4x%dsdddd' % TELEMETRY_NAME_SIZE)
+TELEMETRY_SIZE = HEADER.size + RECORD.size * TELEMETRY_MAX_RECORDS
+
+TELEMETRY_KINDS = ['temps', 'fans', 'psuSlots']
+
+FLAG_PRESENT_VALID = 0x1
+FLAG_PRESENT = 0x2
+FLAG_STATUS_VALID = 0x4
+FLAG_STATUS = 0x8
+
+# how many times a reader tries again while the snapshot is being written
+TELEMETRY_READ_RETRIES = 100
+
+# records are identified by their position in the inventory, names are not
+# unique (e.g. sensors of different boards), they are only checked
+TelemetryRecord = namedtuple('TelemetryRecord', [
+   'kind', 'index', 'name', 'present', 'status', 'value', 'high', 'critical',
+   'time'
+])
+
+def _recordName(name):
+   # longer names are truncated, readers look them up the same way
+   return name.encode()[:TELEMETRY_NAME_SIZE]
+
+def _packBool(value, validFlag, flag):
+   if value is None:
+      return 0
+   return validFlag | (flag if value else 0)
+
+def _unpackBool(flags, validFlag, flag):
+   if not flags & validFlag:
+      return None
+   return bool(flags & flag)
+
+def _packFloat(value):
+   return float('nan') if value is None else float(value)
+
+def _unpackFloat(value):
+   return None if math.isnan(value) else value
+
+def _packBitmap(xcvrs):
+   bitmap = bytearray(TELEMETRY_MAX_XCVRS // 8)
+   for xcvrId in xcvrs:
+      if 0 <= xcvrId < TELEMETRY_MAX_XCVRS:
+         bitmap[xcvrId // 8] |= 1 << (xcvrId % 8)
+   return bytes(bitmap)
+
+def _unpackBitmap(data):
+   data = bytearray(data)
+   return set(i for i in range(TELEMETRY_MAX_XCVRS)
+              if data[i // 8] & (1 << (i % 8)))
+
+class TelemetrySnapshot(object):
+   def __init__(self, timestamp, records, xcvrsKnown, xcvrsPresent):
+      self.timestamp = timestamp
+      self.records = records
+      self.xcvrsKnown = xcvrsKnown
+      self.xcvrsPresent = xcvrsPresent
+
+   def age(self):
+      return monotonicRaw() - self.timestamp
+
+   def get(self, kind, index, name, maxAge=TELEMETRY_MAX_AGE):
+      '''Return the record of an item, None when missing or outdated'''
+      record = self.records.get((kind, index))
+      if record is None or record.name.encode() != _recordName(name):
+         return None
+      if monotonicRaw() - record.time > maxAge:
+         return None
+      return record
+
+   def getXcvrPresence(self, xcvrId):
+      if xcvrId not in self.xcvrsKnown:
+         return None
+      return xcvrId in self.xcvrsPresent
+
+def encodeSnapshot(records, xcvrsPresence, timestamp):
+   '''Return the header fields and the packed records of a snapshot'''
+   records = records[:TELEMETRY_MAX_RECORDS]
+   body = b''.join(RECORD.pack(
+      TELEMETRY_KINDS.index(r.kind),
+      _packBool(r.present, FLAG_PRESENT_VALID, FLAG_PRESENT) |
+      _packBool(r.status, FLAG_STATUS_VALID, FLAG_STATUS),
+      r.index,
+      _recordName(r.name),
+      _packFloat(r.value),
+      _packFloat(r.high),
+      _packFloat(r.critical),
+      r.time,
+   ) for r in records)
+   known = _packBitmap(xcvrsPresence)
+   present = _packBitmap(x for x, p in xcvrsPresence.items() if p)
+   return len(records), timestamp, known, present, body
+
+def decodeSnapshot(data):
+   magic, version, count, _, timestamp, known, present = \
+      HEADER.unpack_from(data)
+   if magic != TELEMETRY_MAGIC or version != TELEMETRY_VERSION:
+      return None
+   records = {}
+   for i in range(min(count, TELEMETRY_MAX_RECORDS)):
+      kind, flags, index, name, value, high, critical, readTime = \
+         RECORD.unpack_from(data, HEADER.size + i * RECORD.size)
+      if kind >= len(TELEMETRY_KINDS):
+         continue
+      record = TelemetryRecord(
+         TELEMETRY_KINDS[kind],
+         index,
+         name.rstrip(b'\0').decode(),
+         _unpackBool(flags, FLAG_PRESENT_VALID, FLAG_PRESENT),
+         _unpackBool(flags, FLAG_STATUS_VALID, FLAG_STATUS),
+         _unpackFloat(value),
+         _unpackFloat(high),
+         _unpackFloat(critical),
+         readTime,
+      )
+      records[(record.kind, record.index)] = record
+   return TelemetrySnapshot(timestamp, records, _unpackBitmap(known),
+                            _unpackBitmap(present))
+
+class TelemetryWriter(object):
+   '''Publish snapshots in a fixed size file mapped by the readers
+
+   The sequence number is odd while a snapshot is being written, readers
+   retry when it is odd or when it changed while they were copying.
+   '''
+   def __init__(self, path):
+      self.path = path
+      self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+      os.ftruncate(self.fd, TELEMETRY_SIZE)
+      self.mm = mmap.mmap(self.fd, TELEMETRY_SIZE)
+      self.seq = SEQ.unpack_from(self.mm, SEQ_OFFSET)[0]
+      if self.seq % 2:
+         # a previous writer died while publishing
+         self.seq += 1
+
+   def publish(self, records, xcvrsPresence, timestamp=None):
+      timestamp = monotonicRaw() if timestamp is None else timestamp
+      count, timestamp, known, present, body = \
+         encodeSnapshot(records, xcvrsPresence, timestamp)
+      self.seq = (self.seq + 1) & 0xffffffff
+      SEQ.pack_into(self.mm, SEQ_OFFSET, self.seq)
+      self.mm[HEADER.size:HEADER.size + len(body)] = body
+      HEADER.pack_into(self.mm, 0, TELEMETRY_MAGIC, TELEMETRY_VERSION, count,
+                       self.seq, timestamp, known, present)
+      self.seq = (self.seq + 1) & 0xffffffff
+      SEQ.pack_into(self.mm, SEQ_OFFSET, self.seq)
+
+   def close(self):
+      self.mm.close()
+      os.close(self.fd)
+
+class TelemetryReader(object):
+   '''Read the snapshots of the daemon, without any system call once mapped
+
+   The snapshot is only decoded again when its sequence number changed.
+   '''
+   def __init__(self, path, maxAge=TELEMETRY_MAX_AGE):
+      self.path = path
+      self.maxAge = maxAge
+      self.mm = None
+      self.seq = None
+      self.snapshot = None
+      self.retryTime = None
+
+   def _map(self):
+      now = monotonicRaw()
+      if self.retryTime is not None and now < self.retryTime:
+         return False
+      # the daemon may not have published anything yet
+      self.retryTime = now + TELEMETRY_INTERVAL
+      try:
+         with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < TELEMETRY_SIZE:
+               return False
+            self.mm = mmap.mmap(f.fileno(), TELEMETRY_SIZE,
+                                access=mmap.ACCESS_READ)
+      except (IOError, OSError, ValueError):
+         return False
+      return True
+
+   def _read(self):
+      for _ in range(TELEMETRY_READ_RETRIES):
+         seq = SEQ.unpack_from(self.mm, SEQ_OFFSET)[0]
+         if seq % 2:
+            continue
+         if seq == self.seq:
+            return self.snapshot
+         data = self.mm[:TELEMETRY_SIZE]
+         if SEQ.unpack_from(self.mm, SEQ_OFFSET)[0] != seq:
+            continue
+         self.snapshot = decodeSnapshot(data)
+         self.seq = seq
+         return self.snapshot
+      logging.debug('telemetry snapshot kept changing while being read')
+      return None
+
+   def read(self):
+      '''Return the last snapshot, None when missing or outdated'''
+      if self.mm is None and not self._map():
+         return None
+      snapshot = self._read()
+      if snapshot is None or snapshot.age() > self.maxAge:
+         return None
+      return snapshot
+
+   def close(self):
+      if self.mm is not None:
+         self.mm.close()
+         self.mm = None
+
+_reader = None
+
+def getTelemetryPath():
+   return os.path.join(utils.TMPFS_MOUNT, TELEMETRY_FILE)
+
+def readTelemetry():
+   global _reader
+   if utils.inSimulation():
+      return None
+   if _reader is None:
+      _reader = TelemetryReader(getTelemetryPath())
+   return _reader.read()
+
+def getTelemetryIndex(items, item):
+   '''Return the index of the record of an inventory item, None if not found'''
+   for index, other in enumerate(items):
+      if other is item:
+         return index
+   return None
+
+def getTelemetryRecord(kind, index, name):
+   if index is None:
+      return None
+   snapshot = readTelemetry()
+   if snapshot is None:
+      return None
+   return snapshot.get(kind, index, name)
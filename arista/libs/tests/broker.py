@@ -0,0 +1,167 @@
+from __future__ import absolute_import, division, print_function
+
+import sys
+
+from ...tests.testing import unittest
+
+if sys.version_info.major == 2:
+   # the daemon is python3 only, see setup.py
+   raise unittest.SkipTest('daemon tests require python3')
+
+# pylint: disable=wrong-import-position
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+
+from ...core.inventory import Inventory
+from ...core.tests.mockinv import MockFan, MockFanSlot
+from ...core.types import I2cAddr
+from ...daemon.broker import InventoryBroker
+from ..broker import BrokerClient, BrokeredInventory, BrokerUnavailable
+from ..telemetry import getTelemetryIndex
+
+# broker keys of the temperature sensors of the tests
+TEMP1 = (0, 'temp1')
+TEMP2 = (1, 'temp2')
+
+class FakeTemp(object):
+   def __init__(self, name, addr, value):
+      self.name = name
+      self.addr = addr
+      self.value = value
+      self.reads = 0
+
+   def getName(self):
+      return self.name
+
+   def getTemperature(self):
+      self.reads += 1
+      return self.value
+
+   def getHighThreshold(self):
+      raise IOError('no threshold')
+
+class FakeXcvr(object):
+   def __init__(self, xcvrId):
+      self.xcvrId = xcvrId
+      self.present = True
+
+   def getName(self):
+      return 'Ethernet%d' % self.xcvrId
+
+   def getPresence(self):
+      return self.present
+
+class BrokerTest(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp()
+      self.path = os.path.join(self.tmpdir, 'broker.sock')
+      self.inventory = Inventory()
+      self.temps = [
+         FakeTemp('temp1', I2cAddr(1, 0x4c), 42.),
+         FakeTemp('temp2', I2cAddr(2, 0x4c), 37.),
+      ]
+      for temp in self.temps:
+         self.inventory.addTemp(temp)
+      self.inventory.xcvrs[1] = FakeXcvr(1)
+
+      self.loop = asyncio.new_event_loop()
+      self.broker = InventoryBroker(self.inventory, self.loop)
+      self.server = self.loop.run_until_complete(
+         asyncio.start_unix_server(self.broker.handle, path=self.path))
+      self.thread = threading.Thread(target=self.loop.run_forever)
+      self.thread.daemon = True
+      self.thread.start()
+      self.client = BrokerClient(path=self.path)
+
+   def tearDown(self):
+      self.client.close()
+      self.loop.call_soon_threadsafe(self.loop.stop)
+      self.thread.join()
+      self.server.close()
+      self.loop.run_until_complete(self.server.wait_closed())
+      self.broker.close()
+      self.loop.close()
+      shutil.rmtree(self.tmpdir)
+
+   def testCall(self):
+      self.assertEqual(self.client.call('temps', TEMP2, 'getTemperature'), 37.)
+      self.assertTrue(self.client.call('xcvrs', 1, 'getPresence'))
+
+   def testCache(self):
+      for _ in range(3):
+         self.assertEqual(self.client.call('temps', TEMP1, 'getTemperature'),
+                          42.)
+      self.assertEqual(self.temps[0].reads, 1)
+      self.broker.ttl = 0
+      self.client.call('temps', TEMP1, 'getTemperature')
+      self.assertEqual(self.temps[0].reads, 2)
+
+   def testErrors(self):
+      with self.assertRaises(IOError):
+         self.client.call('temps', TEMP1, 'getHighThreshold')
+      # only read accessors can be called
+      with self.assertRaises(Exception):
+         self.client.call('temps', TEMP1, 'setHighThreshold')
+      with self.assertRaises(Exception):
+         self.client.call('temps', (0, 'unknown'), 'getTemperature')
+      with self.assertRaises(Exception):
+         self.client.call('temps', (2, 'temp1'), 'getTemperature')
+      self.assertEqual(self.client.call('temps', TEMP1, 'getTemperature'), 42.)
+
+   def testBrokeredInventory(self):
+      inventory = BrokeredInventory(self.inventory, self.client)
+      temp = inventory.getTemps()[1]
+      self.assertEqual(temp.getTemperature(), 37.)
+      self.assertEqual(temp.name, 'temp2')
+      self.assertEqual(inventory.getXcvr(1).getName(), 'Ethernet1')
+      self.assertTrue(inventory.getXcvr(1).getPresence())
+
+   def testDuplicateNames(self):
+      temp = self.inventory.addTemp(FakeTemp('temp1', I2cAddr(3, 0x4c), 55.))
+      inventory = BrokeredInventory(self.inventory, self.client)
+      temps = inventory.getTemps()
+      self.assertEqual(temps[0].getTemperature(), 42.)
+      self.assertEqual(temps[2].getTemperature(), 55.)
+      self.assertEqual(temp.reads, 1)
+
+   def testFanSlotTelemetryIndex(self):
+      # the sonic chassis looks the fans of each drawer up in getFans
+      fans = [MockFan(name='fan%d' % i) for i in range(3)]
+      self.inventory.addFans(fans)
+      self.inventory.addFanSlot(MockFanSlot(fans=fans[1:]))
+      inventory = BrokeredInventory(self.inventory, self.client)
+      telemetryFans = inventory.getFans()
+      slotFans = inventory.getFanSlots()[0].getFans()
+      self.assertEqual([getTelemetryIndex(telemetryFans, fan)
+                        for fan in slotFans], [1, 2])
+      self.assertIs(slotFans[0].getInventoryObject(), fans[1])
+
+   def testMismatchFallback(self):
+      # the client sees another object than the daemon at this index
+      inventory = Inventory()
+      temp = inventory.addTemp(FakeTemp('local', I2cAddr(4, 0x4c), 21.))
+      brokered = BrokeredInventory(inventory, self.client)
+      self.assertEqual(brokered.getTemps()[0].getTemperature(), 21.)
+      self.assertEqual(temp.reads, 1)
+      self.assertEqual(self.temps[0].reads, 0)
+
+class BrokerFallbackTest(unittest.TestCase):
+   def testUnavailable(self):
+      tmpdir = tempfile.mkdtemp()
+      try:
+         client = BrokerClient(path=os.path.join(tmpdir, 'missing.sock'))
+         with self.assertRaises(BrokerUnavailable):
+            client.call('temps', TEMP1, 'getTemperature')
+         inventory = Inventory()
+         temp = inventory.addTemp(FakeTemp('temp1', I2cAddr(1, 0x4c), 42.))
+         brokered = BrokeredInventory(inventory, client)
+         self.assertEqual(brokered.getTemps()[0].getTemperature(), 42.)
+         self.assertEqual(temp.reads, 1)
+      finally:
+         shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,142 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+
+from ...tests.testing import unittest, patch
+
+from ...cli.show import Show
+from ...cli.show.environment import ShowEnvironmentHistory
+from .. import history
+from ..history import (
+   BUCKETS_OFFSET,
+   HISTORY_LEVELS,
+   HISTORY_SIZE,
+   SERIES_SIZE,
+   HistoryReader,
+   HistoryWriter,
+)
+
+# aligned on the coarsest resolution so samples share their buckets
+START = 3600 * 24 * 1000
+
+CPU = ('temps', 0, 'cpu')
+
+class HistoryTest(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp()
+      self.path = os.path.join(self.tmpdir, 'history.bin')
+      self.writer = HistoryWriter(self.path)
+      self.reader = HistoryReader(self.path)
+
+   def tearDown(self):
+      self.reader.close()
+      self.writer.close()
+      shutil.rmtree(self.tmpdir)
+
+   def _record(self, count, period=5, name='cpu', index=0):
+      for i in range(count):
+         self.writer.append([('temps', index, name, 40 + i % 10),
+                             ('fans', 0, 'fan1', None)], now=START + i * period)
+
+   def testDownsampling(self):
+      # 2 minutes of samples every 5 seconds
+      self._record(24)
+      seconds = self.reader.read(level='seconds')[CPU]
+      self.assertEqual(len(seconds), 24)
+      self.assertEqual(seconds[-1].time, START + 23 * 5)
+      minutes = self.reader.read(level='minutes')[CPU]
+      self.assertEqual([s.time for s in minutes], [START, START + 60])
+      self.assertEqual(minutes[0].min, 40)
+      self.assertEqual(minutes[0].max, 49)
+      values = [40 + i % 10 for i in range(12, 24)]
+      self.assertAlmostEqual(minutes[1].avg, sum(values) / 12.)
+      hours = self.reader.read(level='hours')[CPU]
+      self.assertEqual(len(hours), 1)
+      # series without any value are not allocated
+      self.assertNotIn(('fans', 0, 'fan1'), self.reader.read())
+
+   def testRingWraps(self):
+      size = HISTORY_LEVELS[0].size
+      self._record(size + 10)
+      seconds = self.reader.read(level='seconds')[CPU]
+      self.assertEqual(len(seconds), size)
+      self.assertEqual(seconds[0].time, START + 10 * 5)
+      self.assertEqual(seconds[-1].time, START + (size + 9) * 5)
+
+   def testRestart(self):
+      self._record(12)
+      self.writer.close()
+      self.writer = HistoryWriter(self.path)
+      self.writer.append([('temps', 0, 'cpu', 90)], now=START + 60)
+      minutes = self.reader.read(level='minutes')[CPU]
+      self.assertEqual(len(minutes), 2)
+      self.assertEqual(minutes[-1].max, 90)
+      self.assertEqual(minutes[0].max, 49)
+
+   def testInvalidFile(self):
+      self.writer.close()
+      with open(self.path, 'wb') as f:
+         f.write(b'garbage')
+      self.writer = HistoryWriter(self.path)
+      self.assertEqual(self.reader.read(), {})
+
+   def testSeries(self):
+      name = 'A very long sensor name which does not fit in a series'
+      self._record(2, name=name)
+      self._record(2, name='other')
+      data = self.reader.read(series=[('temps', 0, name)])
+      self.assertEqual(len(data), 1)
+
+   def testDuplicateNames(self):
+      self._record(2, index=0)
+      self.writer.append([('temps', 1, 'cpu', 90)], now=START)
+      data = self.reader.read(level='seconds')
+      self.assertEqual(len(data[CPU]), 2)
+      self.assertEqual(data[('temps', 1, 'cpu')][0].max, 90)
+
+   def testSync(self):
+      self._record(3)
+      persistent = os.path.join(self.tmpdir, 'persistent.bin')
+      self.assertTrue(self.writer.sync(persistent))
+      reader = HistoryReader(persistent)
+      self.assertEqual(len(reader.read(level='seconds')[CPU]), 3)
+      reader.close()
+      # only the allocated series are written, the copy is sparse
+      self.assertEqual(os.path.getsize(persistent), HISTORY_SIZE)
+      with open(persistent, 'rb') as f:
+         f.seek(BUCKETS_OFFSET + SERIES_SIZE)
+         self.assertEqual(f.read(SERIES_SIZE), b'\0' * SERIES_SIZE)
+      self.assertFalse(os.path.exists('%s.tmp' % persistent))
+
+   def testSyncUnchanged(self):
+      persistent = os.path.join(self.tmpdir, 'persistent.bin')
+      self.assertFalse(self.writer.sync(persistent))
+      self.assertFalse(os.path.exists(persistent))
+      self._record(1)
+      self.assertTrue(self.writer.sync(persistent))
+      self.writer.append([('fans', 0, 'fan1', None)], now=START + 5)
+      self.assertFalse(self.writer.sync(persistent))
+
+   def testRecordedRange(self):
+      self._record(24)
+      with patch.object(history, '_reader', self.reader), \
+           patch.object(history.utils, 'inSimulation', return_value=False):
+         self.assertEqual(history.getRecordedRange('temps', 0, 'cpu'),
+                          (40, 49))
+         self.assertIsNone(history.getRecordedRange('temps', 0, 'unknown'))
+         self.assertIsNone(history.getRecordedRange('temps', None, 'cpu'))
+
+   def testShow(self):
+      self._record(24)
+      renderer = ShowEnvironmentHistory(self.reader.read(level='seconds'),
+                                        samples=5)
+      data = renderer.data(Show())
+      series = data['temps'][0]
+      self.assertEqual((series['index'], series['name']), (0, 'cpu'))
+      self.assertEqual(len(series['samples']), 5)
+      self.assertEqual(series['samples'][-1]['max'], 43)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,127 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+
+from ...tests.testing import benchmark, bench, unittest, patch
+
+from ...core.types import I2cAddr
+from .. import i2c
+from ..i2c import I2cDeviceBatch, getI2cDeviceBatch
+
+PORT_COUNT = 128
+
+class I2cSysfsTestCase(unittest.TestCase):
+   def setUp(self):
+      self.root = tempfile.mkdtemp()
+      self.addCleanup(shutil.rmtree, self.root)
+      for bus in range(PORT_COUNT):
+         os.mkdir(os.path.join(self.root, 'i2c-%d' % bus))
+      # device 0 already exists
+      os.mkdir(os.path.join(self.root, '0-0050'))
+      for target, attr, new in [
+            (i2c, 'SYS_I2C_DEVICES', self.root),
+            (i2c, 'inSimulation', lambda: False),
+            (I2cAddr, 'getSysfsPath', lambda a: os.path.join(self.root, str(a))),
+         ]:
+         patcher = patch.object(target, attr, new)
+         patcher.start()
+         self.addCleanup(patcher.stop)
+      self.waits = []
+      patcher = patch.object(i2c, 'waitFilesReady', self._waitFilesReady)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+   def _waitFilesReady(self, waiters, timeout=None):
+      self.waits.append([w.waitFile for w in waiters])
+      return True
+
+   def _readNewDevice(self, bus):
+      path = os.path.join(self.root, 'i2c-%d' % bus, 'new_device')
+      if not os.path.exists(path):
+         return None
+      with open(path) as f:
+         return f.read()
+
+class I2cDeviceBatchTest(I2cSysfsTestCase):
+   def testActive(self):
+      batch = I2cDeviceBatch()
+      self.assertIsNone(getI2cDeviceBatch())
+      with batch.active():
+         self.assertIs(getI2cDeviceBatch(), batch)
+      self.assertIsNone(getI2cDeviceBatch())
+
+   def testCommit(self):
+      batch = I2cDeviceBatch()
+      batch.add(I2cAddr(0, 0x50), 'optoe1')
+      batch.add(I2cAddr(1, 0x50), 'optoe1')
+      batch.add(I2cAddr(1, 0x51), 'optoe1')
+      batch.add(I2cAddr(1, 0x51), 'optoe1')
+      batch.add(I2cAddr(2, 0x4c), 'max6658')
+      self.assertEqual(len(batch), 4)
+      self.assertTrue(batch.commit())
+      self.assertEqual(len(batch), 0)
+
+      self.assertIsNone(self._readNewDevice(0))
+      self.assertEqual(self._readNewDevice(1), 'optoe1 0x50\noptoe1 0x51\n')
+      self.assertEqual(self._readNewDevice(2), 'max6658 0x4c\n')
+      self.assertEqual(len(self.waits), 1)
+      self.assertEqual(len(self.waits[0]), 4)
+
+   def testPorts(self):
+      waiter = i2c.FileWaiter(os.path.join(self.root, 'ready'))
+      batch = I2cDeviceBatch()
+      for bus in range(PORT_COUNT):
+         batch.add(I2cAddr(bus, 0x50), 'optoe1')
+      batch.add(I2cAddr(1, 0x51), 'optoe1', waiter=waiter)
+      batch.add(I2cAddr(1, 0x4c), 'max6658')
+      batch.add(I2cAddr(2, 0x50), 'optoe1')
+
+      with patch.object(i2c, 'open', create=True, side_effect=open) as fopen:
+         self.assertTrue(batch.commit())
+
+      # one new_device file opened per bus with devices to create
+      self.assertEqual(fopen.call_count, PORT_COUNT - 1)
+      self.assertIsNone(self._readNewDevice(0))
+      # devices of a bus are created in the order they were declared
+      self.assertEqual(self._readNewDevice(1),
+                       'optoe1 0x50\noptoe1 0x51\nmax6658 0x4c\n')
+      for bus in range(2, PORT_COUNT):
+         self.assertEqual(self._readNewDevice(bus), 'optoe1 0x50\n')
+
+      # all the devices, existing ones included, are waited for at once
+      self.assertEqual(len(self.waits), 1)
+      expected = [I2cAddr(bus, 0x50).getSysfsPath()
+                  for bus in range(PORT_COUNT)]
+      expected += [I2cAddr(1, 0x51).getSysfsPath(), waiter.waitFile,
+                   I2cAddr(1, 0x4c).getSysfsPath()]
+      self.assertEqual(self.waits[0], expected)
+
+@benchmark
+class I2cDeviceBatchBenchmark(I2cSysfsTestCase):
+   '''Creation of one i2c client per port, one by one and in a batch'''
+   def _createOneByOne(self, addrs):
+      for addr in addrs:
+         if os.path.exists(addr.getSysfsPath()):
+            continue
+         path = os.path.join(self.root, 'i2c-%d' % addr.bus, 'new_device')
+         with open(path, 'w') as f:
+            f.write('optoe1 0x%02x\n' % addr.address)
+         self._waitFilesReady([i2c.FileWaiter(addr.getSysfsPath())])
+
+   def _createBatch(self, addrs):
+      batch = I2cDeviceBatch()
+      for addr in addrs:
+         batch.add(addr, 'optoe1')
+      batch.commit()
+
+   def testBenchmark(self):
+      addrs = [I2cAddr(bus, 0x50) for bus in range(PORT_COUNT)]
+      bench('one-by-one', lambda: self._createOneByOne(addrs),
+            unit='%d-ports' % PORT_COUNT)
+      bench('batch', lambda: self._createBatch(addrs),
+            unit='%d-ports' % PORT_COUNT)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,74 @@
+from __future__ import absolute_import, division, print_function
+
+from ...tests.testing import unittest, patch
+
+from .. import pwm
+from ..pwm import PwmChannel, PwmStats, getPwmChannel
+
+class FakePwm(object):
+   def __init__(self):
+      self.value = None
+      self.writes = []
+
+   def write(self, value):
+      self.writes.append(value)
+      self.value = value
+
+   def read(self):
+      return self.value
+
+class PwmChannelTest(unittest.TestCase):
+   def setUp(self):
+      self.now = 0.
+      patcher = patch.object(pwm, 'monotonicRaw', side_effect=lambda: self.now)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+      self.hw = FakePwm()
+      self.stats = PwmStats()
+      self.channel = PwmChannel('pwm1', self.hw.write, read=self.hw.read,
+                                reassertInterval=60., stats=self.stats)
+
+   def testSkipRedundant(self):
+      for speed in [50, 50, 50, 60, 60]:
+         self.channel.write(speed)
+      self.assertEqual(self.hw.writes, [50, 60])
+      self.assertEqual(self.stats.writes, 2)
+      self.assertEqual(self.stats.avoided, 3)
+
+   def testReassert(self):
+      self.channel.write(50)
+      self.now = 30.
+      self.channel.write(50)
+      self.now = 61.
+      self.channel.write(50)
+      self.assertEqual(self.hw.writes, [50, 50])
+      self.assertEqual(self.stats.reasserts, 1)
+      self.assertEqual(self.stats.drifts, 0)
+
+   def testDrift(self):
+      self.channel.write(50)
+      # something else reprogrammed the fans
+      self.hw.value = 100
+      self.now = 61.
+      self.channel.write(50)
+      self.assertEqual(self.stats.drifts, 1)
+      self.assertEqual(self.hw.value, 50)
+
+   def testWriteError(self):
+      self.channel.write(50)
+      with patch.object(self.channel, '_write', side_effect=IOError):
+         with self.assertRaises(IOError):
+            self.channel.write(60)
+      self.channel.write(60)
+      self.assertEqual(self.hw.writes, [50, 60])
+
+   def testSharedChannel(self):
+      with patch.object(pwm, '_channels', {}):
+         fan1 = getPwmChannel('/hwmon/pwm1', self.hw.write)
+         fan2 = getPwmChannel('/hwmon/pwm1', self.hw.write)
+         other = getPwmChannel('/hwmon/pwm2', self.hw.write)
+      self.assertIs(fan1, fan2)
+      self.assertIsNot(fan1, other)
+
+if __name__ == '__main__':
+   unittest.main()
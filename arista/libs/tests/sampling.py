@@ -0,0 +1,80 @@
+from __future__ import absolute_import, division, print_function
+
+from ...tests.testing import unittest
+
+from ...descs.sensor import Position, SensorDesc
+from ..sampling import AdaptiveSampler, SamplingStats, temperatureLimit
+
+class FakeTemp(object):
+   def __init__(self, value, overheat=80, critical=90):
+      self.value = value
+      self.reads = 0
+      self.desc = SensorDesc(diode=0, name='temp', position=Position.OTHER,
+                             target=40, overheat=overheat, critical=critical)
+
+   def getDesc(self):
+      return self.desc
+
+   def getTemperature(self):
+      self.reads += 1
+      return self.value
+
+class AdaptiveSamplerTest(unittest.TestCase):
+   def setUp(self):
+      self.stats = SamplingStats()
+      self.sampler = AdaptiveSampler(1., maxInterval=30., margin=2.,
+                                     baseInterval=5., stats=self.stats)
+
+   def _poll(self, temp, duration):
+      for now in range(int(duration)):
+         self.sampler.sample('temps', temp, temp.getTemperature,
+                             limit=temperatureLimit(temp), now=float(now))
+
+   def testColdSensor(self):
+      temp = FakeTemp(20)
+      self._poll(temp, 120)
+      # read every 30s, the longest interval allowed
+      self.assertEqual(temp.reads, 4)
+      self.assertEqual(self.stats.skipped['temps'], 116)
+
+   def testHotSensor(self):
+      temp = FakeTemp(79)
+      self._poll(temp, 120)
+      self.assertEqual(temp.reads, 120)
+
+   def testRisingSensor(self):
+      temp = FakeTemp(40)
+      self.sampler.sample('temps', temp, temp.getTemperature, limit=80, now=0.)
+      temp.value = 50
+      # 10 degrees in 20 seconds, the threshold would be reached in 60s
+      self.sampler.sample('temps', temp, temp.getTemperature, limit=80, now=20.)
+      self.assertEqual(self.sampler.states[temp].interval, 15.)
+
+   def testStability(self):
+      values = [1, 1, 1, 1, 2]
+      intervals = []
+      for now, value in enumerate(values):
+         self.sampler.sample('fans', 'fan1', lambda v=value: v, now=now * 100.)
+         intervals.append(self.sampler.states['fan1'].interval)
+      self.assertEqual(intervals, [5., 10., 20., 30., 5.])
+
+   def testReadError(self):
+      def fail():
+         raise IOError('read failed')
+      with self.assertRaises(IOError):
+         self.sampler.sample('fans', 'fan1', fail, now=0.)
+      self.assertEqual(self.sampler.sample('fans', 'fan1', lambda: 1, now=0.), 1)
+
+   def testReset(self):
+      temp = FakeTemp(20)
+      self._poll(temp, 2)
+      self.sampler.reset(temp)
+      self._poll(temp, 1)
+      self.assertEqual(temp.reads, 2)
+
+   def testNoThresholds(self):
+      self.assertIsNone(temperatureLimit(FakeTemp(30, overheat=0, critical=0)))
+      self.assertEqual(temperatureLimit(FakeTemp(30)), 80)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,108 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+
+from ...core.types import I2cAddr
+from ...core.utils import FileResource
+from ...tests.testing import unittest
+
+from ..stats import (
+   LATENCY_BUCKETS,
+   AccessStat,
+   aggregateHwStats,
+   disableHwStats,
+   enableHwStats,
+   getHwStats,
+   loadHwStats,
+   measure,
+   saveHwStats,
+)
+
+class AccessStatTest(unittest.TestCase):
+   def testHistogram(self):
+      stat = AccessStat()
+      stat.add(0.000001)
+      stat.add(0.0005)
+      stat.add(5., error=True)
+      self.assertEqual(stat.count, 3)
+      self.assertEqual(stat.errors, 1)
+      self.assertEqual(stat.max, 5.)
+      self.assertEqual(stat.buckets[0], 1)
+      self.assertEqual(stat.buckets[2], 1)
+      self.assertEqual(stat.buckets[-1], 1)
+      self.assertEqual(stat.percentile(0.5), LATENCY_BUCKETS[2])
+      self.assertEqual(stat.percentile(0.1), LATENCY_BUCKETS[0])
+      self.assertEqual(stat.percentile(1.), 5.)
+
+   def testMerge(self):
+      stat = AccessStat()
+      stat.add(0.001)
+      other = AccessStat.fromDict(stat.toDict())
+      other.merge(stat)
+      self.assertEqual(other.count, 2)
+      self.assertEqual(sum(other.buckets), 2)
+
+class HwStatsTest(unittest.TestCase):
+   def setUp(self):
+      self.addCleanup(disableHwStats)
+      self.tmpdir = tempfile.mkdtemp()
+      self.addCleanup(shutil.rmtree, self.tmpdir)
+
+   def testDisabled(self):
+      with measure('i2c', 'rdwr'):
+         pass
+      self.assertIsNone(getHwStats())
+
+   def testMeasure(self):
+      stats = enableHwStats()
+      addr = I2cAddr(3, 0x50)
+      for _ in range(3):
+         with measure('smbus', 'read_byte', addr, addr.bus, 0x10):
+            pass
+      with self.assertRaises(IOError):
+         with measure('smbus', 'read_byte', I2cAddr(3, 0x50), 3, 0x10):
+            raise IOError()
+      rows = stats.rows()
+      self.assertEqual(len(rows), 1)
+      row = rows[0]
+      self.assertEqual(row['device'], '3-0050')
+      self.assertEqual(row['bus'], 'i2c-3')
+      self.assertEqual(row['attr'], '0x10')
+      self.assertEqual(row['count'], 4)
+      self.assertEqual(row['errors'], 1)
+
+   def testFileResource(self):
+      stats = enableHwStats()
+      path = os.path.join(self.tmpdir, 'resource')
+      with open(path, 'wb') as f:
+         f.write(b'\0' * 16)
+      with FileResource(path) as res:
+         res.write32(4, 0x12345678)
+         self.assertEqual(res.read32(4), 0x12345678)
+      ops = sorted((r['kind'], r['op']) for r in stats.rows())
+      self.assertEqual(ops, [('file', 'open'), ('file', 'read'),
+                             ('file', 'write')])
+
+   def testSaveAndAggregate(self):
+      path = os.path.join(self.tmpdir, 'stats.json')
+      enableHwStats()
+      for bus in [1, 1, 2]:
+         with measure('i2c', 'rdwr', I2cAddr(bus, 0x20), bus):
+            pass
+      saveHwStats(path, command='first')
+      # saving again from the same process replaces its entry
+      saveHwStats(path, command='first')
+      processes = loadHwStats(path)
+      self.assertEqual(len(processes), 1)
+      processes.append(dict(processes[0], pid=0, name='second'))
+
+      byBus = aggregateHwStats(processes, ['bus'])
+      self.assertEqual(byBus[('i2c-1',)].count, 4)
+      self.assertEqual(byBus[('i2c-2',)].count, 2)
+      byKind = aggregateHwStats(processes, ['kind', 'op'])
+      self.assertEqual(byKind[('i2c', 'rdwr')].count, 6)
+
+if __name__ == '__main__':
+   unittest.main()
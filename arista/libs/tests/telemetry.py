@@ -0,0 +1,126 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+
+from ...tests.testing import unittest, patch
+
+from .. import telemetry
+from ..python import monotonicRaw
+from ..telemetry import (
+   SEQ,
+   SEQ_OFFSET,
+   TelemetryReader,
+   TelemetryRecord,
+   TelemetryWriter,
+)
+
+def makeRecords(now):
+   return [
+      TelemetryRecord('temps', 0, 'Cpu temp sensor', True, True, 42.5, 95.,
+                      105., now),
+      TelemetryRecord('temps', 1, 'Board sensor', True, None, None, None, None,
+                      now),
+      TelemetryRecord('fans', 0, 'fan1', True, False, 60., None, None, now),
+      TelemetryRecord('psuSlots', 0, 'psu1', False, None, None, None, None,
+                      now),
+   ]
+
+class TelemetryTest(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp()
+      self.path = os.path.join(self.tmpdir, 'telemetry.bin')
+      self.writer = TelemetryWriter(self.path)
+      self.reader = TelemetryReader(self.path)
+      self.records = makeRecords(monotonicRaw())
+
+   def tearDown(self):
+      self.reader.close()
+      self.writer.close()
+      shutil.rmtree(self.tmpdir)
+
+   def testRoundTrip(self):
+      self.writer.publish(self.records, {1: True, 2: False})
+      snapshot = self.reader.read()
+      for record in self.records:
+         self.assertEqual(
+            snapshot.get(record.kind, record.index, record.name), record)
+      self.assertIsNone(snapshot.get('temps', 0, 'fan1'))
+      self.assertIsNone(snapshot.get('temps', 2, 'Board sensor'))
+      self.assertTrue(snapshot.getXcvrPresence(1))
+      self.assertFalse(snapshot.getXcvrPresence(2))
+      self.assertIsNone(snapshot.getXcvrPresence(3))
+
+   def testLongName(self):
+      name = 'A very long sensor name which does not fit in a record'
+      record = TelemetryRecord('temps', 0, name, True, True, 30., None, None,
+                               monotonicRaw())
+      self.writer.publish([record], {})
+      self.assertEqual(self.reader.read().get('temps', 0, name).value, 30.)
+
+   def testDuplicateNames(self):
+      name = 'Front-panel temp sensor'
+      self.writer.publish([
+         TelemetryRecord('temps', 0, name, True, True, 30., None, None,
+                         monotonicRaw()),
+         TelemetryRecord('temps', 1, name, True, True, 40., None, None,
+                         monotonicRaw()),
+      ], {})
+      snapshot = self.reader.read()
+      self.assertEqual(snapshot.get('temps', 0, name).value, 30.)
+      self.assertEqual(snapshot.get('temps', 1, name).value, 40.)
+
+   def testDecodedOnce(self):
+      self.writer.publish(self.records, {})
+      snapshot = self.reader.read()
+      self.assertIs(self.reader.read(), snapshot)
+      self.writer.publish(self.records[:1], {})
+      snapshot = self.reader.read()
+      self.assertEqual(len(snapshot.records), 1)
+
+   def testWriteInProgress(self):
+      self.writer.publish(self.records, {})
+      SEQ.pack_into(self.writer.mm, SEQ_OFFSET, self.writer.seq + 1)
+      self.assertIsNone(self.reader.read())
+      # a new writer completes the interrupted snapshot
+      writer = TelemetryWriter(self.path)
+      writer.publish(self.records, {})
+      writer.close()
+      self.assertIsNotNone(self.reader.read())
+
+   def testOutdated(self):
+      self.writer.publish(self.records, {}, timestamp=0.)
+      self.assertIsNone(self.reader.read())
+
+   def testOutdatedRecord(self):
+      outdated = self.records[0]._replace(time=0.)
+      self.writer.publish([outdated] + self.records[1:], {})
+      snapshot = self.reader.read()
+      self.assertIsNone(snapshot.get('temps', 0, 'Cpu temp sensor'))
+      self.assertIsNotNone(snapshot.get('temps', 1, 'Board sensor'))
+
+   def testMissing(self):
+      reader = TelemetryReader(os.path.join(self.tmpdir, 'missing.bin'))
+      self.assertIsNone(reader.read())
+      # the file is only looked for again after an interval
+      with patch.object(telemetry, 'open', create=True) as mockOpen:
+         self.assertIsNone(reader.read())
+         mockOpen.assert_not_called()
+
+   def testGetTelemetryRecord(self):
+      self.writer.publish(self.records, {})
+      with patch.object(telemetry, '_reader', self.reader), \
+           patch.object(telemetry.utils, 'inSimulation', return_value=False):
+         record = telemetry.getTelemetryRecord('fans', 0, 'fan1')
+         self.assertIsNone(telemetry.getTelemetryRecord('fans', None, 'fan1'))
+      self.assertEqual(record.value, 60.)
+      self.assertFalse(record.status)
+
+   def testGetTelemetryIndex(self):
+      items = [object(), object()]
+      self.assertEqual(telemetry.getTelemetryIndex(items, items[1]), 1)
+      self.assertIsNone(telemetry.getTelemetryIndex(items, object()))
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,115 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+import threading
+
+from ...tests.testing import unittest
+
+from ..trace import (
+   TraceNode,
+   buildTraceTree,
+   criticalPath,
+   currentSpan,
+   disableTracing,
+   enableTracing,
+   getTraceEvents,
+   loadTrace,
+   saveTrace,
+   span,
+   traceParent,
+)
+
+def makeEvent(name, start, end, parent=None):
+   args = {'id': name}
+   if parent:
+      args['parent'] = parent
+   return {'name': name, 'ph': 'X', 'ts': start, 'dur': end - start,
+           'pid': 1, 'tid': 1, 'args': args}
+
+class TraceTest(unittest.TestCase):
+   def setUp(self):
+      self.addCleanup(disableTracing)
+
+   def testDisabled(self):
+      with span('nothing'):
+         pass
+      self.assertEqual(getTraceEvents(), [])
+      self.assertIsNone(currentSpan())
+
+   def testNesting(self):
+      enableTracing()
+      with span('outer', 'test', answer=42):
+         with span('inner', 'test'):
+            pass
+
+      events = getTraceEvents()
+      self.assertEqual([e['name'] for e in events], ['inner', 'outer'])
+      self.assertEqual(events[0]['args']['parent'], events[1]['args']['id'])
+      self.assertEqual(events[1]['args']['answer'], '42')
+      self.assertNotIn('parent', events[1]['args'])
+
+   def testBounded(self):
+      tracer = enableTracing(maxEvents=3)
+      for i in range(5):
+         with span('span%d' % i):
+            pass
+      self.assertEqual([e['name'] for e in getTraceEvents()],
+                       ['span2', 'span3', 'span4'])
+      self.assertEqual(tracer.dropped, 2)
+
+   def testThreadParent(self):
+      enableTracing()
+
+      def worker(parent):
+         with traceParent(parent):
+            with span('worker'):
+               pass
+
+      with span('main'):
+         thread = threading.Thread(target=worker, args=(currentSpan(),))
+         thread.start()
+         thread.join()
+
+      roots = buildTraceTree(getTraceEvents())
+      self.assertEqual(len(roots), 1)
+      self.assertEqual([c.name for c in roots[0].children], ['worker'])
+
+   def testSaveMerge(self):
+      tmpdir = tempfile.mkdtemp()
+      self.addCleanup(shutil.rmtree, tmpdir)
+      path = os.path.join(tmpdir, 'trace.json')
+      enableTracing()
+      with span('first'):
+         pass
+      saveTrace(path, command='first')
+      disableTracing()
+      enableTracing()
+      with span('second'):
+         pass
+      saveTrace(path, command='second')
+      names = [e['name'] for e in loadTrace(path) if e['ph'] == 'X']
+      self.assertEqual(names, ['first', 'second'])
+
+   def testCriticalPath(self):
+      roots = buildTraceTree([
+         makeEvent('setup', 0, 100),
+         makeEvent('a', 0, 20, parent='setup'),
+         # b and c run in parallel, c finishes last
+         makeEvent('b', 20, 50, parent='setup'),
+         makeEvent('c', 20, 90, parent='setup'),
+         makeEvent('c1', 30, 80, parent='c'),
+      ])
+      path = [(depth, node.name) for depth, node in criticalPath(roots)]
+      self.assertEqual(path, [(0, 'setup'), (1, 'a'), (1, 'c'), (2, 'c1')])
+      self.assertEqual(roots[0].selfTime, 10)
+
+   def testSelfTime(self):
+      node = TraceNode(makeEvent('node', 0, 100))
+      node.children = [TraceNode(makeEvent('a', 10, 60)),
+                       TraceNode(makeEvent('b', 40, 70))]
+      self.assertEqual(node.selfTime, 40)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,30 @@
+from __future__ import absolute_import, division, print_function
+
+from ...tests.testing import unittest
+
+from ..uevent import Uevent, pciSlotName
+
+PCI_ADD = b'add@/devices/pci0000:00/0000:00:01.0/0000:06:00.0\0ACTION=add\0' \
+          b'DEVPATH=/devices/pci0000:00/0000:00:01.0/0000:06:00.0\0' \
+          b'SUBSYSTEM=pci\0PCI_SLOT_NAME=0000:06:00.0\0SEQNUM=1234\0'
+I2C_ADD = b'add@/devices/platform/i2c-3/3-0050\0ACTION=add\0SUBSYSTEM=i2c\0'
+UDEV_MSG = b'libudev\0\xfe\xed\xca\xfe'
+
+class UeventTest(unittest.TestCase):
+   def testParsePci(self):
+      event = Uevent.parse(PCI_ADD)
+      self.assertEqual(event.action, 'add')
+      self.assertEqual(event.subsystem, 'pci')
+      self.assertEqual(event.env['SEQNUM'], '1234')
+      self.assertEqual(pciSlotName(event), '0000:06:00.0')
+
+   def testParseOther(self):
+      event = Uevent.parse(I2C_ADD)
+      self.assertEqual(event.subsystem, 'i2c')
+      self.assertIsNone(pciSlotName(event))
+
+   def testIgnoreUdev(self):
+      self.assertIsNone(Uevent.parse(UDEV_MSG))
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,84 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import threading
+
+from ...tests.testing import unittest, patch
+
+from .. import wait
+from ..wait import (
+   FdEventSource,
+   TimeoutError,
+   clearWaitStats,
+   getWaitStats,
+   waitFor,
+)
+
+class WaitForTest(unittest.TestCase):
+   def setUp(self):
+      clearWaitStats()
+
+   def testImmediate(self):
+      self.assertEqual(waitFor(lambda: 42, 'answer'), 42)
+      stats = getWaitStats()
+      self.assertEqual(len(stats), 1)
+      self.assertEqual(stats[0].name, 'answer')
+      self.assertEqual(stats[0].count, 1)
+
+   def testBackoff(self):
+      results = iter([False, False, False, True])
+      with patch('time.sleep') as sleep:
+         self.assertTrue(waitFor(lambda: next(results), 'backoff', delay=0.01))
+      delays = [c[0][0] for c in sleep.call_args_list]
+      self.assertEqual(len(delays), 3)
+      self.assertAlmostEqual(delays[0], 0.01)
+      self.assertAlmostEqual(delays[1], 0.02)
+      self.assertAlmostEqual(delays[2], 0.04)
+
+   def testMaxDelay(self):
+      results = iter([False] * 5 + [True])
+      with patch('time.sleep') as sleep:
+         waitFor(lambda: next(results), delay=0.1, maxDelay=0.2)
+      self.assertTrue(all(c[0][0] <= 0.2 for c in sleep.call_args_list))
+
+   def testTimeout(self):
+      with self.assertRaises(TimeoutError):
+         waitFor(lambda: False, 'never', timeout=0.05)
+      stats = getWaitStats()
+      self.assertEqual(stats[0].timeouts, 1)
+
+   def testCallSiteDescription(self):
+      waitFor(lambda: True)
+      waitFor(lambda: True)
+      names = [stat.name for stat in getWaitStats()]
+      self.assertEqual(len(names), 2)
+      self.assertTrue(all(n.startswith('<lambda> (wait.py:') for n in names))
+
+   def testArgs(self):
+      self.assertEqual(waitFor(lambda a, b=0: a + b, args=(1,),
+                               kwargs={'b': 2}), 3)
+
+   def testEventSource(self):
+      rfd, wfd = os.pipe()
+      self.addCleanup(os.close, rfd)
+      self.addCleanup(os.close, wfd)
+      state = {'ready': False}
+
+      def notify():
+         state['ready'] = True
+         os.write(wfd, b'x')
+
+      timer = threading.Timer(0.05, notify)
+      timer.start()
+      self.addCleanup(timer.join)
+
+      source = FdEventSource(rfd, consume=lambda fd: os.read(fd, 1))
+      # the initial delay is long enough that only the event can wake it up
+      with patch.object(wait.time, 'sleep') as sleep:
+         self.assertTrue(waitFor(lambda: state['ready'], 'pipe', timeout=5,
+                                 delay=5, events=[source]))
+      sleep.assert_not_called()
+      self.assertLess(getWaitStats()[0].last, 4)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,103 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import shutil
+import tempfile
+
+from ...tests.testing import unittest
+
+from ..xcvr import XcvrEepromCache, XcvrEepromStats, upperPage
+
+class XcvrEepromCacheTest(unittest.TestCase):
+   def setUp(self):
+      self.tmpdir = tempfile.mkdtemp()
+      self.path = os.path.join(self.tmpdir, 'eeprom')
+      self.content = bytearray(i % 256 for i in range(upperPage(3)[1]))
+      self._writeEeprom(self.content)
+      self.stats = XcvrEepromStats()
+      self.cache = XcvrEepromCache(self.path, 'qsfp', stats=self.stats)
+
+   def tearDown(self):
+      shutil.rmtree(self.tmpdir)
+
+   def _writeEeprom(self, data):
+      with open(self.path, 'wb') as f:
+         f.write(data)
+
+   def _modify(self, offset, value):
+      self.content[offset] = value
+      self._writeEeprom(self.content)
+
+   def testStaticRegions(self):
+      vendor = self.cache.read(148, 16)
+      self.assertEqual(vendor, self.content[148:164])
+      self.assertEqual(self.stats.misses, 1)
+      original = self.content[150]
+      self._modify(150, 0xff)
+      self.assertEqual(self.cache.read(148, 16), vendor)
+      self.assertEqual(self.cache.read(upperPage(0)[0], 128)[22], original)
+      self.assertEqual(self.stats.hits, 2)
+      self.assertEqual(self.stats.live, 0)
+
+   def testVolatileRegions(self):
+      self.assertEqual(self.cache.read(22, 12), self.content[22:34])
+      self._modify(22, 0xff)
+      self.assertEqual(self.cache.read(22, 12)[0], 0xff)
+      self.assertEqual(self.stats.live, 2)
+      self.assertEqual(self.stats.misses, 0)
+
+   def testSplitRead(self):
+      self.assertEqual(self.cache.read(0, 256), self.content[:256])
+      self._modify(1, 0xff)
+      self._modify(3, 0xff)
+      data = self.cache.read(0, 256)
+      # the lower page is live except for the identifier and revision
+      self.assertEqual(data[1], 1)
+      self.assertEqual(data[3], 0xff)
+      self.assertEqual(self.stats.live, 2)
+      self.assertEqual(self.stats.misses, 2)
+      self.assertEqual(self.stats.hits, 2)
+
+   def testInvalidation(self):
+      self.cache.updatePresence(True)
+      self.cache.read(128, 128)
+      self._modify(130, 0xff)
+      self.cache.updatePresence(True)
+      self.assertNotEqual(self.cache.read(130, 1)[0], 0xff)
+      self.cache.updatePresence(False)
+      self.cache.updatePresence(True)
+      self.assertEqual(self.cache.read(130, 1)[0], 0xff)
+      self._modify(130, 0)
+      self.cache.invalidate()
+      self.assertEqual(self.cache.read(130, 1)[0], 0)
+      self.assertEqual(self.stats.invalidations, 2)
+      self.assertEqual(self.stats.misses, 3)
+
+   def testSwap(self):
+      self.cache.updatePresence(True)
+      self.assertEqual(self.cache.read(148, 16), self.content[148:164])
+      # another module with a different serial number, plugged between two
+      # presence checks
+      self.content[148] = 0xff
+      self.content[223] = 0
+      self._writeEeprom(self.content)
+      self.cache.updatePresence(True)
+      self.assertEqual(self.cache.read(148, 16)[0], 0xff)
+      self.assertEqual(self.stats.invalidations, 1)
+      self.assertEqual(self.stats.misses, 2)
+
+   def testWrite(self):
+      self.cache.read(128, 128)
+      self.cache.write(130, bytearray([0xff]))
+      self.assertEqual(self.cache.read(130, 1)[0], 0xff)
+      self.assertEqual(self.stats.misses, 2)
+
+   def testShortRead(self):
+      self._writeEeprom(self.content[:200])
+      self.assertEqual(len(self.cache.read(128, 128)), 72)
+      self._writeEeprom(self.content)
+      self.assertEqual(len(self.cache.read(128, 128)), 128)
+      self.assertEqual(self.stats.misses, 2)
+
+if __name__ == '__main__':
+   unittest.main()
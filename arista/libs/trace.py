@@ -0,0 +1,250 @@
+from __future__ import absolute_import, division, print_function
+
+import collections
+import contextlib
+import itertools
+import json
+import os
+import sys
+import threading
+
+from ..core.log import getLogger
+from .python import monotonicRaw
+
+logging = getLogger(__name__)
+
+TRACE_FILE = 'boot_trace.json'
+
+# the oldest events are dropped past this count, long running processes like
+# the daemon can trace without their memory growing
+TRACE_MAX_EVENTS = 20000
+
+class Span(object):
+   __slots__ = ['tracer', 'name', 'cat', 'args', 'parent', 'start', 'id']
+
+   def __init__(self, tracer, name, cat, args):
+      self.tracer = tracer
+      self.name = name
+      self.cat = cat
+      self.args = args
+      self.parent = None
+      self.start = None
+      self.id = None
+
+   def __enter__(self):
+      self.tracer.begin(self)
+      return self
+
+   def __exit__(self, *args):
+      self.tracer.end(self)
+      return False
+
+class _NoSpan(object):
+   __slots__ = []
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *args):
+      return False
+
+NO_SPAN = _NoSpan()
+
+class Tracer(object):
+   '''Records nested spans as chrome trace complete events
+
+   Timestamps come from the raw monotonic clock which is shared by all the
+   processes of a boot, so traces of successive commands can be merged.
+   '''
+   def __init__(self, maxEvents=TRACE_MAX_EVENTS):
+      self.pid = os.getpid()
+      self.events = collections.deque(maxlen=maxEvents)
+      self.dropped = 0
+      self.lock = threading.Lock()
+      self.local = threading.local()
+      self.ids = itertools.count(1)
+
+   def currentSpan(self):
+      stack = getattr(self.local, 'stack', None)
+      if stack:
+         return stack[-1].id
+      return getattr(self.local, 'parent', None)
+
+   def begin(self, span):
+      span.parent = self.currentSpan()
+      span.id = '%d-%d' % (self.pid, next(self.ids))
+      if not hasattr(self.local, 'stack'):
+         self.local.stack = []
+      self.local.stack.append(span)
+      span.start = monotonicRaw()
+
+   def end(self, span):
+      end = monotonicRaw()
+      self.local.stack.pop()
+      args = dict((k, str(v)) for k, v in span.args.items())
+      args['id'] = span.id
+      if span.parent is not None:
+         args['parent'] = span.parent
+      event = {
+         'name': str(span.name),
+         'cat': span.cat,
+         'ph': 'X',
+         'ts': span.start * 1000000,
+         'dur': (end - span.start) * 1000000,
+         'pid': self.pid,
+         'tid': threading.current_thread().ident,
+         'args': args,
+      }
+      with self.lock:
+         if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+         self.events.append(event)
+
+# None unless tracing is enabled, hot paths check it through the module
+# before calling span()
+tracer = None
+
+def enableTracing(maxEvents=TRACE_MAX_EVENTS):
+   global tracer
+   if tracer is None:
+      tracer = Tracer(maxEvents=maxEvents)
+   return tracer
+
+def disableTracing():
+   global tracer
+   tracer = None
+
+def tracingEnabled():
+   return tracer is not None
+
+def currentSpan():
+   '''Identifier of the innermost span of the thread, to hand to other threads'''
+   if tracer is None:
+      return None
+   return tracer.currentSpan()
+
+@contextlib.contextmanager
+def traceParent(parent):
+   '''Nest the spans of the current thread under a span of another thread'''
+   current = tracer
+   if current is None:
+      yield
+      return
+   previous = getattr(current.local, 'parent', None)
+   current.local.parent = parent
+   try:
+      yield
+   finally:
+      current.local.parent = previous
+
+def span(name, cat='default', **args):
+   '''Record the enclosed code, name is only converted to str when tracing'''
+   current = tracer
+   if current is None:
+      return NO_SPAN
+   return Span(current, name, cat, args)
+
+def getTraceEvents():
+   if tracer is None:
+      return []
+   with tracer.lock:
+      return list(tracer.events)
+
+def loadTrace(path):
+   try:
+      with open(path) as f:
+         return json.load(f).get('traceEvents', [])
+   except (IOError, OSError, ValueError):
+      return []
+
+def saveTrace(path, command=None):
+   '''Append the events of this process to the trace file at path'''
+   events = getTraceEvents()
+   if not events:
+      return
+   if tracer.dropped:
+      logging.warning('%d trace events were dropped, saving the last %d',
+                      tracer.dropped, len(events))
+   events.insert(0, {
+      'name': 'process_name',
+      'ph': 'M',
+      'pid': tracer.pid,
+      'args': {'name': command or ' '.join(sys.argv)},
+   })
+   allEvents = loadTrace(path) + events
+   tmpPath = '%s.tmp' % path
+   with open(tmpPath, 'w') as f:
+      json.dump({'traceEvents': allEvents, 'displayTimeUnit': 'ms'}, f)
+   os.rename(tmpPath, path)
+   logging.debug('saved %d trace events to %s', len(events) - 1, path)
+
+class TraceNode(object):
+   def __init__(self, event):
+      self.event = event
+      self.name = event['name']
+      self.cat = event.get('cat')
+      self.start = event['ts']
+      self.end = event['ts'] + event['dur']
+      self.children = []
+
+   @property
+   def duration(self):
+      return self.end - self.start
+
+   @property
+   def selfTime(self):
+      busy = 0
+      end = self.start
+      for child in sorted(self.children, key=lambda c: c.start):
+         start = max(end, child.start)
+         if child.end > start:
+            busy += child.end - start
+            end = child.end
+      return self.duration - busy
+
+def buildTraceTree(events):
+   '''Return the root spans, children are linked through their parent id'''
+   nodes = {}
+   for event in events:
+      if event.get('ph') != 'X':
+         continue
+      nodes[event['args'].get('id')] = TraceNode(event)
+   roots = []
+   for node in nodes.values():
+      parent = nodes.get(node.event['args'].get('parent'))
+      if parent is None:
+         roots.append(node)
+      else:
+         parent.children.append(node)
+   for node in nodes.values():
+      node.children.sort(key=lambda c: c.start)
+   roots.sort(key=lambda c: c.start)
+   return roots
+
+def _criticalChain(nodes, end):
+   '''Walk back from end through the spans that finished last'''
+   chain = []
+   candidates = list(nodes)
+   while True:
+      candidates = [n for n in candidates if n.end <= end]
+      if not candidates:
+         break
+      last = max(candidates, key=lambda n: n.end)
+      chain.append(last)
+      end = last.start
+   chain.reverse()
+   return chain
+
+def criticalPath(roots, depth=0):
+   '''Return the (depth, node) pairs on the critical path of the trace
+
+   Siblings running in parallel, like the components set up by several
+   workers, only contribute the one which finished last.
+   '''
+   if not roots:
+      return []
+   path = []
+   for node in _criticalChain(roots, max(n.end for n in roots)):
+      path.append((depth, node))
+      path.extend(criticalPath(node.children, depth + 1))
+   return path
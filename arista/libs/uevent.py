@@ -0,0 +1,105 @@
+from __future__ import absolute_import, division, print_function
+
+import errno
+import os
+import select
+import socket
+
+from ..core.log import getLogger
+
+logging = getLogger(__name__)
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_GROUP_KERNEL = 1
+UEVENT_RCVBUF_SIZE = 1024 * 1024
+UEVENT_MSG_SIZE = 8192
+
+class Uevent(object):
+   def __init__(self, action, devpath, env=None):
+      self.action = action
+      self.devpath = devpath
+      self.env = env or {}
+
+   def __str__(self):
+      return '%s(%s@%s)' % (self.__class__.__name__, self.action, self.devpath)
+
+   @property
+   def subsystem(self):
+      return self.env.get('SUBSYSTEM')
+
+   @classmethod
+   def parse(cls, data):
+      '''Parse a kernel uevent message: action@devpath followed by KEY=VALUE'''
+      fields = data.decode('utf-8', 'replace').split('\0')
+      if '@' not in fields[0]:
+         # messages rebroadcast by udev have a different header
+         return None
+      action, devpath = fields[0].split('@', 1)
+      env = {}
+      for field in fields[1:]:
+         if '=' in field:
+            key, value = field.split('=', 1)
+            env[key] = value
+      return cls(action, devpath, env)
+
+class UeventListener(object):
+   '''Receive the kobject uevents emitted by the kernel'''
+   def __init__(self):
+      self.sock = None
+      self.poller = None
+
+   def __enter__(self):
+      self.open()
+      return self
+
+   def __exit__(self, *args):
+      self.close()
+
+   def open(self):
+      sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                           NETLINK_KOBJECT_UEVENT)
+      try:
+         sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UEVENT_RCVBUF_SIZE)
+         sock.bind((0, UEVENT_GROUP_KERNEL))
+      except Exception:
+         sock.close()
+         raise
+      sock.setblocking(False)
+      self.sock = sock
+      self.poller = select.poll()
+      self.poller.register(sock.fileno(), select.POLLIN)
+
+   def close(self):
+      if self.sock is not None:
+         self.sock.close()
+         self.sock = None
+
+   def fileno(self):
+      return self.sock.fileno()
+
+   def read(self, timeout=None):
+      '''Return the pending uevents, waiting at most timeout seconds for them'''
+      timeoutMs = -1 if timeout is None else max(0, int(timeout * 1000))
+      events = []
+      if not self.poller.poll(timeoutMs):
+         return events
+      while True:
+         try:
+            data = self.sock.recv(UEVENT_MSG_SIZE)
+         except (IOError, OSError) as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+               break
+            if e.errno == errno.ENOBUFS:
+               # events were lost, callers must re-check the state anyway
+               logging.debug('uevent buffer overrun')
+               continue
+            raise
+         event = Uevent.parse(data)
+         if event is not None:
+            events.append(event)
+      return events
+
+def pciSlotName(event):
+   if event.subsystem != 'pci':
+      return None
+   return event.env.get('PCI_SLOT_NAME') or os.path.basename(event.devpath)
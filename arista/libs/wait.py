@@ -1,5 +1,19 @@
+from __future__ import absolute_import, division, print_function
+
+import os
+import select
+import sys
 import time
 
+from collections import OrderedDict
+
+from ..core.log import getLogger
+from ..core.utils import JsonStoredData, inSimulation
+from .python import monotonicRaw
+from .trace import span
+
+logging = getLogger(__name__)
+
 class TimeoutError(Exception):
    def __init__(self, msg, code=1):
       self.msg = msg
@@ -8,12 +22,125 @@ class TimeoutError(Exception):
    def __str__(self):
       return 'TimeoutError: %s (code %d)' % (self.msg, self.code)
 
-def waitFor(func, description=None, timeout=60, sleep=False,
-            args=None, kwargs=None):
+class WaitStat(object):
+   def __init__(self, name):
+      self.name = name
+      self.count = 0
+      self.timeouts = 0
+      self.total = 0.
+      self.max = 0.
+      self.last = 0.
+
+   def record(self, duration, success=True):
+      self.count += 1
+      if not success:
+         self.timeouts += 1
+      self.total += duration
+      self.last = duration
+      self.max = max(self.max, duration)
+
+   def toDict(self):
+      return {
+         'name': self.name,
+         'count': self.count,
+         'timeouts': self.timeouts,
+         'total': self.total,
+         'max': self.max,
+         'last': self.last,
+      }
+
+_waitStats = OrderedDict()
+
+def recordWait(name, duration, success=True):
+   stat = _waitStats.get(name)
+   if stat is None:
+      stat = _waitStats[name] = WaitStat(name)
+   stat.record(duration, success=success)
+   logging.debug('waited %.3fs for %s%s', duration, name,
+                 '' if success else ' (timed out)')
+   return stat
+
+def getWaitStats():
+   return list(_waitStats.values())
+
+def clearWaitStats():
+   _waitStats.clear()
+
+WAIT_STATS_FILE = 'wait_stats.json'
+
+def saveWaitStats(name=WAIT_STATS_FILE):
+   '''Merge the waits of this process into the statistics of the current boot'''
+   if not _waitStats or inSimulation():
+      return
+
+   store = JsonStoredData(name)
+   merged = OrderedDict((d['name'], d) for d in store.readOrClear() or [])
+   for stat in _waitStats.values():
+      data = merged.get(stat.name)
+      if data is None:
+         merged[stat.name] = stat.toDict()
+         continue
+      data['count'] += stat.count
+      data['timeouts'] += stat.timeouts
+      data['total'] += stat.total
+      data['max'] = max(data['max'], stat.max)
+      data['last'] = stat.last
+   store.write(list(merged.values()), mode='w')
+
+class FdEventSource(object):
+   '''Wakes up a pending waitFor early when the fd is ready
+
+   Sources only shorten the backoff sleep, the condition is always
+   re-evaluated so a spurious or missed event is harmless. consume is called
+   with the fd once it is ready to acknowledge the event.
+   '''
+   def __init__(self, fd, events=select.POLLIN, consume=None):
+      self.fd = fd
+      self.events = events
+      self.consumeFunc = consume
+
+   def fileno(self):
+      return self.fd
+
+   def consume(self):
+      if self.consumeFunc is not None:
+         self.consumeFunc(self.fd)
+
+class _EventPoller(object):
+   def __init__(self, sources):
+      self.sources = {}
+      self.poller = select.poll()
+      for source in sources:
+         self.sources[source.fileno()] = source
+         self.poller.register(source.fileno(), source.events)
+
+   def wait(self, timeout):
+      if not self.sources:
+         time.sleep(timeout)
+         return
+      for fd, _ in self.poller.poll(int(timeout * 1000)):
+         self.sources[fd].consume()
+
+   def close(self):
+      for fd in self.sources:
+         self.poller.unregister(fd)
+
+def _callerDescription(func):
+   '''Name a wait after its call site, lambdas all have the same name'''
+   frame = sys._getframe(2) # pylint: disable=protected-access
+   return '%s (%s:%d)' % (getattr(func, '__name__', 'wait'),
+                          os.path.basename(frame.f_code.co_filename),
+                          frame.f_lineno)
+
+def waitFor(func, description=None, timeout=60, sleep=True,
+            args=None, kwargs=None, delay=0.005, maxDelay=1, events=None):
    '''Run func and return if it's True. Otherwise, exit after timeout seconds.
       Inputs: timeout: in second.
-              description: printed out if timeout occurs.
-              sleep: True if we want to avoid busy waiting.
+              description: printed out if timeout occurs and used to name the
+                           wait in the statistics, the call site by default.
+              sleep: False to busy wait, only for sub-millisecond conditions.
+              delay and maxDelay: bounds of the exponential backoff in second.
+              events: FdEventSource objects waking up the backoff early.
               args and kwargs: are inputs for func.
       Outputs: the output of func if it's done, othewise False.
    '''
@@ -21,29 +148,31 @@ def waitFor(func, description=None, timeout=60, sleep=False,
       args = ()
    if kwargs is None:
       kwargs = {}
+   if not description:
+      description = _callerDescription(func)
 
-   def _now():
-      now_in_milli_sec = int(round(time.time() * 1000))
-      return now_in_milli_sec
-
-   start = _now()
-   end = start + timeout * 1000
-   delay = 0.005
-   maxDelay = 1
-   while True:
-      result = func(*args, **kwargs)
-      if result:
-         return result
-      delay *= 2
-      if delay > maxDelay:
-         delay = maxDelay
-      now_ = _now()
-      if now_ + delay > end:
-         delay = end - now_
-         if delay <= 0:
-            if not description:
-               description = func.__name__
-            raise TimeoutError("Timed out waiting for %s" % description)
-      if sleep:
-         time.sleep(delay)
+   start = monotonicRaw()
+   end = start + timeout
+   poller = _EventPoller(events) if events and sleep else None
+   try:
+      with span(description, 'wait'):
+         while True:
+            result = func(*args, **kwargs)
+            if result:
+               recordWait(description, monotonicRaw() - start)
+               return result
+            now = monotonicRaw()
+            if now >= end:
+               recordWait(description, now - start, success=False)
+               raise TimeoutError("Timed out waiting for %s" % description)
+            if sleep:
+               wait = min(delay, end - now)
+               if poller is not None:
+                  poller.wait(wait)
+               else:
+                  time.sleep(wait)
+               delay = min(delay * 2, maxDelay)
+   finally:
+      if poller is not None:
+         poller.close()
    return False
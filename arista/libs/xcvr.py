@@ -0,0 +1,174 @@
+from __future__ import absolute_import, division, print_function
+
+from ..core.log import getLogger
+
+logging = getLogger(__name__)
+
+# the optoe driver maps the upper page N of the module at 128 * (N + 1), the
+# second address of sfps is mapped at 256
+EEPROM_PAGE_SIZE = 128
+
+def upperPage(page):
+   start = EEPROM_PAGE_SIZE * (page + 1)
+   return (start, start + EEPROM_PAGE_SIZE)
+
+# regions which don't change while the module stays plugged, everything else
+# (flags, monitors, controls) is always read from the module
+STATIC_REGIONS = {
+   # serial id, then the thresholds and calibration constants of the A2
+   'sfp': [(0, 96), (256, 352)],
+   # identifier and revision, vendor info and thresholds (SFF-8636)
+   'qsfp': [(0, 2), upperPage(0), upperPage(3)],
+   # identifier, revision and characteristics, vendor info, advertising and
+   # thresholds (CMIS)
+   'osfp': [(0, 3), upperPage(0), upperPage(1), upperPage(2)],
+}
+
+# bytes telling modules apart, the identifier and the checksums of the vendor
+# info which include the serial number (CC_BASE and CC_EXT, or the page 00h
+# checksum of CMIS), compared before serving the cached regions
+SIGNATURE_OFFSETS = {
+   'sfp': [0, 63, 95],
+   'qsfp': [0, 191, 223],
+   'osfp': [0, 222],
+}
+
+class XcvrEepromStats(object):
+   def __init__(self):
+      self.hits = 0
+      self.misses = 0
+      self.live = 0
+      self.invalidations = 0
+
+   def toDict(self):
+      return {
+         'hits': self.hits,
+         'misses': self.misses,
+         'live': self.live,
+         'invalidations': self.invalidations,
+      }
+
+xcvrEepromStats = XcvrEepromStats()
+
+class XcvrEepromCache(object):
+   '''Keep the static regions of a transceiver eeprom in memory
+
+   A static region is read entirely the first time any of its bytes is
+   requested and then served from memory. Reads are split so that the
+   volatile bytes around it still come from the module. The content is
+   dropped when the presence of the module changes or when it is reset.
+   A module swapped between two presence checks is caught by reading its
+   signature bytes again before serving cached regions.
+   '''
+   def __init__(self, path, xcvrType, stats=None):
+      self.path = path
+      self.regions = sorted(STATIC_REGIONS.get(xcvrType, []))
+      self.signatureOffsets = SIGNATURE_OFFSETS.get(xcvrType, [])
+      self.stats = stats or xcvrEepromStats
+      self.data = {}
+      self.signature = None
+      self.present = None
+
+   def __str__(self):
+      return 'XcvrEepromCache(%s)' % self.path
+
+   def _readLive(self, offset, size):
+      with open(self.path, mode='rb', buffering=0) as f:
+         f.seek(offset)
+         return bytearray(f.read(size))
+
+   def _readSignature(self):
+      signature = bytearray()
+      with open(self.path, mode='rb', buffering=0) as f:
+         for offset in self.signatureOffsets:
+            f.seek(offset)
+            signature += f.read(1)
+      return signature
+
+   def _validate(self):
+      '''Drop the cached regions when they come from another module'''
+      if not self.data:
+         return
+      if self._readSignature() != self.signature:
+         logging.debug('%s: module changed', self)
+         self.invalidate()
+
+   def _segments(self, offset, end):
+      '''Split a range into static regions and the live ranges between them'''
+      while offset < end:
+         region = None
+         segmentEnd = end
+         for start, regionEnd in self.regions:
+            if start <= offset < regionEnd:
+               region = (start, regionEnd)
+               segmentEnd = min(regionEnd, end)
+               break
+            if offset < start:
+               segmentEnd = min(start, end)
+               break
+         yield offset, segmentEnd, region
+         offset = segmentEnd
+
+   def _readRegion(self, region):
+      data = self.data.get(region)
+      if data is not None:
+         self.stats.hits += 1
+         return data
+      self.stats.misses += 1
+      start, end = region
+      if not self.data:
+         self.signature = self._readSignature()
+      data = self._readLive(start, end - start)
+      # partial reads are not kept, the module may still be initializing
+      if len(data) == end - start:
+         self.data[region] = data
+      return data
+
+   def read(self, offset, size):
+      data = bytearray()
+      validated = False
+      for start, end, region in self._segments(offset, offset + size):
+         if region is not None and not validated:
+            self._validate()
+            validated = True
+         if region is None:
+            self.stats.live += 1
+            chunk = self._readLive(start, end - start)
+         else:
+            chunk = self._readRegion(region)[start - region[0]:end - region[0]]
+         data += chunk
+         if len(chunk) < end - start:
+            break
+      return data
+
+   def write(self, offset, data):
+      end = offset + len(data)
+      for region in list(self.data):
+         if region[0] < end and offset < region[1]:
+            del self.data[region]
+      with open(self.path, mode='r+b', buffering=0) as f:
+         f.seek(offset)
+         f.write(data)
+
+   def invalidate(self):
+      if self.data:
+         logging.debug('%s: dropping the cached regions', self)
+         self.stats.invalidations += 1
+         self.data.clear()
+
+   def updatePresence(self, present):
+      if present != self.present:
+         self.invalidate()
+         self.present = present
+
+_caches = {}
+
+def getXcvrEepromCache(path, xcvrType):
+   '''Return the cache of the eeprom, shared by all its users in a process'''
+   cache = _caches.get(path)
+   if cache is None:
+      cache = _caches[path] = XcvrEepromCache(path, xcvrType)
+   return cache
+
+def getXcvrEepromStats():
+   return xcvrEepromStats.toDict()
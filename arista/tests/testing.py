@@ -3,7 +3,9 @@ from __future__ import absolute_import, division, print_function
 
 # pylint: disable=unused-import
 
+import os
 import re
+import timeit
 import unittest
 
 try:
@@ -13,6 +15,24 @@ except ImportError:
 
 patch = mock.patch
 
+# benchmarks only report timings, they run when an iteration count is given
+BENCH_ITERATIONS = int(os.getenv('ARISTA_BENCH_ITERATIONS', '0'))
+
+benchmark = unittest.skipUnless(BENCH_ITERATIONS,
+                                'ARISTA_BENCH_ITERATIONS is not set')
+
+_benchLogger = None
+
+def bench(name, func, unit='call'):
+   '''Log and return the average duration of func in seconds'''
+   global _benchLogger
+   if _benchLogger is None:
+      from .logging import getLogger
+      _benchLogger = getLogger('arista.benchmark')
+   elapsed = timeit.timeit(func, number=BENCH_ITERATIONS) / BENCH_ITERATIONS
+   _benchLogger.info('%-24s %10.2f us/%s', name, elapsed * 1e6, unit)
+   return elapsed
+
 # these methods only exist in modern versions of python
 if not hasattr( unittest.TestCase, 'assertRegex' ):
    def assertRegex( self, string, regex, **kwargs ):
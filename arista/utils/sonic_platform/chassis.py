@@ -14,6 +14,7 @@ try:
    from arista.core.onie import OnieEeprom
    from arista.core.platform import readPrefdl
    from arista.core.supervisor import Supervisor
+   from arista.libs.broker import getBrokeredInventory
    from arista.utils.sonic_platform.fan import Fan
    from arista.utils.sonic_platform.fan_drawer import FanDrawer, FanDrawerLegacy
    from arista.utils.sonic_platform.module import (
@@ -48,7 +49,7 @@ class Chassis(ChassisBase):
       # Because of syseepromd, self._eeprom has to be populated correctly or
       # not at all
       #self._eeprom = Eeprom(self._prefdl)
-      self._inventory = platform.getInventory()
+      self._inventory = getBrokeredInventory(platform.getInventory())
       if isinstance(platform, Supervisor):
          chassis = platform.getChassis()
          for supervisor in chassis.iterSupervisors(presentOnly=False):
@@ -63,22 +64,23 @@ class Chassis(ChassisBase):
 
       if self._inventory.getFanSlots():
          for slot in self._inventory.getFanSlots():
-            self._fan_drawer_list.append(FanDrawer(self, slot))
+            self._fan_drawer_list.append(
+               FanDrawer(self, slot, self._inventory.getFans()))
       else:
          # TODO: Remove this block of code once FanDrawer is implemented everywhere
-         for fan in self._inventory.getFans():
-            self._fan_list.append(Fan(None, fan))
+         for index, fan in enumerate(self._inventory.getFans()):
+            self._fan_list.append(Fan(None, fan, index))
          for fan in self._fan_list:
             self._fan_drawer_list.append(FanDrawerLegacy(fan))
-      for slot in self._inventory.getPsuSlots():
-         self._psu_list.append(Psu(slot))
+      for index, slot in enumerate(self._inventory.getPsuSlots()):
+         self._psu_list.append(Psu(slot, index))
       self._sfp_list = []
       if self._inventory and self._inventory.portEnd:
          self._sfp_list = [None] * (self._inventory.portEnd)
          for index, sfp in self._inventory.getXcvrs().items():
             self._sfp_list[index - 1] = Sfp(index, sfp)
-      for thermal in self._inventory.getTemps():
-         self._thermal_list.append(Thermal(thermal))
+      for index, thermal in enumerate(self._inventory.getTemps()):
+         self._thermal_list.append(Thermal(thermal, index))
       self._watchdog = Watchdog(self._inventory.getWatchdog())
 
       self._interrupt_dict, self._presence_dict = \
@@ -4,6 +4,7 @@ from __future__ import print_function
 
 try:
    from sonic_platform_base.fan_base import FanBase
+   from arista.libs.telemetry import getTelemetryRecord
 except ImportError as e:
    raise ImportError("%s - required module not found" % e)
 
@@ -26,10 +27,11 @@ class Fan(FanBase):
       'unknown': FanBase.FAN_DIRECTION_NOT_APPLICABLE,
    }
 
-   def __init__(self, parent, fan):
+   def __init__(self, parent, fan, telemetryIndex=None):
       self._parent = parent
       self._target_speed = None
       self._fan = fan
+      self._telemetryIndex = telemetryIndex
 
    def get_name(self):
       return self._fan.getName()
@@ -38,6 +40,10 @@ class Fan(FanBase):
       return self.fanDirectionConversion[self._fan.getDirection()]
 
    def get_speed(self):
+      record = getTelemetryRecord('fans', self._telemetryIndex,
+                                  self.get_name())
+      if record is not None and record.value is not None:
+         return int(record.value)
       return self._fan.getSpeed()
 
    def get_target_speed(self):
@@ -1,14 +1,18 @@
 
 try:
    from sonic_platform_base.fan_drawer_base import FanDrawerBase
+   from arista.libs.telemetry import getTelemetryIndex
    from .fan import Fan
 except ImportError as e:
    raise ImportError("%s - required module not found" % e)
 
 class FanDrawer(FanDrawerBase):
-   def __init__(self, parent, slot):
+   def __init__(self, parent, slot, telemetryFans=None):
       self._parent = parent
-      self._fan_list = [Fan(self, fan) for fan in slot.getFans()]
+      # fans are published by the daemon in the order of the inventory
+      telemetryFans = telemetryFans or []
+      self._fan_list = [Fan(self, fan, getTelemetryIndex(telemetryFans, fan))
+                        for fan in slot.getFans()]
       self._slot = slot
 
    def get_name(self):
@@ -4,6 +4,7 @@ from __future__ import print_function
 
 try:
    from sonic_platform_base.psu_base import PsuBase
+   from arista.libs.telemetry import getTelemetryRecord
 except ImportError as e:
    raise ImportError("%s - required module not found" % e)
 
@@ -12,9 +13,10 @@ class Psu(PsuBase):
    Platform-specific PSU class
    """
 
-   def __init__(self, slot):
+   def __init__(self, slot, telemetryIndex=None):
       super(Psu, self).__init__()
       self._slot = slot
+      self._telemetryIndex = telemetryIndex
       # TODO: add thermal info
       # TODO: add fan info
       # TODO: add power info
@@ -60,6 +62,10 @@ class Psu(PsuBase):
 
    def get_status(self):
       # TODO: check status of power supply itself
+      record = getTelemetryRecord('psuSlots', self._telemetryIndex,
+                                  self.get_name())
+      if record is not None and record.status is not None:
+         return record.status
       return self._slot.getStatus()
 
    def get_presence(self):
@@ -6,6 +6,8 @@ import time
 
 try:
    from sonic_platform_base.sfp_base import SfpBase
+   from arista.libs.telemetry import readTelemetry
+   from arista.libs.xcvr import getXcvrEepromCache
 except ImportError as e:
    raise ImportError("%s - required module not found" % e)
 
@@ -43,6 +45,7 @@ class Sfp(SfpBase):
       self._sfp = sfp
       self._sfputil = None
       self._eepromPath = EEPROM_PATH.format(sfp.addr.bus, sfp.addr.address)
+      self._eeprom = getXcvrEepromCache(self._eepromPath, sfp.getType())
       self.sfp_type = sfp.getType().upper()
 
    def get_id(self):
@@ -52,7 +55,14 @@ class Sfp(SfpBase):
       return self._sfp.getName()
 
    def get_presence(self):
-      return self._sfp.getPresence()
+      presence = None
+      snapshot = readTelemetry()
+      if snapshot is not None:
+         presence = snapshot.getXcvrPresence(self._index)
+      if presence is None:
+         presence = self._sfp.getPresence()
+      self._eeprom.updatePresence(presence)
+      return presence
 
    def get_lpmode(self):
       return self._sfp.getLowPowerMode()
@@ -75,6 +85,7 @@ class Sfp(SfpBase):
       return True
 
    def reset(self):
+      self._eeprom.invalidate()
       try:
          self._sfp.getReset().resetIn()
       except: # pylint: disable-msg=W0702
@@ -117,17 +128,13 @@ class Sfp(SfpBase):
 
    def read_eeprom(self, offset, num_bytes):
       try:
-         with open(self._eepromPath, mode='rb', buffering=0) as f:
-            f.seek(offset)
-            return bytearray(f.read(num_bytes))
+         return self._eeprom.read(offset, num_bytes)
       except (OSError, IOError):
          return None
 
    def write_eeprom(self, offset, num_bytes, write_buffer):
       try:
-         with open(self._eepromPath, mode='r+b', buffering=0) as f:
-            f.seek(offset)
-            f.write(write_buffer[0:num_bytes])
+         self._eeprom.write(offset, write_buffer[0:num_bytes])
       except (OSError, IOError):
          return False
       return True
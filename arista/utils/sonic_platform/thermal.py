@@ -4,6 +4,8 @@ from __future__ import print_function
 
 try:
    from sonic_platform_base.thermal_base import ThermalBase
+   from arista.libs.history import getRecordedRange
+   from arista.libs.telemetry import getTelemetryRecord
 except ImportError as e:
    raise ImportError("%s - required module not found" % e)
 
@@ -12,8 +14,9 @@ class Thermal(ThermalBase):
    Platform-specific class for interfacing with a thermal module
    """
 
-   def __init__(self, temp):
+   def __init__(self, temp, telemetryIndex=None):
       self._temp = temp
+      self._telemetryIndex = telemetryIndex
       self._minimum = None
       self._maximum = None
 
@@ -39,7 +42,11 @@ class Thermal(ThermalBase):
       return None
 
    def get_temperature(self):
-      value = self._temp.getTemperature()
+      record = getTelemetryRecord('temps', self._telemetryIndex,
+                                  self.get_name())
+      value = record.value if record is not None else None
+      if value is None:
+         value = self._temp.getTemperature()
       if self._minimum is None or self._minimum > value:
          self._minimum = value
       if self._maximum is None or self._maximum < value:
@@ -83,11 +90,20 @@ class Thermal(ThermalBase):
    def get_minimum_recorded(self):
       if self._minimum is None:
          self.get_temperature()
+      # the history of the daemon outlives this process
+      recorded = getRecordedRange('temps', self._telemetryIndex,
+                                  self.get_name())
+      if recorded is not None:
+         return min(recorded[0], self._minimum)
       return self._minimum
 
    def get_maximum_recorded(self):
       if self._maximum is None:
          self.get_temperature()
+      recorded = getRecordedRange('temps', self._telemetryIndex,
+                                  self.get_name())
+      if recorded is not None:
+         return max(recorded[1], self._maximum)
       return self._maximum
 
    def get_inventory_object(self):
@@ -7,6 +7,7 @@ try:
       import ThermalPolicyInfoBase
    from sonic_platform_base.sonic_thermal_control.thermal_json_object \
       import thermal_json_object
+   from arista.core.thermal_control import SensorArray
 except ImportError as e:
    raise ImportError("%s - required module not found" % e)
 
@@ -44,16 +45,24 @@ class ThermalInfo(ThermalPolicyInfo):
       self.thermals = {}
       self.thermals_overheat = {}
       self.thermals_critical = {}
+      self.sensors = None
+      self.sensorThermals = None
 
    def collect(self, chassis):
-      for thermal in chassis.get_all_thermals():
-         desc = thermal.get_inventory_object().getDesc()
+      thermals = chassis.get_all_thermals()
+      if self.sensorThermals != thermals:
+         self.sensors = SensorArray([t.get_inventory_object().getDesc()
+                                     for t in thermals])
+         self.sensorThermals = list(thermals)
+      self.sensors.update(t.get_temperature() if t.get_status() else None
+                          for t in thermals)
+      overheat = self.sensors.overheat()
+      critical = self.sensors.critical()
+      for i, thermal in enumerate(thermals):
          name = thermal.get_name()
-         value = thermal.get_temperature()
-         status = thermal.get_status()
          self.thermals[name] = thermal
-         self.thermals_overheat[name] = value > desc.overheat if status else False
-         self.thermals_critical[name] = value > desc.critical if status else False
+         self.thermals_overheat[name] = overheat[i]
+         self.thermals_critical[name] = critical[i]
 
 @thermal_json_object("control_info")
 class ControlInfo(ThermalPolicyInfo):
@@ -2,6 +2,7 @@ import select
 import time
 
 from .sonic_utils import getInventory
+from ..libs.xcvr import getXcvrEepromCache
 
 try:
     from sonic_sfp.sfputilbase import SfpUtilBase
@@ -46,6 +47,31 @@ def getSfpUtil():
 
         def __init__(self):
             SfpUtilBase.__init__(self)
+            self._eepromCaches = {
+               path: getXcvrEepromCache(path,
+                                        inventory.getXcvr(xcvrId).getType())
+               for xcvrId, path in self.port_to_eeprom_mapping.items()
+            }
+
+        def _getEepromCache(self, port_num):
+            path = self.port_to_eeprom_mapping.get(port_num)
+            return self._eepromCaches.get(path)
+
+        def _read_eeprom_specific_bytes(self, sysfsfile_eeprom, offset,
+                                        num_bytes):
+            # static pages are served from memory, the file opened by the
+            # base class is only used for the volatile ones
+            cache = self._eepromCaches.get(sysfsfile_eeprom.name)
+            if cache is None:
+                return SfpUtilBase._read_eeprom_specific_bytes(
+                    self, sysfsfile_eeprom, offset, num_bytes)
+            try:
+                raw = cache.read(offset, num_bytes)
+            except (IOError, OSError):
+                return None
+            if len(raw) < num_bytes:
+                return None
+            return ['%02x' % b for b in raw]
 
     class SfpUtilNative(SfpUtilCommon):
         """Native Sonic SfpUtil class"""
@@ -53,7 +79,9 @@ def getSfpUtil():
             if not self._is_valid_port(port_num):
                 return False
 
-            return inventory.getXcvr(port_num).getPresence()
+            presence = inventory.getXcvr(port_num).getPresence()
+            self._getEepromCache(port_num).updatePresence(presence)
+            return presence
 
         def get_low_power_mode(self, port_num):
             if not self._is_valid_port(port_num):
@@ -79,6 +107,8 @@ def getSfpUtil():
             if xcvr is None:
                return False
 
+            self._getEepromCache(port_num).invalidate()
+
             try:
                xcvr.resetIn()
             except:
@@ -117,7 +147,10 @@ def getSfpUtil():
                   pollRet = dict(pollRet)
                   for xcvr, openFile in openFiles:
                      if openFile.fileno() in pollRet:
-                        ret[str(xcvr.xcvrId)] = '1' if xcvr.getPresence() else '0'
+                        presence = xcvr.getPresence()
+                        self._getEepromCache(xcvr.xcvrId).updatePresence(
+                           presence)
+                        ret[str(xcvr.xcvrId)] = '1' if presence else '0'
                   return True, ret
             finally:
                for _, openFile in openFiles:
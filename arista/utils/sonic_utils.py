@@ -6,6 +6,7 @@ from collections import namedtuple
 from .. import platforms
 from ..core.utils import runningInContainer
 from ..core import platform
+from ..libs.broker import getBrokeredInventory
 
 Port = namedtuple('Port', ['portNum', 'lanes', 'offset', 'singular', 'alias'])
 
@@ -70,4 +71,4 @@ def portConfigPath():
                         "port_config.ini")
 
 def getInventory():
-   return platform.getPlatform().getInventory()
+   return getBrokeredInventory(platform.getPlatform().getInventory())
@@ -29,6 +29,7 @@ if sys.version_info.major == 2:
    ])
    file_exclude.extend([
       '*/daemon.py',
+      '*/libs/tests/broker.py',
    ])
    tests_require.extend([
       'mock<=3.0.5', # for python2, version >=4.0.0 drops support for py2
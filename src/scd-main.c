@@ -616,6 +616,83 @@ static ssize_t show_smbus_tweaks(struct device *dev, struct device_attribute *at
 static DEVICE_ATTR(smbus_tweaks, S_IRUSR|S_IRGRP|S_IWUSR|S_IWGRP,
                    show_smbus_tweaks, smbus_tweaks);
 
+static ssize_t show_xcvr_registers(struct device *dev,
+                                   struct device_attribute *attr, char *buf)
+{
+   struct scd_context *ctx = get_context_for_dev(dev);
+   ssize_t count;
+
+   if (!ctx) {
+      return -ENODEV;
+   }
+
+   scd_lock(ctx);
+   count = scd_xcvr_dump_registers(ctx, buf, PAGE_SIZE);
+   scd_unlock(ctx);
+
+   return count;
+}
+
+static ssize_t parse_xcvr_register(struct scd_context *ctx, const char *buf,
+                                   size_t count)
+{
+   char buf_copy[MAX_CONFIG_LINE_SIZE];
+   char *ptr = buf_copy;
+   const char *tmp;
+   const char *name;
+   u32 mask;
+   u32 value;
+   int err;
+
+   if (count >= MAX_CONFIG_LINE_SIZE) {
+      dev_err(get_scd_dev(ctx), "xcvr_registers line is too long: %zu\n",
+              count);
+      return -EINVAL;
+   }
+
+   strncpy(buf_copy, buf, count);
+   buf_copy[count] = 0;
+
+   PARSE_STR_OR_RETURN(&ptr, tmp, name);
+   PARSE_INT_OR_RETURN(&ptr, tmp, u32, &mask);
+   PARSE_INT_OR_RETURN(&ptr, tmp, u32, &value);
+   PARSE_END_OR_RETURN(&ptr, tmp);
+
+   err = scd_xcvr_update_register(ctx, name, mask, value);
+   if (err) {
+      dev_err(get_scd_dev(ctx), "no transceiver named %s\n", name);
+      return err;
+   }
+
+   return count;
+}
+
+/*
+ * Each line written is "<xcvr> <mask> <value>", the bits of mask are set to
+ * value in the register of the transceiver. The read modify writes of all the
+ * lines are done under the scd lock.
+ */
+static ssize_t store_xcvr_registers(struct device *dev,
+                                    struct device_attribute *attr,
+                                    const char *buf, size_t count)
+{
+   struct scd_context *ctx = get_context_for_dev(dev);
+   ssize_t res;
+
+   if (!ctx) {
+      return -ENODEV;
+   }
+
+   scd_lock(ctx);
+   res = parse_lines(ctx, buf, count, parse_xcvr_register);
+   scd_unlock(ctx);
+
+   return res;
+}
+
+static DEVICE_ATTR(xcvr_registers, S_IRUGO|S_IWUSR|S_IWGRP,
+                   show_xcvr_registers, store_xcvr_registers);
+
 static int scd_create_sysfs_files(struct scd_context *ctx) {
    int err;
 
@@ -633,8 +710,17 @@ static int scd_create_sysfs_files(struct scd_context *ctx) {
       goto fail_smbus_tweaks;
    }
 
+   err = sysfs_create_file(get_scd_kobj(ctx), &dev_attr_xcvr_registers.attr);
+   if (err) {
+      dev_err(get_scd_dev(ctx), "could not create %s attribute: %d",
+              dev_attr_xcvr_registers.attr.name, err);
+      goto fail_xcvr_registers;
+   }
+
    return 0;
 
+fail_xcvr_registers:
+   sysfs_remove_file(get_scd_kobj(ctx), &dev_attr_smbus_tweaks.attr);
 fail_smbus_tweaks:
    sysfs_remove_file(get_scd_kobj(ctx), &dev_attr_new_object.attr);
 fail_new_object:
@@ -725,6 +811,7 @@ static void scd_ext_hwmon_remove(struct pci_dev *pdev)
 
    sysfs_remove_file(&pdev->dev.kobj, &dev_attr_new_object.attr);
    sysfs_remove_file(&pdev->dev.kobj, &dev_attr_smbus_tweaks.attr);
+   sysfs_remove_file(&pdev->dev.kobj, &dev_attr_xcvr_registers.attr);
 
    kfree(ctx);
 
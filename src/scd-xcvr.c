@@ -21,13 +21,12 @@
 #include "scd-hwmon.h"
 #include "scd-xcvr.h"
 
-static u32 scd_xcvr_read_register(const struct scd_xcvr_attribute *gpio)
+static u32 scd_xcvr_read_register(struct scd_xcvr *xcvr)
 {
-   struct scd_xcvr *xcvr = gpio->xcvr;
    int i;
    u32 reg;
 
-   reg = scd_read_register(gpio->xcvr->ctx->pdev, gpio->xcvr->addr);
+   reg = scd_read_register(xcvr->ctx->pdev, xcvr->addr);
    for (i = 0; i < XCVR_ATTR_MAX_COUNT; i++) {
       if (xcvr->attr[i].clear_on_read) {
          xcvr->attr[i].clear_on_read_value =
@@ -44,7 +43,7 @@ static ssize_t attribute_xcvr_get(struct device *dev,
    u32 res;
    u32 reg;
 
-   reg = scd_xcvr_read_register(gpio);
+   reg = scd_xcvr_read_register(gpio->xcvr);
    res = !!(reg & (1 << gpio->bit));
    res = (gpio->active_low) ? !res : res;
    if (gpio->clear_on_read) {
@@ -70,7 +69,7 @@ static ssize_t attribute_xcvr_set(struct device *dev,
    if (value != 0 && value != 1)
       return -EINVAL;
 
-   reg = scd_xcvr_read_register(gpio);
+   reg = scd_xcvr_read_register(gpio->xcvr);
    if (gpio->active_low) {
       if (value)
          reg &= ~(1 << gpio->bit);
@@ -87,6 +86,51 @@ static ssize_t attribute_xcvr_set(struct device *dev,
    return count;
 }
 
+/*
+ * Dump the register of every transceiver, the clear on read bits are saved
+ * the same way as when reading the individual attributes.
+ * Must be called with the scd lock held.
+ */
+ssize_t scd_xcvr_dump_registers(struct scd_context *ctx, char *buf, size_t max)
+{
+   struct scd_xcvr *xcvr;
+   ssize_t count = 0;
+
+   list_for_each_entry(xcvr, &ctx->xcvr_list, list) {
+      count += scnprintf(buf + count, max - count, "%s 0x%08x\n", xcvr->name,
+                         scd_xcvr_read_register(xcvr));
+      if (count == max) {
+         return count;
+      }
+   }
+
+   return count;
+}
+
+/*
+ * Set the bits of mask to value in the register of the transceiver named
+ * name, the clear on read bits are saved while reading it back.
+ * Must be called with the scd lock held.
+ */
+int scd_xcvr_update_register(struct scd_context *ctx, const char *name,
+                             u32 mask, u32 value)
+{
+   struct scd_xcvr *xcvr;
+   u32 reg;
+
+   list_for_each_entry(xcvr, &ctx->xcvr_list, list) {
+      if (strcmp(xcvr->name, name)) {
+         continue;
+      }
+      reg = scd_xcvr_read_register(xcvr);
+      reg = (reg & ~mask) | (value & mask);
+      scd_write_register(ctx->pdev, xcvr->addr, reg);
+      return 0;
+   }
+
+   return -ENOENT;
+}
+
 static void scd_xcvr_unregister(struct scd_context *ctx, struct scd_xcvr *xcvr)
 {
    int i;
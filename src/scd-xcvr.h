@@ -72,5 +72,9 @@ extern int scd_xcvr_sfp_add(struct scd_context *ctx, u32 addr, u32 id);
 extern int scd_xcvr_qsfp_add(struct scd_context *ctx, u32 addr, u32 id);
 extern int scd_xcvr_osfp_add(struct scd_context *ctx, u32 addr, u32 id);
 extern void scd_xcvr_remove_all(struct scd_context *ctx);
+extern ssize_t scd_xcvr_dump_registers(struct scd_context *ctx, char *buf,
+                                       size_t max);
+extern int scd_xcvr_update_register(struct scd_context *ctx, const char *name,
+                                    u32 mask, u32 value);
 
 #endif /* _LINUX_DRIVER_SCD_XCVR_H_ */